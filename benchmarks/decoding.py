@@ -0,0 +1,97 @@
+"""Скорость разбора страниц списка задач из ответа бэкенда.
+
+Запуск: python -m benchmarks.decoding [--rows 50] [--page-size 5]
+        [--iterations 2000]
+
+before - прежний конвейер: json.loads, сущность Task, затем
+TaskShortSchema с переводом дат в часовой пояс через pytz.
+after - ApiResponse.validate: байты ответа разбираются сразу в
+PageSchema[TaskShortSchema] парсером pydantic-core.
+
+Меряются окно целиком (--rows строк) и одна страница (--page-size
+строк), которую прежний код собирал только из нужного среза.
+"""
+
+import argparse
+import json
+import time
+
+import pytz
+
+from entities.tasks import Task
+from repositories.responses import ApiResponse
+from schemas.pagination import PageSchema
+from schemas.tasks import TaskShortSchema
+
+TIMEZONE = pytz.timezone("America/Adak")
+
+
+def make_body(rows: int) -> bytes:
+    return json.dumps(
+        {
+            "results": [
+                {
+                    "id": f"{index:032x}",
+                    "title": f"Задача {index}",
+                    "description": "Собрать метрики за неделю",
+                    "deadline": "2026-01-01T10:00:00+03:00",
+                    "status": 1,
+                    "created_at": "2025-12-01T10:00:00.123456+03:00",
+                    "completed_at": None,
+                    "categories": [{"id": 1, "name": "Работа"}],
+                }
+                for index in range(rows)
+            ],
+            "next": None,
+            "previous": None,
+        }
+    ).encode()
+
+
+def decode_before(body: bytes, size: int) -> list[TaskShortSchema]:
+    results = json.loads(body)["results"][:size]
+    tasks = []
+    for row in results:
+        task = Task.to_entity(row)
+        tasks.append(
+            TaskShortSchema(
+                id=task.id,
+                title=task.title,
+                deadline=task.deadline.astimezone(TIMEZONE),
+                created_at=task.created_at.astimezone(TIMEZONE),
+            )
+        )
+    return tasks
+
+
+def decode_after(body: bytes, size: int) -> list[TaskShortSchema]:
+    response = ApiResponse(method="GET", url="", status=200, body=body)
+    return response.validate(PageSchema[TaskShortSchema]).results[:size]
+
+
+def measure(decode, body: bytes, size: int, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        decode(body, size)
+    return iterations * size / (time.perf_counter() - started)
+
+
+def main(rows: int, page_size: int, iterations: int) -> None:
+    body = make_body(rows)
+    assert decode_before(body, rows) == decode_after(body, rows)
+    for size in (rows, page_size):
+        for name, decode in (
+            ("before", decode_before),
+            ("after", decode_after),
+        ):
+            rate = measure(decode, body, size, iterations)
+            print(f"{name:<8} {size:>4} строк из {rows}: {rate:10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.rows, args.page_size, args.iterations)
@@ -0,0 +1,239 @@
+import asyncio
+import itertools
+import random
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+
+from aiohttp import web
+
+from enums.tasks import TaskStatusEnum
+
+CATEGORIES = [
+    {"id": 1, "name": "Работа"},
+    {"id": 2, "name": "Дом"},
+    {"id": 3, "name": "Учёба"},
+]
+
+
+class FakeBackend:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8090,
+        *,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        tasks_per_user: int = 30,
+    ):
+        """Локальная заглушка бэкенда (API_URL) для бенчмарков.
+
+        Реализует эндпоинты, которые вызывают репозитории: пользователи,
+        список задач с пагинацией и фильтрами page, page_size,
+        is_active, deadline и ordering, детальная задача, создание,
+        изменение, завершение, удаление и категории. Каждый ответ
+        задерживается на latency + random(0, jitter) секунд. Задачи
+        пользователя создаются при первом обращении, с дедлайнами от
+        вчера до недели вперёд.
+        """
+
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.tasks_per_user = tasks_per_user
+        self.users: dict[str, dict] = {}
+        self.tasks: dict[str, dict[str, dict]] = defaultdict(dict)
+        self.calls: Counter[str] = Counter()
+        self._ids = itertools.count(1)
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        app = web.Application(middlewares=[self._delay])
+        router = app.router
+        router.add_get("/api/v1/users/{user_id}", self._get_user)
+        router.add_post("/api/v1/users/", self._create_user)
+        router.add_get("/api/v1/tasks/categories/", self._categories)
+        router.add_get("/api/v1/tasks/", self._list_tasks)
+        router.add_post("/api/v1/tasks/", self._create_task)
+        router.add_get("/api/v1/tasks/{pk}/", self._get_task)
+        router.add_patch("/api/v1/tasks/{pk}/", self._update_task)
+        router.add_delete("/api/v1/tasks/{pk}/", self._delete_task)
+        router.add_post("/api/v1/tasks/{pk}/complete/", self._complete_task)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self) -> None:
+        await self._runner.cleanup()
+
+    @web.middleware
+    async def _delay(self, request: web.Request, handler):
+        route = request.match_info.route.resource
+        self.calls[
+            f"{request.method} {route.canonical if route else request.path}"
+        ] += 1
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        return await handler(request)
+
+    def get_user_tasks(self, user_id: str) -> dict[str, dict]:
+        tasks = self.tasks[user_id]
+        if not tasks and self.tasks_per_user:
+            now = datetime.now(timezone.utc)
+            for index in range(self.tasks_per_user):
+                self._add_task(
+                    user_id,
+                    {
+                        "title": f"Задача {index}",
+                        "description": "Описание",
+                        "deadline": (
+                            now + timedelta(hours=index * 6 - 24)
+                        ).isoformat(),
+                        "categories": [CATEGORIES[index % 3]["id"]],
+                    },
+                    status=TaskStatusEnum.DONE if index % 5 == 0 else None,
+                )
+        return tasks
+
+    def _add_task(
+        self,
+        user_id: str,
+        payload: dict,
+        status: TaskStatusEnum | None = None,
+    ) -> dict:
+        task_id = str(next(self._ids))
+        now = datetime.now(timezone.utc).isoformat()
+        task = {
+            "id": task_id,
+            "title": payload["title"],
+            "description": payload.get("description"),
+            "deadline": payload.get("deadline") or now,
+            "created_at": now,
+            "completed_at": None,
+            "status": (status or TaskStatusEnum.ACTIVE).value[0],
+            "categories": [
+                category
+                for category in CATEGORIES
+                if category["id"] in payload.get("categories", [])
+            ],
+        }
+        if status == TaskStatusEnum.DONE:
+            task["completed_at"] = now
+        self.tasks[user_id][task_id] = task
+        return task
+
+    @staticmethod
+    def _short(task: dict) -> dict:
+        return {
+            key: task[key] for key in ("id", "title", "deadline", "created_at")
+        }
+
+    async def _get_user(self, request: web.Request) -> web.Response:
+        user = self.users.get(request.match_info["user_id"])
+        if user is None:
+            return web.json_response({"detail": "Not found"}, status=404)
+        return web.json_response(user)
+
+    async def _create_user(self, request: web.Request) -> web.Response:
+        user = await request.json()
+        self.users[str(user["user_id"])] = user
+        return web.json_response(user, status=201)
+
+    async def _categories(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"results": CATEGORIES, "next": None, "previous": None}
+        )
+
+    async def _list_tasks(self, request: web.Request) -> web.Response:
+        query = request.query
+        tasks = list(self.get_user_tasks(query["user_id"]).values())
+        if "is_active" in query:
+            done = TaskStatusEnum.DONE.value[0]
+            is_active = query["is_active"] == "true"
+            tasks = [
+                task for task in tasks if (task["status"] != done) == is_active
+            ]
+        if "deadline" in query:
+            tasks = [
+                task
+                for task in tasks
+                if task["deadline"][:10] == query["deadline"]
+            ]
+        ordering = query.get("ordering", "deadline")
+        tasks.sort(
+            key=lambda task: task[ordering.lstrip("-")],
+            reverse=ordering.startswith("-"),
+        )
+
+        page = int(query.get("page", 1))
+        page_size = int(query.get("page_size", 10))
+        start = (page - 1) * page_size
+        if page > 1 and start >= len(tasks):
+            return web.json_response({"detail": "Invalid page."}, status=404)
+
+        def link(number: int) -> str:
+            return str(request.url.update_query(page=number))
+
+        return web.json_response(
+            {
+                "results": [
+                    self._short(task)
+                    for task in tasks[start : start + page_size]
+                ],
+                "next": link(page + 1)
+                if start + page_size < len(tasks)
+                else None,
+                "previous": link(page - 1) if page > 1 else None,
+            }
+        )
+
+    def _find(self, request: web.Request) -> dict | None:
+        tasks = self.get_user_tasks(request.headers.get("User-Id", ""))
+        return tasks.get(request.match_info["pk"])
+
+    async def _create_task(self, request: web.Request) -> web.Response:
+        task = self._add_task(
+            request.headers.get("User-Id", ""), await request.json()
+        )
+        return web.json_response(self._short(task), status=201)
+
+    async def _get_task(self, request: web.Request) -> web.Response:
+        task = self._find(request)
+        if task is None:
+            return web.json_response({"detail": "Not found"}, status=404)
+        return web.json_response(task)
+
+    async def _update_task(self, request: web.Request) -> web.Response:
+        task = self._find(request)
+        if task is None:
+            return web.json_response({"detail": "Not found"}, status=404)
+        payload = await request.json()
+        task.update(
+            {
+                key: value
+                for key, value in payload.items()
+                if key in ("title", "description", "deadline")
+            }
+        )
+        return web.json_response(self._short(task))
+
+    async def _delete_task(self, request: web.Request) -> web.Response:
+        tasks = self.get_user_tasks(request.headers.get("User-Id", ""))
+        if tasks.pop(request.match_info["pk"], None) is None:
+            return web.json_response({"detail": "Not found"}, status=404)
+        return web.Response(status=204)
+
+    async def _complete_task(self, request: web.Request) -> web.Response:
+        task = self._find(request)
+        if task is None:
+            return web.json_response({"detail": "Not found"}, status=404)
+        if task["status"] == TaskStatusEnum.DONE.value[0]:
+            return web.json_response({"detail": "Already done"}, status=409)
+        task["status"] = TaskStatusEnum.DONE.value[0]
+        task["completed_at"] = datetime.now(timezone.utc).isoformat()
+        return web.json_response(self._short(task))
@@ -0,0 +1,107 @@
+import asyncio
+import fnmatch
+import time
+
+
+class FakeRedis:
+    def __init__(self, host: str = "127.0.0.1", port: int = 6390):
+        """Заглушка Redis для бенчмарков: подмножество RESP2 команд,
+        которое использует бот (GET/SET с NX/EX/PX, DEL, SCAN, INCR,
+        PING)."""
+
+        self.host = host
+        self.port = port
+        self._data: dict[bytes, tuple[bytes, float | None]] = {}
+        self._server: asyncio.Server | None = None
+
+    @property
+    def url(self) -> str:
+        return f"redis://{self.host}:{self.port}/0"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port
+        )
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while line := await reader.readline():
+                args = []
+                for _ in range(int(line[1:-2])):
+                    length = int((await reader.readline())[1:-2])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                writer.write(self._execute(args))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _bulk(value: bytes | None) -> bytes:
+        if value is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def _get(self, key: bytes) -> bytes | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def _execute(self, args: list[bytes]) -> bytes:
+        command = args[0].upper()
+        match command:
+            case b"PING":
+                return b"+PONG\r\n"
+            case b"GET":
+                return self._bulk(self._get(args[1]))
+            case b"SET":
+                return self._set(args[1], args[2], args[3:])
+            case b"DEL":
+                deleted = sum(
+                    self._data.pop(key, None) is not None for key in args[1:]
+                )
+                return b":%d\r\n" % deleted
+            case b"INCR":
+                value = int(self._get(args[1]) or 0) + 1
+                self._data[args[1]] = (str(value).encode(), None)
+                return b":%d\r\n" % value
+            case b"SCAN":
+                pattern = args[args.index(b"MATCH") + 1].decode()
+                keys = [
+                    key
+                    for key in list(self._data)
+                    if self._get(key) is not None
+                    and fnmatch.fnmatchcase(key.decode(), pattern)
+                ]
+                return (
+                    b"*2\r\n"
+                    + self._bulk(b"0")
+                    + b"*%d\r\n" % len(keys)
+                    + b"".join(self._bulk(key) for key in keys)
+                )
+            case _:
+                return b"-ERR unknown command\r\n"
+
+    def _set(self, key: bytes, value: bytes, options: list[bytes]) -> bytes:
+        expires_at = None
+        options = [option.upper() for option in options]
+        if b"NX" in options and self._get(key) is not None:
+            return self._bulk(None)
+        for unit, scale in ((b"EX", 1), (b"PX", 0.001)):
+            if unit in options:
+                ttl = int(options[options.index(unit) + 1]) * scale
+                expires_at = time.monotonic() + ttl
+        self._data[key] = (value, expires_at)
+        return b"+OK\r\n"
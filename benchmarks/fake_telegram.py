@@ -0,0 +1,224 @@
+import asyncio
+import itertools
+import json
+import time
+from collections import defaultdict
+
+from aiohttp import ClientSession, web
+
+BOT_ID = 42
+
+
+class FakeTelegram:
+    def __init__(self, host: str = "127.0.0.1", port: int = 8081):
+        """Локальная заглушка Bot API для бенчмарков.
+
+        Умеет отдавать апдейты через getUpdates или доставлять их на
+        вебхук, принимает исходящие вызовы (sendMessage, editMessageText,
+        answerCallbackQuery и т.д.) и запоминает момент их получения.
+        Бот подключается через TelegramAPIServer.from_base(fake.url).
+        """
+
+        self.host = host
+        self.port = port
+        self.sent: list[tuple[float, str, dict]] = []
+        self.retry_after: dict[str, int] = {}
+        self._updates: asyncio.Queue[dict] = asyncio.Queue()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._waiters: dict[int, list[asyncio.Future]] = defaultdict(list)
+        self._webhook: dict | None = None
+        self._poller: asyncio.Task | None = None
+        self._runner: web.AppRunner | None = None
+        self._session: ClientSession | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self._session = ClientSession()
+
+    async def stop(self) -> None:
+        await self._session.close()
+        await self._runner.cleanup()
+
+    def make_message_update(self, user_id: int, text: str) -> dict:
+        return {
+            "message": {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": self._user(user_id),
+                "text": text,
+                "entities": (
+                    [
+                        {
+                            "type": "bot_command",
+                            "offset": 0,
+                            "length": len(text.split()[0]),
+                        }
+                    ]
+                    if text.startswith("/")
+                    else []
+                ),
+            }
+        }
+
+    def make_callback_update(
+        self, user_id: int, data: str, message_id: int = 1
+    ) -> dict:
+        return {
+            "callback_query": {
+                "id": str(next(self._message_ids)),
+                "from": self._user(user_id),
+                "chat_instance": str(user_id),
+                "data": data,
+                "message": {
+                    "message_id": message_id,
+                    "date": int(time.time()),
+                    "chat": {"id": user_id, "type": "private"},
+                    "from": {
+                        "id": BOT_ID,
+                        "is_bot": True,
+                        "first_name": "bot",
+                    },
+                    "text": "...",
+                },
+            }
+        }
+
+    @staticmethod
+    def _user(user_id: int) -> dict:
+        return {
+            "id": user_id,
+            "is_bot": False,
+            "first_name": f"user{user_id}",
+            "last_name": "bench",
+            "username": f"user{user_id}",
+        }
+
+    async def push_update(self, update: dict) -> None:
+        update = {"update_id": next(self._update_ids), **update}
+        if self._webhook is None:
+            await self._updates.put(update)
+            return
+        headers = {}
+        if self._webhook.get("secret_token"):
+            headers["X-Telegram-Bot-Api-Secret-Token"] = self._webhook[
+                "secret_token"
+            ]
+        async with self._session.post(
+            self._webhook["url"], json=update, headers=headers
+        ) as response:
+            response.raise_for_status()
+
+    def wait_reply(self, chat_id: int) -> asyncio.Future:
+        """Future, который завершится временем следующего исходящего
+        вызова бота в этот чат."""
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[chat_id].append(future)
+        return future
+
+    async def _read_payload(self, request: web.Request) -> dict:
+        if request.content_type == "application/json":
+            return await request.json()
+        payload = {}
+        if request.content_type.startswith("multipart/"):
+            reader = await request.multipart()
+            async for part in reader:
+                payload[part.name] = (await part.read()).decode()
+        else:
+            payload = dict(await request.post())
+        for key, value in payload.items():
+            if isinstance(value, str) and value[:1] in "{[":
+                try:
+                    payload[key] = json.loads(value)
+                except ValueError:
+                    pass
+        return payload
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        payload = await self._read_payload(request)
+        match method:
+            case "getMe":
+                result = {
+                    "id": BOT_ID,
+                    "is_bot": True,
+                    "first_name": "bot",
+                    "username": "bench_bot",
+                }
+            case "getUpdates":
+                result = await self._get_updates(request, payload)
+            case "setWebhook":
+                self._webhook = payload
+                result = True
+            case "deleteWebhook":
+                self._webhook = None
+                result = True
+            case _:
+                retry_after = self.retry_after.pop(method, None)
+                if retry_after is not None:
+                    return web.json_response(
+                        {
+                            "ok": False,
+                            "error_code": 429,
+                            "description": "Too Many Requests",
+                            "parameters": {"retry_after": retry_after},
+                        },
+                        status=429,
+                    )
+                result = self._record(method, payload)
+        return web.json_response({"ok": True, "result": result})
+
+    async def _get_updates(
+        self, request: web.Request, payload: dict
+    ) -> list[dict]:
+        # как в Telegram, новый getUpdates завершает предыдущий: иначе
+        # ожидание остановленного бота забрало бы следующий апдейт
+        if self._poller is not None and not self._poller.done():
+            self._poller.cancel()
+        self._poller = asyncio.current_task()
+        timeout = float(payload.get("timeout") or 0)
+        updates = []
+        try:
+            updates.append(
+                await asyncio.wait_for(self._updates.get(), timeout or 0.01)
+            )
+        except asyncio.TimeoutError:
+            return []
+        while not self._updates.empty():
+            updates.append(self._updates.get_nowait())
+        if request.transport is None or request.transport.is_closing():
+            # бот отключился, не дождавшись ответа: апдейты остаются
+            # в очереди для следующего getUpdates
+            for update in updates:
+                self._updates.put_nowait(update)
+            return []
+        return updates
+
+    def _record(self, method: str, payload: dict) -> dict | bool:
+        now = time.perf_counter()
+        self.sent.append((now, method, payload))
+        if payload.get("chat_id") is None:
+            return True
+
+        chat_id = int(payload["chat_id"])
+        for waiter in self._waiters.pop(chat_id, []):
+            if not waiter.done():
+                waiter.set_result(now)
+        return {
+            "message_id": int(payload.get("message_id") or 0)
+            or next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": BOT_ID, "is_bot": True, "first_name": "bot"},
+            "text": payload.get("text", ""),
+        }
@@ -0,0 +1,261 @@
+"""Нагрузочный прогон всего бота: N пользователей одновременно проходят
+реальные сценарии.
+
+Запуск: python -m benchmarks.load [--users 50] [--rounds 3]
+        [--latency 0.02] [--jitter 0.01] [--telegram-limits]
+        [--record data/recording.jsonl]
+
+Бот собирается из bot.py целиком (middleware, кеш, политика запросов,
+FSM, диалоги) и работает против локальных заглушек бэкенда
+(benchmarks.fake_backend) и Bot API (benchmarks.fake_telegram).
+Апдейты подаются прямо в диспетчер, задержка шага - время обработки
+апдейта вместе со всеми вызовами бэкенда и Bot API.
+
+Сценарий пользователя: /start, затем rounds раз - списки задач на
+сегодня и активных с листанием страниц, открытие задачи и создание
+задачи через диалог (категория, заголовок, пропуск описания, дата в
+календаре, время, "Готово").
+
+Лимиты исходящих сообщений Telegram по умолчанию сняты, чтобы мерить
+сам бот; --telegram-limits оставляет их как в продакшене.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import resource
+import tempfile
+import time
+from collections import defaultdict
+
+from aiogram_dialog.utils import CB_SEP
+
+from benchmarks.fake_backend import FakeBackend
+from benchmarks.fake_telegram import FakeTelegram
+from benchmarks.utils import format_latencies
+
+FAKE_TELEGRAM_PORT = 8087
+FAKE_BACKEND_PORT = 8091
+
+
+def configure(telegram_limits: bool, record: str | None = None) -> None:
+    """Настройки бота задаются окружением до импорта bot.py.
+
+    :param record: путь записи апдейтов и ответов бэкенда для
+    benchmarks.replay
+    """
+
+    data = tempfile.mkdtemp(prefix="bot-load-")
+    os.environ.update(
+        BOT_TOKEN="42:TEST",
+        API_URL=f"http://127.0.0.1:{FAKE_BACKEND_PORT}",
+        BOT_API_URL=f"http://127.0.0.1:{FAKE_TELEGRAM_PORT}",
+        KNOWN_USERS_DB_PATH=f"{data}/known_users.sqlite3",
+        TIMEZONES_DB_PATH=f"{data}/user_timezones.sqlite3",
+        OUTBOX_DB_PATH=f"{data}/task_outbox.sqlite3",
+        REMINDERS_DB_PATH=f"{data}/sent_reminders.sqlite3",
+        FSM_STORAGE="memory",
+        WORKERS="1",
+        REMINDERS_ENABLED="false",
+        METRICS_ENABLED="false",
+        PROFILING_ENABLED="false",
+    )
+    if record:
+        os.environ.update(RECORDING_ENABLED="true", RECORDING_PATH=record)
+    if not telegram_limits:
+        os.environ.update(
+            OUTBOUND_GLOBAL_RATE="1000000",
+            OUTBOUND_CHAT_RATE="1000000",
+            OUTBOUND_CHAT_BURST="1000000",
+        )
+
+
+def get_rss_mib() -> float:
+    # ru_maxrss в Linux - в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def get_last_keyboard(
+    fake: FakeTelegram, chat_id: int
+) -> tuple[int, list[str]]:
+    """id последнего сообщения в чат с инлайн клавиатурой и callback
+    data её кнопок."""
+
+    for _, _, payload in reversed(fake.sent):
+        markup = payload.get("reply_markup")
+        if str(payload.get("chat_id")) != str(chat_id) or not markup:
+            continue
+        buttons = [
+            button.get("callback_data") or ""
+            for row in markup.get("inline_keyboard", [])
+            for button in row
+        ]
+        return int(payload.get("message_id") or 0), buttons
+    return 0, []
+
+
+class LoadGenerator:
+    def __init__(self, app, fake: FakeTelegram, backend: FakeBackend):
+        self._app = app
+        self._fake = fake
+        self._backend = backend
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def _send(self, step: str, update: dict) -> None:
+        started = time.perf_counter()
+        try:
+            await self._app.dispatcher.feed_raw_update(
+                self._app.bot, {"update_id": 0, **update}
+            )
+        except Exception:
+            self.errors[step] += 1
+            return
+        self.latencies[step].append(time.perf_counter() - started)
+
+    async def message(self, step: str, user_id: int, text: str) -> None:
+        await self._send(step, self._fake.make_message_update(user_id, text))
+
+    async def callback(
+        self, step: str, user_id: int, data: str, message_id: int = 1
+    ) -> None:
+        await self._send(
+            step,
+            self._fake.make_callback_update(user_id, data, message_id),
+        )
+
+    async def dialog_click(
+        self, step: str, user_id: int, widget: str, digits: bool = False
+    ) -> None:
+        """Нажатие кнопки виджета диалога из последней клавиатуры."""
+
+        message_id, buttons = get_last_keyboard(self._fake, user_id)
+        candidates = [
+            data
+            for data in buttons
+            if CB_SEP in data
+            and data.split(CB_SEP, 1)[1].startswith(widget)
+            and (not digits or data.rsplit(":", 1)[-1].isdigit())
+        ]
+        if not candidates:
+            self.errors[step] += 1
+            return
+        await self.callback(step, user_id, candidates[-1], message_id or 1)
+
+    async def create_task(self, user_id: int) -> None:
+        await self.callback("create_task", user_id, "create_task")
+        await self.dialog_click("dialog:category", user_id, "category_")
+        await self.dialog_click("dialog:next", user_id, "next_button")
+        await self.message("dialog:title", user_id, "Нагрузочная задача")
+        await self.dialog_click("dialog:skip", user_id, "skip_button")
+        await self.dialog_click(
+            "dialog:date", user_id, "calendar:", digits=True
+        )
+        await self.message("dialog:time", user_id, "18:30")
+        await self.dialog_click("dialog:done", user_id, "done_button")
+
+    async def user_flow(self, user_id: int, rounds: int) -> None:
+        await self.message("/start", user_id, "/start")
+        for _ in range(rounds):
+            await self.callback("today_tasks", user_id, "today_tasks")
+            await self.callback("all_tasks", user_id, "all_tasks")
+            for page in (1, 2, 3):
+                data = "active_tasks" if page == 1 else f"active_tasks_{page}"
+                await self.callback("active_tasks", user_id, data)
+            tasks = self._backend.get_user_tasks(str(user_id))
+            task_id = random.choice(list(tasks))
+            await self.callback(
+                "task:details", user_id, f"task:details:{task_id}"
+            )
+            await self.create_task(user_id)
+
+
+async def main(
+    users: int,
+    rounds: int,
+    latency: float,
+    jitter: float,
+    telegram_limits: bool,
+    record: str | None,
+) -> None:
+    configure(telegram_limits, record)
+    import bot as app
+
+    fake = FakeTelegram(port=FAKE_TELEGRAM_PORT)
+    backend = FakeBackend(
+        port=FAKE_BACKEND_PORT, latency=latency, jitter=jitter
+    )
+    await fake.start()
+    await backend.start()
+    await app.dispatcher.emit_startup(
+        bot=app.bot, **app.dispatcher.workflow_data
+    )
+    rss_before = get_rss_mib()
+    generator = LoadGenerator(app, fake, backend)
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(
+            *(
+                generator.user_flow(user_id, rounds)
+                for user_id in range(1, users + 1)
+            )
+        )
+    finally:
+        elapsed = time.perf_counter() - started
+        await app.dispatcher.emit_shutdown(
+            bot=app.bot, **app.dispatcher.workflow_data
+        )
+        await app.bot.session.close()
+        await backend.stop()
+        await fake.stop()
+
+    every = [
+        value for values in generator.latencies.values() for value in values
+    ]
+    print(
+        f"пользователей {users}, кругов {rounds}, задержка бэкенда "
+        f"{latency * 1000:.0f}+{jitter * 1000:.0f}ms"
+    )
+    for step, values in generator.latencies.items():
+        print(format_latencies(step, values))
+    print(format_latencies("все апдейты", every))
+    print(
+        f"пропускная способность: {len(every) / elapsed:.0f} апдейтов/с "
+        f"за {elapsed:.2f}s"
+    )
+    print(
+        f"память (RSS, вместе с заглушками): {rss_before:.1f} MiB до, "
+        f"пик {get_rss_mib():.1f} MiB"
+    )
+    print(
+        f"запросов к бэкенду: {sum(backend.calls.values())}, "
+        f"вызовов Bot API: {len(fake.sent)}"
+    )
+    for call, count in backend.calls.most_common():
+        print(f"  {call:<40} {count}")
+    if generator.errors:
+        print(f"ошибки: {dict(generator.errors)}")
+        # ненулевой код, чтобы прогон ловил регрессии одной командой
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--telegram-limits", action="store_true")
+    parser.add_argument("--record", help="записать поток в JSONL")
+    args = parser.parse_args()
+    asyncio.run(
+        main(
+            args.users,
+            args.rounds,
+            args.latency,
+            args.jitter,
+            args.telegram_limits,
+            args.record,
+        )
+    )
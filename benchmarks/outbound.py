@@ -0,0 +1,110 @@
+"""Проверка исходящей очереди на локальной заглушке Bot API.
+
+Запуск: python -m benchmarks.outbound [--chats 20] [--per-chat 5]
+        [--bulk 60] [--global-rate 30]
+
+Одновременно отправляются ответы пользователям (по --per-chat сообщений
+в --chats чатов) и массовая рассылка (--bulk чатов по одному
+сообщению, в полосе bulk_sending). Первый sendMessage получает 429 с
+retry_after=1. Скрипт проверяет, что все сообщения доставлены, что
+ни в одном окне в 1 секунду не превышены общий лимит и лимит чата, и
+печатает задержки для каждой полосы.
+"""
+
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+from benchmarks.fake_telegram import FakeTelegram
+from benchmarks.utils import format_latencies
+from middlewares.outbound import OutboundRateLimiter, bulk_sending
+
+
+def max_per_window(times: list[float], window: float = 1.0) -> int:
+    times = sorted(times)
+    best = start = 0
+    for end, moment in enumerate(times):
+        while moment - times[start] >= window:
+            start += 1
+        best = max(best, end - start + 1)
+    return best
+
+
+async def main(chats: int, per_chat: int, bulk: int, global_rate: float):
+    fake = FakeTelegram(port=8084)
+    await fake.start()
+    limiter = OutboundRateLimiter(global_rate=global_rate)
+    session = AiohttpSession(api=TelegramAPIServer.from_base(fake.url))
+    session.middleware(limiter)
+    bot = Bot("42:TEST", session=session)
+    fake.retry_after["sendMessage"] = 1
+    latencies: dict[str, list[float]] = defaultdict(list)
+
+    async def send(lane: str, chat_id: int, text: str) -> None:
+        started = time.perf_counter()
+        await bot.send_message(chat_id, text)
+        latencies[lane].append(time.perf_counter() - started)
+
+    async def send_bulk(chat_id: int) -> None:
+        with bulk_sending():
+            await send("bulk", chat_id, "рассылка")
+
+    async def report_depth() -> None:
+        while True:
+            await asyncio.sleep(1)
+            print(
+                f"очередь: {limiter.stats.queue_depth:>4} "
+                f"(interactive={limiter.stats.waiting[0]}, "
+                f"bulk={limiter.stats.waiting[1]})"
+            )
+
+    reporter = asyncio.create_task(report_depth())
+    started = time.perf_counter()
+    await asyncio.gather(
+        *[send_bulk(10_000 + index) for index in range(bulk)],
+        *[
+            send("interactive", chat_id, str(number))
+            for chat_id in range(1, chats + 1)
+            for number in range(per_chat)
+        ],
+    )
+    elapsed = time.perf_counter() - started
+    reporter.cancel()
+    await bot.session.close()
+    await fake.stop()
+
+    by_chat: dict[int, list[tuple[float, str]]] = defaultdict(list)
+    for moment, _, payload in fake.sent:
+        by_chat[int(payload["chat_id"])].append((moment, payload["text"]))
+    total = chats * per_chat + bulk
+    ordered = all(
+        [text for _, text in messages] == [str(n) for n in range(per_chat)]
+        for chat_id, messages in by_chat.items()
+        if chat_id <= chats
+    )
+    print(f"доставлено {len(fake.sent)}/{total} за {elapsed:.1f}s")
+    print(f"повторов после 429: {limiter.stats.retried}")
+    print(f"порядок в чатах сохранён: {ordered}")
+    print(
+        "максимум в окне 1s: всего "
+        f"{max_per_window([moment for moment, _, _ in fake.sent])} "
+        f"(лимит {global_rate:g}), в чат "
+        f"{max(max_per_window([m for m, _ in v]) for v in by_chat.values())}"
+    )
+    for lane, values in latencies.items():
+        print(format_latencies(lane, values))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chats", type=int, default=20)
+    parser.add_argument("--per-chat", type=int, default=5)
+    parser.add_argument("--bulk", type=int, default=60)
+    parser.add_argument("--global-rate", type=float, default=30)
+    args = parser.parse_args()
+    asyncio.run(main(args.chats, args.per_chat, args.bulk, args.global_rate))
@@ -0,0 +1,92 @@
+"""Память и скорость очереди напоминаний на большом числе задач.
+
+Запуск: python -m benchmarks.reminders [--tasks 100000] [--users 10000]
+
+Планирует --tasks задач с дедлайнами, равномерно распределёнными по
+окну, затем переносит и отменяет часть из них, как это делают события
+TaskRepository. Печатает время операций и память, занятую очередью
+(tracemalloc).
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from repositories.events import TaskEvents
+from services.reminders import ReminderScheduler
+
+
+def fill(
+    scheduler: ReminderScheduler, deadlines: list[datetime], users: int
+) -> None:
+    for index, deadline in enumerate(deadlines):
+        scheduler.schedule(
+            str(index % users), str(index), f"Задача {index}", deadline
+        )
+
+
+def churn(
+    scheduler: ReminderScheduler, deadlines: list[datetime], users: int
+) -> None:
+    for index in range(0, len(deadlines), 2):
+        scheduler.schedule(
+            str(index % users),
+            str(index),
+            f"Задача {index}",
+            deadlines[index] + timedelta(minutes=5),
+        )
+    for index in range(1, len(deadlines), 4):
+        scheduler.cancel(str(index % users), str(index))
+
+
+def create_scheduler(tasks: int) -> ReminderScheduler:
+    # дедлайны только в будущем: журнал отправленных не нужен
+    return ReminderScheduler(
+        None, None, None, None, TaskEvents(), None, max_pending=tasks
+    )
+
+
+def main(tasks: int, users: int) -> None:
+    now = datetime.now(timezone.utc)
+    horizon = 6 * 60 * 60 - 60
+    deadlines = [
+        now + timedelta(seconds=random.uniform(60, horizon))
+        for _ in range(tasks)
+    ]
+
+    scheduler = create_scheduler(tasks)
+    started = time.perf_counter()
+    fill(scheduler, deadlines, users)
+    elapsed = time.perf_counter() - started
+    print(f"schedule: {tasks} задач за {elapsed:.2f}s")
+    started = time.perf_counter()
+    churn(scheduler, deadlines, users)
+    elapsed = time.perf_counter() - started
+    print(
+        f"перенос {tasks // 2} и отмена {tasks // 4} за {elapsed:.2f}s, "
+        f"в очереди {scheduler.stats.pending}, "
+        f"записей в куче {len(scheduler._heap)}"
+    )
+
+    # память меряется отдельным прогоном: tracemalloc сильно замедляет
+    tracemalloc.start()
+    scheduler = create_scheduler(tasks)
+    fill(scheduler, deadlines, users)
+    memory, _ = tracemalloc.get_traced_memory()
+    churn(scheduler, deadlines, users)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"память: {memory / 2**20:.1f} MiB ({memory / tasks:.0f} B на "
+        f"задачу), пик после переносов {peak / 2**20:.1f} MiB"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    args = parser.parse_args()
+    main(args.tasks, args.users)
@@ -0,0 +1,145 @@
+"""Стоимость отрисовки страницы списка задач: текст и клавиатура.
+
+Запуск: python -m benchmarks.render [--iterations 200]
+
+before - прежняя отрисовка: текст через += и strftime на каждое поле,
+клавиатура собирается заново вместе с CallbackData.pack() на каждую
+кнопку. after - utils.tasks.get_tasks_list и
+keyboards.tasks.get_tasks_list_keyboard: шаблоны, разобранные один
+раз, и запомненные блоки текста и строки кнопок. cold - с пустыми
+кешами (первая отрисовка страницы), warm - повторная.
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from callbacks.factory import TaskBulkCallback, TaskCallback
+from enums.tasks import TaskBulkActionEnum
+from keyboards.tasks import (
+    get_bulk_start_row,
+    get_pagination_row,
+    get_task_row,
+    get_tasks_list_keyboard,
+)
+from schemas.tasks import TaskShortSchema
+from utils.tasks import get_tasks_list, get_tasks_list_item
+from utils.timezones import convert_many, get_zone
+
+ZONE = get_zone("Europe/Moscow")
+
+
+def make_tasks(count: int) -> list[TaskShortSchema]:
+    started = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        TaskShortSchema(
+            id=f"{index:032x}",
+            title=f"Задача {index}",
+            deadline=started + timedelta(hours=index),
+            created_at=started - timedelta(days=1, minutes=index),
+        )
+        for index in range(count)
+    ]
+
+
+def render_before(tasks: list[TaskShortSchema]) -> tuple[str, object]:
+    message_text = "Ваши задачи:\n\n"
+    dates = convert_many(
+        [date for task in tasks for date in (task.created_at, task.deadline)],
+        ZONE,
+    )
+    for task, created_at, deadline in zip(tasks, dates[::2], dates[1::2]):
+        message_text += (
+            f"<b>{task.title}</b>\n"
+            f"<b>Создана:</b> {created_at.strftime('%d.%m.%Y, %H:%M:%S')}\n"
+            f"<b>Дедлайн:</b> {deadline.strftime('%d.%m.%Y, %H:%M:%S')}\n"
+            f"\n"
+        )
+
+    buttons = []
+    for task in tasks:
+        buttons.append(
+            [
+                InlineKeyboardButton(
+                    text=f"📄 Подробности о {task.title}",
+                    callback_data=TaskCallback(
+                        action="details", task_id=task.id
+                    ).pack(),
+                )
+            ]
+        )
+    buttons.append(
+        [InlineKeyboardButton(text="Вперед ➡️", callback_data="active_tasks_2")]
+    )
+    buttons.append(
+        [
+            InlineKeyboardButton(
+                text="☑️ Выбрать несколько",
+                callback_data=TaskBulkCallback(
+                    action=TaskBulkActionEnum.START,
+                    list_name="active_tasks",
+                    page=1,
+                ).pack(),
+            )
+        ]
+    )
+    buttons.append(
+        [
+            InlineKeyboardButton(
+                text="🔙 Назад к списку задач", callback_data="all_tasks"
+            )
+        ]
+    )
+    return message_text.strip(), InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def render_after(tasks: list[TaskShortSchema]) -> tuple[str, object]:
+    return (
+        get_tasks_list(tasks, ZONE),
+        get_tasks_list_keyboard(tasks, 1, True, False, "active_tasks"),
+    )
+
+
+def clear_caches() -> None:
+    get_tasks_list_item.cache_clear()
+    get_task_row.cache_clear()
+    get_pagination_row.cache_clear()
+    get_bulk_start_row.cache_clear()
+
+
+def measure(
+    render, tasks: list[TaskShortSchema], iterations: int, warm: bool
+) -> float:
+    render(tasks)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        if not warm:
+            clear_caches()
+        render(tasks)
+    return (time.perf_counter() - started) / iterations
+
+
+def main(iterations: int) -> None:
+    for count in (5, 50, 500):
+        tasks = make_tasks(count)
+        before_text, before_keyboard = render_before(tasks)
+        after_text, after_keyboard = render_after(tasks)
+        assert before_text == after_text
+        assert before_keyboard.model_dump() == after_keyboard.model_dump()
+        before = measure(render_before, tasks, iterations, warm=True)
+        cold = measure(render_after, tasks, iterations, warm=False)
+        warm = measure(render_after, tasks, iterations, warm=True)
+        print(
+            f"{count:>4} задач: before={before * 1e6:9.1f}us "
+            f"after(cold)={cold * 1e6:9.1f}us "
+            f"after(warm)={warm * 1e6:9.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    main(args.iterations)
@@ -0,0 +1,239 @@
+"""Воспроизведение записанного потока апдейтов (см. utils.recording).
+
+Запуск: python -m benchmarks.replay data/recording.jsonl [--speed 1]
+        [--fast] [--telegram-limits]
+
+Апдейты из записи подаются в диспетчер из bot.py с исходными
+интервалами (--speed ускоряет, --fast - без пауз), апдейты одного чата
+обрабатываются по очереди, разных - параллельно, как при polling.
+Бэкенд подменяется заглушкой, которая отдаёт записанные ответы в том же
+порядке для каждого метода и URL, Bot API - заглушкой
+benchmarks.fake_telegram. Так две сборки можно сравнить на одной и той
+же реальной нагрузке.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict
+
+from aiogram_dialog.utils import CB_SEP
+from aiohttp import web
+
+from benchmarks.fake_telegram import FakeTelegram
+from benchmarks.load import (
+    FAKE_BACKEND_PORT,
+    FAKE_TELEGRAM_PORT,
+    configure,
+    get_last_keyboard,
+    get_rss_mib,
+)
+from benchmarks.utils import format_latencies
+from middlewares.metrics import get_callback_prefix
+from server.sharding import get_shard_key
+from utils.recording import BACKEND_LINK_KEYS, normalize_path, read_recording
+
+
+class ReplayBackend:
+    def __init__(self, records: list[dict], port: int):
+        """Отдаёт записанные ответы бэкенда. Если запрос повторяется
+        чаще, чем в записи, отдаётся последний ответ, если его не было
+        вовсе - 404."""
+
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self.hits = 0
+        self.misses: dict[str, int] = defaultdict(int)
+        self._responses: dict[tuple[str, str], list[dict]] = defaultdict(list)
+        self._positions: dict[tuple[str, str], int] = defaultdict(int)
+        for record in records:
+            self._responses[(record["method"], record["url"])].append(record)
+        self._runner: web.AppRunner | None = None
+
+    def _absolutize(self, value):
+        if isinstance(value, dict):
+            return {
+                key: (
+                    self.url + item
+                    if key in BACKEND_LINK_KEYS and isinstance(item, str)
+                    else self._absolutize(item)
+                )
+                for key, item in value.items()
+            }
+        if isinstance(value, list):
+            return [self._absolutize(item) for item in value]
+        return value
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        key = (request.method, normalize_path(str(request.rel_url)))
+        responses = self._responses.get(key)
+        if not responses:
+            self.misses[f"{key[0]} {key[1]}"] += 1
+            return web.json_response({"detail": "Not recorded"}, status=404)
+        self.hits += 1
+        position = self._positions[key]
+        self._positions[key] = position + 1
+        record = responses[min(position, len(responses) - 1)]
+        if "json" in record:
+            body = (
+                json.dumps(self._absolutize(record["json"]))
+                if record["json"] is not None
+                else ""
+            )
+            return web.Response(
+                text=body,
+                status=record["status"],
+                content_type="application/json",
+            )
+        return web.Response(
+            text=record.get("text", ""), status=record["status"]
+        )
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", self.port).start()
+
+    async def stop(self) -> None:
+        await self._runner.cleanup()
+
+
+def get_update_label(update: dict) -> str:
+    if "callback_query" in update:
+        return get_callback_prefix(update["callback_query"].get("data"))
+    text = (update.get("message") or {}).get("text") or ""
+    if text.startswith("/"):
+        return text.split(maxsplit=1)[0].split("@")[0]
+    return next((key for key in update if key != "update_id"), "update")
+
+
+def remap_dialog_callback(fake: FakeTelegram, update: dict) -> dict:
+    """Кнопки диалогов содержат случайный id контекста диалога, при
+    воспроизведении он другой. Нажатие переносится на такую же кнопку
+    из последней клавиатуры, которую бот отправил в этот чат."""
+
+    callback = update.get("callback_query")
+    if not callback or CB_SEP not in (callback.get("data") or ""):
+        return update
+    widget = callback["data"].split(CB_SEP, 1)[1]
+    chat_id = (callback.get("message") or {}).get("chat", {}).get("id")
+    message_id, buttons = get_last_keyboard(fake, chat_id)
+    for data in buttons:
+        if CB_SEP in data and data.split(CB_SEP, 1)[1] == widget:
+            message = {**callback["message"], "message_id": message_id}
+            callback = {**callback, "data": data, "message": message}
+            return {**update, "callback_query": callback}
+    return update
+
+
+async def replay(
+    app, fake: FakeTelegram, updates: list[dict], speed: float | None
+):
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors = 0
+    tails: dict[int, asyncio.Task] = {}
+
+    async def process(
+        update: dict, label: str, previous: asyncio.Task | None
+    ) -> None:
+        nonlocal errors
+        if previous is not None:
+            await asyncio.wait([previous])
+        update = remap_dialog_callback(fake, update)
+        started = time.perf_counter()
+        try:
+            await app.dispatcher.feed_raw_update(app.bot, update)
+        except Exception:
+            errors += 1
+            return
+        latencies[label].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for record in updates:
+        if speed is not None:
+            delay = record["t"] / speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        update = record["update"]
+        key = get_shard_key(update)
+        tails[key] = asyncio.create_task(
+            process(update, get_update_label(update), tails.get(key))
+        )
+    if tails:
+        await asyncio.wait(list(tails.values()))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def main(path: str, speed: float | None, telegram_limits: bool) -> None:
+    records = list(read_recording(path))
+    updates = [record for record in records if record["kind"] == "update"]
+    backend_records = [
+        record for record in records if record["kind"] == "backend"
+    ]
+    configure(telegram_limits)
+    import bot as app
+
+    fake = FakeTelegram(port=FAKE_TELEGRAM_PORT)
+    backend = ReplayBackend(backend_records, FAKE_BACKEND_PORT)
+    await fake.start()
+    await backend.start()
+    await app.dispatcher.emit_startup(
+        bot=app.bot, **app.dispatcher.workflow_data
+    )
+    rss_before = get_rss_mib()
+    try:
+        latencies, errors, elapsed = await replay(app, fake, updates, speed)
+    finally:
+        await app.dispatcher.emit_shutdown(
+            bot=app.bot, **app.dispatcher.workflow_data
+        )
+        await app.bot.session.close()
+        await backend.stop()
+        await fake.stop()
+
+    every = [value for values in latencies.values() for value in values]
+    mode = "без пауз" if speed is None else f"скорость x{speed:g}"
+    print(
+        f"запись {path}: апдейтов {len(updates)}, ответов бэкенда "
+        f"{len(backend_records)}, {mode}"
+    )
+    for label, values in sorted(latencies.items()):
+        print(format_latencies(label or "-", values))
+    print(format_latencies("все апдейты", every))
+    print(
+        f"пропускная способность: {len(every) / elapsed:.0f} апдейтов/с "
+        f"за {elapsed:.2f}s"
+    )
+    print(
+        f"память (RSS, вместе с заглушками): {rss_before:.1f} MiB до, "
+        f"пик {get_rss_mib():.1f} MiB"
+    )
+    print(
+        f"ответов бэкенда из записи: {backend.hits}, не найдено: "
+        f"{sum(backend.misses.values())}, вызовов Bot API: {len(fake.sent)}"
+    )
+    for request, count in sorted(
+        backend.misses.items(), key=lambda item: -item[1]
+    )[:10]:
+        print(f"  нет в записи: {request} x{count}")
+    if errors:
+        print(f"ошибки обработки: {errors}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path")
+    parser.add_argument("--speed", type=float, default=1)
+    parser.add_argument("--fast", action="store_true")
+    parser.add_argument("--telegram-limits", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(
+        main(
+            args.path,
+            None if args.fast else args.speed,
+            args.telegram_limits,
+        )
+    )
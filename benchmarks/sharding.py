@@ -0,0 +1,109 @@
+"""Проверка и замер шардированной обработки апдейтов по воркерам.
+
+Запуск: python -m benchmarks.sharding [--workers 4] [--users 40]
+        [--messages 25]
+
+Фронт раскладывает апдейты по процессам через ShardedRunner, воркеры
+отвечают через локальную заглушку Bot API. Обработчик тратит CPU_MS
+миллисекунд процессорного времени, поэтому один процесс упирается
+в одно ядро.
+Скрипт проверяет, что ответы в каждом чате пришли в исходном порядке,
+и сравнивает пропускную способность с одним и с N воркерами.
+"""
+
+import argparse
+import asyncio
+import time
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Message
+
+from benchmarks.fake_telegram import FakeTelegram
+from server.sharding import ShardedRunner, consume_updates
+
+FAKE_TELEGRAM_PORT = 8083
+CPU_MS = 5
+
+
+def create_bot() -> Bot:
+    return Bot(
+        "42:TEST",
+        session=AiohttpSession(
+            api=TelegramAPIServer.from_base(
+                f"http://127.0.0.1:{FAKE_TELEGRAM_PORT}"
+            )
+        ),
+    )
+
+
+def worker(index: int, queue, in_flight) -> None:
+    dispatcher = Dispatcher()
+
+    @dispatcher.message()
+    async def echo(message: Message):
+        deadline = time.process_time() + CPU_MS / 1000
+        while time.process_time() < deadline:
+            pass
+        await message.answer(message.text)
+
+    asyncio.run(
+        consume_updates(dispatcher, create_bot(), queue, in_flight, index)
+    )
+
+
+async def run(workers: int, users: int, messages: int) -> tuple[float, bool]:
+    fake = FakeTelegram(port=FAKE_TELEGRAM_PORT)
+    await fake.start()
+    runner = ShardedRunner(worker, workers)
+    runner.start()
+    try:
+        # прогрев: дождаться старта всех воркеров
+        warmup = [fake.wait_reply(user_id) for user_id in range(1, users + 1)]
+        for user_id in range(1, users + 1):
+            update = fake.make_message_update(user_id, "warmup")
+            await runner.route({"update_id": 0, **update})
+        await asyncio.gather(*warmup)
+        fake.sent.clear()
+
+        started = time.perf_counter()
+        for number in range(messages):
+            for user_id in range(1, users + 1):
+                update = fake.make_message_update(user_id, str(number))
+                await runner.route({"update_id": 0, **update})
+        total = users * messages
+        while len(fake.sent) < total:
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - started
+    finally:
+        await runner.stop(timeout=10)
+        await fake.stop()
+
+    replies: dict[int, list[int]] = {}
+    for _, _, payload in fake.sent:
+        replies.setdefault(int(payload["chat_id"]), []).append(
+            int(payload["text"])
+        )
+    ordered = all(
+        numbers == list(range(messages)) for numbers in replies.values()
+    )
+    return total / elapsed, ordered
+
+
+async def main(workers: int, users: int, messages: int) -> None:
+    for count in sorted({1, workers}):
+        throughput, ordered = await run(count, users, messages)
+        print(
+            f"workers={count:<3} throughput={throughput:8.1f} updates/s "
+            f"per-chat order preserved={ordered}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--messages", type=int, default=25)
+    args = parser.parse_args()
+    asyncio.run(main(args.workers, args.users, args.messages))
@@ -0,0 +1,281 @@
+"""Холодный старт бота: время от запуска процесса до ответа на первый
+апдейт.
+
+Запуск: python -m benchmarks.startup [--runs 3] [--workers 1]
+        [--start-method spawn]
+
+Бот запускается отдельным процессом так же, как в продакшене (main из
+bot.py: супервизор, polling), против заглушек Bot API и бэкенда. До
+запуска в заглушку кладётся /start, время считается до ответа бота
+в этот чат. Для одного процесса время разбивается на этапы: запуск
+интерпретатора, импорт bot, хуки startup и первый апдейт (getUpdates и
+обработка).
+
+С --workers > 1 после первого ответа один воркер убивается, супервизор
+перезапускает шардированный режим, и замеряется время до ответа на
+следующий апдейт - столько пользователи ждут после каждого перезапуска.
+--start-method сравнивает порождение воркеров через spawn и forkserver.
+
+Отдельно замеряется, сколько стоил бы импорт модулей, которые bot
+импортирует только при включении (Redis, профилирование, вебхук,
+шардирование), и сколько при импорте занимает сборка диалогов задач.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# дочерний процесс (--child) импортирует только стандартную библиотеку,
+# чтобы не добавлять к замеру импорт заглушек
+
+PHASES = ("interpreter", "import", "startup")
+# импортируются bot.py, только если включены в настройках
+OPTIONAL_MODULES = (
+    "repositories.redis_cache",
+    "aiogram.fsm.storage.redis",
+    "middlewares.profiling",
+    "server.webhook",
+    "server.sharding",
+)
+
+
+def report(phase: str) -> None:
+    print(json.dumps({"phase": phase, "t": time.time()}), flush=True)
+
+
+def child() -> None:
+    report("interpreter")
+    import bot
+
+    report("import")
+
+    async def on_startup() -> None:
+        report("startup")
+
+    bot.dispatcher.startup.register(on_startup)
+    asyncio.run(bot.main())
+
+
+def child_imports() -> None:
+    import importlib
+
+    import bot  # noqa: F401
+    from dialogs.tasks.create_task import TaskCreateDialog
+    from dialogs.tasks.update_task import TaskUpdateDialog
+
+    started = time.perf_counter()
+    for name in OPTIONAL_MODULES:
+        importlib.import_module(name)
+    optional = time.perf_counter() - started
+    started = time.perf_counter()
+    TaskCreateDialog().create_dialog()
+    TaskUpdateDialog().create_dialog()
+    dialogs = time.perf_counter() - started
+    print(json.dumps({"optional": optional, "dialogs": dialogs}), flush=True)
+
+
+async def measure_imports() -> dict[str, float]:
+    """Импорт выключенных модулей и сборка диалогов в отдельном процессе
+    после импорта bot, чтобы не мешать замеру запуска."""
+
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "benchmarks.startup",
+        "--child-imports",
+        stdout=asyncio.subprocess.PIPE,
+    )
+    stdout, _ = await process.communicate()
+    return json.loads(stdout.splitlines()[-1])
+
+
+def get_workers(pid: int) -> list[int]:
+    """Воркеры шардированного режима среди потомков процесса (Linux,
+    /proc): листья дерева, кроме resource tracker multiprocessing. При
+    forkserver воркеры - дети forkserver, а не самого бота."""
+
+    children: dict[int, list[int]] = {}
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(stat.parent.name))
+    workers, stack = [], list(children.get(pid, []))
+    while stack:
+        child_pid = stack.pop()
+        if child_pid in children:
+            stack.extend(children[child_pid])
+            continue
+        try:
+            cmdline = Path(f"/proc/{child_pid}/cmdline").read_bytes()
+        except OSError:
+            continue
+        if b"resource_tracker" not in cmdline:
+            workers.append(child_pid)
+    return workers
+
+
+async def run_once(
+    fake, workers: int, start_method: str
+) -> tuple[float, dict[str, float], float | None]:
+    from benchmarks.load import configure
+
+    configure(telegram_limits=False)
+    data = tempfile.mkdtemp(prefix="bot-startup-")
+    os.environ.update(
+        WORKERS=str(workers),
+        WORKER_START_METHOD=start_method,
+        WORKER_STATS_INTERVAL="0.1",
+        RESTART_MIN_BACKOFF="0.01",
+        RESTART_MAX_BACKOFF="0.01",
+        DROP_PENDING_UPDATES_ON_START="false",
+        OUTBOX_DB_PATH=f"{data}/task_outbox.sqlite3",
+    )
+    if workers > 1:
+        os.environ.update(
+            FSM_STORAGE="sqlite", FSM_SQLITE_PATH=f"{data}/fsm.sqlite3"
+        )
+
+    await fake.push_update(fake.make_message_update(1, "/start"))
+    reply = fake.wait_reply(1)
+    launched = time.time()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "benchmarks.startup",
+        "--child",
+        stdout=asyncio.subprocess.PIPE,
+    )
+    phases: dict[str, float] = {}
+
+    async def read_phases() -> None:
+        async for line in process.stdout:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            phases.setdefault(record["phase"], record["t"])
+
+    reader = asyncio.create_task(read_phases())
+    restart = None
+    try:
+        await asyncio.wait_for(reply, 120)
+        total = time.time() - launched
+        if workers > 1:
+            # убитый воркер заметит монитор, супервизор перезапустит всё;
+            # апдейт кладётся, когда старых воркеров не осталось, иначе
+            # он ушёл бы в очередь убитого
+            old = set(get_workers(process.pid))
+            killed = time.time()
+            os.kill(min(old), signal.SIGKILL)
+            while True:
+                current = set(get_workers(process.pid))
+                if len(current) == workers and not current & old:
+                    break
+                await asyncio.sleep(0.01)
+            reply = fake.wait_reply(2)
+            await fake.push_update(fake.make_message_update(2, "/start"))
+            await asyncio.wait_for(reply, 120)
+            restart = time.time() - killed
+    finally:
+        process.send_signal(signal.SIGTERM)
+        await process.wait()
+        reader.cancel()
+    previous = launched
+    durations = {}
+    for phase in PHASES:
+        if phase in phases:
+            durations[phase] = phases[phase] - previous
+            previous = phases[phase]
+    if "startup" in phases:
+        durations["first update"] = launched + total - previous
+    return total, durations, restart
+
+
+async def main(runs: int, workers: int, start_method: str) -> None:
+    from benchmarks.fake_backend import FakeBackend
+    from benchmarks.fake_telegram import FakeTelegram
+    from benchmarks.load import FAKE_BACKEND_PORT, FAKE_TELEGRAM_PORT
+
+    fake = FakeTelegram(port=FAKE_TELEGRAM_PORT)
+    backend = FakeBackend(port=FAKE_BACKEND_PORT)
+    await fake.start()
+    await backend.start()
+    totals, restarts = [], []
+    durations: dict[str, list[float]] = {}
+    imports: dict[str, list[float]] = {}
+    try:
+        for _ in range(runs):
+            total, phases, restart = await run_once(
+                fake, workers, start_method
+            )
+            totals.append(total)
+            if restart is not None:
+                restarts.append(restart)
+            for phase, value in phases.items():
+                durations.setdefault(phase, []).append(value)
+            for name, value in (await measure_imports()).items():
+                imports.setdefault(name, []).append(value)
+    finally:
+        await backend.stop()
+        await fake.stop()
+
+    mode = (
+        f"воркеров {workers}, {start_method}" if workers > 1 else "1 процесс"
+    )
+    print(f"{mode}, запусков {runs} (медиана, мин-макс)")
+    for phase, values in durations.items():
+        print(
+            f"  {phase:<16} {statistics.median(values) * 1000:8.0f}ms "
+            f"({min(values) * 1000:.0f}-{max(values) * 1000:.0f})"
+        )
+    print(
+        f"  {'до первого ответа':<16} {statistics.median(totals) * 1000:8.0f}ms "
+        f"({min(totals) * 1000:.0f}-{max(totals) * 1000:.0f})"
+    )
+    if restarts:
+        print(
+            f"  {'после перезапуска':<16} "
+            f"{statistics.median(restarts) * 1000:8.0f}ms "
+            f"({min(restarts) * 1000:.0f}-{max(restarts) * 1000:.0f})"
+        )
+    # выключенные модули в этап import не входят, их импорт - выигрыш
+    # отложенных импортов; сборка диалогов по-прежнему входит в этап
+    labels = {
+        "optional": "не импортируется",
+        "dialogs": "сборка диалогов",
+    }
+    print("этап import")
+    for name, values in imports.items():
+        print(
+            f"  {labels[name]:<16} {statistics.median(values) * 1000:8.0f}ms "
+            f"({min(values) * 1000:.0f}-{max(values) * 1000:.0f})"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--start-method", choices=("spawn", "forkserver"), default="spawn"
+    )
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--child-imports", action="store_true", help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+    if args.child:
+        child()
+    elif args.child_imports:
+        child_imports()
+    else:
+        asyncio.run(main(args.runs, args.workers, args.start_method))
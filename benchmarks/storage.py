@@ -0,0 +1,104 @@
+"""Задержка чтения/записи FSM состояния на один апдейт диалога.
+
+Запуск: python -m benchmarks.storage [--updates 2000] [--redis-url URL]
+
+На каждый апдейт повторяется то, что делает aiogram_dialog: чтение
+состояния, стека и контекста, затем запись контекста и стека. Без
+--redis-url Redis бэкенд меряется на локальной заглушке (сетевой
+round trip остаётся, но без реального Redis).
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from benchmarks.fake_redis import FakeRedis
+from benchmarks.utils import format_latencies
+from storages.factory import create_redis_storage
+from storages.sqlite import SQLiteStorage
+
+CONTEXT = {
+    "_intent_id": "aBcDeFgHiJ",
+    "_stack_id": "",
+    "state": "TaskCreateStates:DEADLINE_TIME",
+    "start_data": None,
+    "dialog_data": {
+        "cached_categories": [
+            {"id": i, "name": f"Категория {i}"} for i in range(10)
+        ],
+        "categories": [1, 3, 5],
+        "title": "Подготовить отчёт",
+        "description": "Собрать метрики за неделю и разослать команде",
+        "deadline_date": "2025-04-01",
+    },
+    "widget_data": {"category_multiselect": ["1", "3", "5"]},
+    "access_settings": {"user_ids": [1], "custom": None},
+}
+STACK = {
+    "_id": "",
+    "intents": ["aBcDeFgHiJ"],
+    "last_message_id": 100,
+    "last_reply_keyboard": False,
+    "last_media_id": None,
+    "last_media_unique_id": None,
+    "last_income_media_group_id": None,
+}
+
+
+def storage_key(user_id: int, destiny: str) -> StorageKey:
+    return StorageKey(
+        bot_id=42, chat_id=user_id, user_id=user_id, destiny=destiny
+    )
+
+
+async def bench(storage: BaseStorage, updates: int) -> list[float]:
+    latencies = []
+    for i in range(updates):
+        user_id = i % 100
+        stack_key = storage_key(user_id, "aiogd:stack:")
+        context_key = storage_key(user_id, "aiogd:context:aBcDeFgHiJ")
+        started = time.perf_counter()
+        await storage.get_state(storage_key(user_id, "default"))
+        await storage.get_data(stack_key)
+        await storage.get_data(context_key)
+        await storage.set_data(context_key, CONTEXT)
+        await storage.set_data(stack_key, STACK)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def main(updates: int, redis_url: str | None) -> None:
+    fake_redis = None
+    if redis_url is None:
+        fake_redis = FakeRedis()
+        await fake_redis.start()
+        redis_url = fake_redis.url
+
+    with tempfile.TemporaryDirectory() as directory:
+        storages = {
+            "memory": MemoryStorage(),
+            "sqlite": SQLiteStorage(
+                str(Path(directory) / "fsm.sqlite3"), ttl=3600
+            ),
+            "redis": create_redis_storage(redis_url, ttl=3600),
+        }
+        for name, storage in storages.items():
+            latencies = await bench(storage, updates)
+            await storage.close()
+            print(format_latencies(name, latencies))
+
+    if fake_redis is not None:
+        await fake_redis.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--redis-url", default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.updates, args.redis_url))
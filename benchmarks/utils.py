@@ -0,0 +1,22 @@
+import statistics
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))
+    return values[index]
+
+
+def format_latencies(name: str, latencies: list[float]) -> str:
+    """Строка отчёта: перцентили в миллисекундах."""
+
+    ms = [value * 1000 for value in latencies]
+    return (
+        f"{name:<24} n={len(ms):<6} "
+        f"mean={statistics.fmean(ms) if ms else 0:8.2f}ms "
+        f"p50={percentile(ms, 50):8.2f}ms "
+        f"p95={percentile(ms, 95):8.2f}ms "
+        f"p99={percentile(ms, 99):8.2f}ms"
+    )
@@ -0,0 +1,121 @@
+"""Сравнение задержки "апдейт -> ответ" в режимах polling и webhook.
+
+Запуск: python -m benchmarks.webhook_vs_polling [--updates 500] [--users 50]
+
+Бот работает против локальной заглушки Bot API (benchmarks.fake_telegram),
+обработчик отвечает на каждое сообщение одним sendMessage, поэтому
+измеряется именно транспорт доставки апдейтов.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import time
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Message
+from aiohttp import web
+
+from benchmarks.fake_telegram import FakeTelegram
+from benchmarks.utils import format_latencies
+from server.webhook import create_webhook_app
+
+WEBHOOK_PORT = 8082
+WEBHOOK_PATH = "/webhook"
+SECRET = "bench-secret"
+
+
+def create_dispatcher() -> Dispatcher:
+    dispatcher = Dispatcher()
+
+    @dispatcher.message()
+    async def echo(message: Message):
+        await message.answer("ok")
+
+    return dispatcher
+
+
+async def drive(fake: FakeTelegram, updates: int, users: int) -> list[float]:
+    latencies = []
+
+    async def one(user_id: int) -> None:
+        reply = fake.wait_reply(user_id)
+        started = time.perf_counter()
+        await fake.push_update(fake.make_message_update(user_id, "ping"))
+        latencies.append(await reply - started)
+
+    for offset in range(0, updates, users):
+        await asyncio.gather(
+            *(
+                one(user_id)
+                for user_id in range(1, min(users, updates - offset) + 1)
+            )
+        )
+    return latencies
+
+
+async def bench_polling(fake: FakeTelegram, updates: int, users: int):
+    bot = Bot(
+        "42:TEST",
+        session=AiohttpSession(api=TelegramAPIServer.from_base(fake.url)),
+    )
+    dispatcher = create_dispatcher()
+    polling = asyncio.create_task(
+        dispatcher.start_polling(bot, handle_signals=False, polling_timeout=1)
+    )
+    await asyncio.sleep(0.2)
+    try:
+        return await drive(fake, updates, users)
+    finally:
+        await dispatcher.stop_polling()
+        with contextlib.suppress(asyncio.CancelledError):
+            await polling
+
+
+async def bench_webhook(fake: FakeTelegram, updates: int, users: int):
+    bot = Bot(
+        "42:TEST",
+        session=AiohttpSession(api=TelegramAPIServer.from_base(fake.url)),
+    )
+    dispatcher = create_dispatcher()
+    app = create_webhook_app(
+        dispatcher,
+        bot,
+        path=WEBHOOK_PATH,
+        secret_token=SECRET,
+        max_concurrent_updates=100,
+    )
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", WEBHOOK_PORT).start()
+    await bot.set_webhook(
+        url=f"http://127.0.0.1:{WEBHOOK_PORT}{WEBHOOK_PATH}",
+        secret_token=SECRET,
+    )
+    try:
+        return await drive(fake, updates, users)
+    finally:
+        await bot.delete_webhook()
+        await runner.cleanup()
+
+
+async def main(updates: int, users: int) -> None:
+    fake = FakeTelegram()
+    await fake.start()
+    try:
+        polling = await bench_polling(fake, updates, users)
+        webhook = await bench_webhook(fake, updates, users)
+    finally:
+        await fake.stop()
+    print(format_latencies("polling", polling))
+    print(format_latencies("webhook", webhook))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", type=int, default=500)
+    parser.add_argument("--users", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.updates, args.users))
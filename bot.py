@@ -1,28 +1,272 @@
 import asyncio
+import logging
+from functools import partial
 
 from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram_dialog.setup import setup_dialogs
 
 from config import settings
 from handlers.main import router as main_router
 from handlers.tasks import router as task_router
+from middlewares.callbacks import (
+    AnswerTrackingMiddleware,
+    CallbackAckMiddleware,
+)
+from middlewares.fingerprints import EditDeduplicationMiddleware
+from middlewares.inflight import InFlightMiddleware
+from middlewares.metrics import MetricsMiddleware
+from middlewares.outbound import OutboundRateLimiter
+from middlewares.recording import RecordingMiddleware
+from repositories.client import HttpClient
+from repositories.events import task_events
+from repositories.known_users import KnownUsersRepository
+from repositories.outbox import TaskOutboxRepository
+from repositories.reminders import SentRemindersRepository
+from repositories.timezones import UserTimezoneRepository
+from server.metrics import MetricsServer, register_runtime_metrics
+from server.polling import run_polling
+from server.supervisor import Supervisor
+from services.outbox import TaskOutbox
+from services.reminders import ReminderScheduler
+from services.timezones import TimezoneService
+from services.users import UserRegistry
+from storages.factory import create_fsm_storage
+from utils.metrics import registry
+from utils.recording import UpdateRecorder
 
 token = settings.BOT_TOKEN
-bot = Bot(token=token)
-dispatcher = Dispatcher()
+session = (
+    AiohttpSession(api=TelegramAPIServer.from_base(settings.BOT_API_URL))
+    if settings.BOT_API_URL
+    else None
+)
+bot = Bot(token=token, session=session)
+# у каждого воркера свой бот, общий лимит Telegram делится между ними
+outbound = OutboundRateLimiter(
+    global_rate=settings.OUTBOUND_GLOBAL_RATE / settings.WORKERS,
+    chat_rate=settings.OUTBOUND_CHAT_RATE,
+    chat_burst=settings.OUTBOUND_CHAT_BURST,
+    group_rate=settings.OUTBOUND_GROUP_RATE,
+    max_retries=settings.OUTBOUND_MAX_RETRIES,
+)
+edits = EditDeduplicationMiddleware(settings.EDIT_DEDUPLICATION_SIZE)
+# профилирование, Redis, вебхук и шардирование импортируются только
+# там, где они включены
+if settings.PROFILING_ENABLED:
+    from middlewares.profiling import (
+        ProfilingMiddleware,
+        TelegramTimingMiddleware,
+    )
+
+    bot.session.middleware(TelegramTimingMiddleware())
+bot.session.middleware(AnswerTrackingMiddleware())
+bot.session.middleware(edits)
+bot.session.middleware(outbound)
+if settings.PROFILING_ENABLED:
+    bot.session.middleware(TelegramTimingMiddleware("telegram_network"))
+recorder = (
+    UpdateRecorder(settings.RECORDING_PATH)
+    if settings.RECORDING_ENABLED
+    else None
+)
+http_client = HttpClient.from_settings(settings, recorder=recorder)
+known_users = KnownUsersRepository(settings.KNOWN_USERS_DB_PATH)
+user_registry = UserRegistry(known_users)
+timezones = TimezoneService(
+    UserTimezoneRepository(settings.TIMEZONES_DB_PATH),
+    default=settings.DEFAULT_TIMEZONE,
+    max_size=settings.TIMEZONE_CACHE_SIZE,
+)
+reminders = ReminderScheduler(
+    bot,
+    http_client,
+    known_users,
+    timezones,
+    task_events,
+    SentRemindersRepository(settings.REMINDERS_DB_PATH),
+    lead=settings.REMINDER_LEAD,
+    overdue_grace=settings.REMINDER_OVERDUE_GRACE,
+    horizon=settings.REMINDER_HORIZON,
+    refresh_interval=settings.REMINDER_REFRESH_INTERVAL,
+    max_pending=settings.REMINDER_MAX_PENDING,
+    fetch_concurrency=settings.REMINDER_FETCH_CONCURRENCY,
+)
+task_outbox = TaskOutbox(
+    bot,
+    http_client,
+    TaskOutboxRepository(settings.OUTBOX_DB_PATH),
+    retry_interval=settings.OUTBOX_RETRY_INTERVAL,
+    drain_concurrency=settings.OUTBOX_DRAIN_CONCURRENCY,
+    direct_timeout=settings.OUTBOX_DIRECT_TIMEOUT,
+)
+in_flight = InFlightMiddleware()
+metrics_server = MetricsServer(
+    registry, settings.METRICS_HOST, settings.METRICS_PORT
+)
+register_runtime_metrics(
+    registry,
+    http_client=http_client,
+    outbound=outbound,
+    edits=edits,
+    reminders=reminders,
+    outbox=task_outbox,
+    in_flight=in_flight,
+)
+storage, events_isolation = create_fsm_storage(settings)
+dispatcher = Dispatcher(
+    storage=storage,
+    events_isolation=events_isolation,
+    http_client=http_client,
+    user_registry=user_registry,
+    timezones=timezones,
+    task_outbox=task_outbox,
+)
+dispatcher.update.outer_middleware(in_flight)
+if recorder is not None:
+    dispatcher.update.outer_middleware(RecordingMiddleware(recorder))
+if settings.PROFILING_ENABLED:
+    dispatcher.update.outer_middleware(
+        ProfilingMiddleware(
+            log_path=settings.PROFILING_LOG_PATH,
+            sample_rate=settings.PROFILING_SAMPLE_RATE,
+            slow_threshold=settings.PROFILING_SLOW_THRESHOLD,
+            max_bytes=settings.PROFILING_LOG_MAX_BYTES,
+            backups=settings.PROFILING_LOG_BACKUPS,
+        )
+    )
+dispatcher.callback_query.outer_middleware(
+    CallbackAckMiddleware(settings.CALLBACK_ACK_DEADLINE)
+)
+dispatcher.message.middleware(MetricsMiddleware())
+dispatcher.callback_query.middleware(MetricsMiddleware())
+dispatcher.startup.register(user_registry.load)
+dispatcher.startup.register(timezones.load)
+dispatcher.shutdown.register(
+    partial(in_flight.wait_idle, settings.SHUTDOWN_DRAIN_TIMEOUT)
+)
+if settings.REMINDERS_ENABLED:
+    dispatcher.startup.register(reminders.start)
+    dispatcher.shutdown.register(reminders.stop)
+if settings.METRICS_ENABLED:
+    dispatcher.startup.register(metrics_server.start)
+    dispatcher.shutdown.register(metrics_server.stop)
+dispatcher.startup.register(task_outbox.start)
+dispatcher.shutdown.register(task_outbox.stop)
+dispatcher.shutdown.register(http_client.close)
+if recorder is not None:
+    dispatcher.startup.register(recorder.open)
+    dispatcher.shutdown.register(recorder.close)
+dispatcher.shutdown.register(user_registry.close)
+dispatcher.shutdown.register(timezones.close)
 dispatcher.include_router(main_router)
 dispatcher.include_router(task_router)
+setup_dialogs(dispatcher, events_isolation=events_isolation)
+
+
+async def run(drop_pending_updates: bool):
+    match settings.BOT_MODE:
+        case "webhook":
+            from server.webhook import run_webhook
+
+            await run_webhook(
+                dispatcher,
+                bot,
+                base_url=settings.WEBHOOK_URL,
+                path=settings.WEBHOOK_PATH,
+                secret_token=settings.WEBHOOK_SECRET,
+                host=settings.WEBHOOK_HOST,
+                port=settings.WEBHOOK_PORT,
+                max_concurrent_updates=settings.WEBHOOK_MAX_CONCURRENT_UPDATES,
+                drop_pending_updates=drop_pending_updates,
+            )
+        case _:
+            await run_polling(
+                dispatcher, bot, drop_pending_updates=drop_pending_updates
+            )
+
+
+def shard_worker(index: int, queue, in_flight) -> None:
+    from server.sharding import consume_updates
+
+    logging.basicConfig(level=logging.INFO)
+    reminders.set_shard(index, settings.WORKERS)
+    task_outbox.set_shard(index, settings.WORKERS)
+    metrics_server.set_shard(index)
+    if recorder is not None:
+        recorder.set_shard(index)
+    asyncio.run(
+        consume_updates(
+            dispatcher,
+            bot,
+            queue,
+            in_flight,
+            index,
+            max_concurrent_updates=settings.WEBHOOK_MAX_CONCURRENT_UPDATES,
+        )
+    )
+
+
+async def run_sharded(drop_pending_updates: bool):
+    from server.sharding import (
+        ShardedRunner,
+        create_sharded_webhook_app,
+        poll_to_shards,
+    )
+    from server.webhook import serve_webhook
+
+    runner = ShardedRunner(
+        shard_worker,
+        settings.WORKERS,
+        settings.WORKER_QUEUE_SIZE,
+        start_method=settings.WORKER_START_METHOD,
+        # воркеры порождаются от процесса, где bot уже импортирован
+        preload=[shard_worker.__module__],
+    )
+    allowed_updates = dispatcher.resolve_used_update_types()
+    match settings.BOT_MODE:
+        case "webhook":
+            front = serve_webhook(
+                create_sharded_webhook_app(
+                    runner.route,
+                    path=settings.WEBHOOK_PATH,
+                    secret_token=settings.WEBHOOK_SECRET,
+                ),
+                bot,
+                base_url=settings.WEBHOOK_URL,
+                path=settings.WEBHOOK_PATH,
+                secret_token=settings.WEBHOOK_SECRET,
+                host=settings.WEBHOOK_HOST,
+                port=settings.WEBHOOK_PORT,
+                max_connections=settings.WEBHOOK_MAX_CONCURRENT_UPDATES,
+                allowed_updates=allowed_updates,
+                drop_pending_updates=drop_pending_updates,
+            )
+        case _:
+            front = poll_to_shards(
+                bot,
+                runner.route,
+                allowed_updates,
+                drop_pending_updates=drop_pending_updates,
+            )
+    await runner.run(
+        front,
+        stats_interval=settings.WORKER_STATS_INTERVAL,
+        stop_timeout=settings.SHUTDOWN_DRAIN_TIMEOUT,
+    )
 
 
 async def main():
-    setup_dialogs(dispatcher)
-    await bot.delete_webhook(drop_pending_updates=True)
-    await dispatcher.start_polling(bot)
+    supervisor = Supervisor(
+        run_sharded if settings.WORKERS > 1 else run,
+        drop_pending_updates_on_start=settings.DROP_PENDING_UPDATES_ON_START,
+        min_backoff=settings.RESTART_MIN_BACKOFF,
+        max_backoff=settings.RESTART_MAX_BACKOFF,
+    )
+    await supervisor.run()
 
 
 if __name__ == "__main__":
-    while True:
-        try:
-            asyncio.run(main())
-        except Exception:
-            pass
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
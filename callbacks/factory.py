@@ -1,6 +1,22 @@
 from aiogram.filters.callback_data import CallbackData
 
+from enums.tasks import TaskBulkActionEnum
+
 
 class TaskCallback(CallbackData, prefix="task"):
     action: str
     task_id: str
+
+
+class TaskBulkCallback(CallbackData, prefix="bulk"):
+    """Режим выбора нескольких задач в списке list_name.
+
+    callback_data в Telegram не длиннее 64 байт, поэтому задача
+    передаётся номером на странице (index), а не id, а действие - одной
+    буквой.
+    """
+
+    action: TaskBulkActionEnum
+    list_name: str
+    page: int = 1
+    index: int = -1
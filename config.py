@@ -1,9 +1,137 @@
+import secrets
+from typing import Literal
+
+from pydantic import Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     API_URL: str
     BOT_TOKEN: str
+    BOT_API_URL: str | None = None
+
+    BOT_MODE: Literal["polling", "webhook"] = "polling"
+    WEBHOOK_URL: str | None = None
+    WEBHOOK_PATH: str = "/webhook"
+    WEBHOOK_SECRET: str = Field(default_factory=secrets.token_urlsafe)
+    WEBHOOK_HOST: str = "0.0.0.0"
+    WEBHOOK_PORT: int = 8080
+    WEBHOOK_MAX_CONCURRENT_UPDATES: int = 100
+
+    DROP_PENDING_UPDATES_ON_START: bool = True
+    RESTART_MIN_BACKOFF: float = 1
+    RESTART_MAX_BACKOFF: float = 60
+    SHUTDOWN_DRAIN_TIMEOUT: float = 30
+
+    WORKERS: int = 1
+    WORKER_QUEUE_SIZE: int = 1000
+    WORKER_STATS_INTERVAL: float = 60
+    # forkserver быстрее перезапускает воркеров, но импортирует bot (и
+    # читает настройки) один раз на всех, см. ShardedRunner
+    WORKER_START_METHOD: Literal["spawn", "forkserver"] = "spawn"
+
+    OUTBOUND_GLOBAL_RATE: float = 30
+    OUTBOUND_CHAT_RATE: float = 1
+    OUTBOUND_CHAT_BURST: float = 3
+    OUTBOUND_GROUP_RATE: float = 20 / 60
+    OUTBOUND_MAX_RETRIES: int = 3
+    EDIT_DEDUPLICATION_SIZE: int = 10_000
+    CALLBACK_ACK_DEADLINE: float = 0.3
+
+    METRICS_ENABLED: bool = True
+    METRICS_HOST: str = "127.0.0.1"
+    METRICS_PORT: int = 9100
+
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.01
+    PROFILING_SLOW_THRESHOLD: float = 1
+    PROFILING_LOG_PATH: str = "data/slow_updates.log"
+    PROFILING_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    PROFILING_LOG_BACKUPS: int = 5
+
+    RECORDING_ENABLED: bool = False
+    RECORDING_PATH: str = "data/recording.jsonl"
+
+    HTTP_POOL_LIMIT: int = 100
+    HTTP_POOL_LIMIT_PER_HOST: int = 20
+    HTTP_DNS_CACHE_TTL: int = 300
+    HTTP_KEEPALIVE_TIMEOUT: float = 30
+    HTTP_CONNECT_TIMEOUT: float = 5
+    HTTP_TOTAL_TIMEOUT: float = 30
+
+    BACKEND_TIMEOUT: float = 10
+    BACKEND_ENDPOINT_TIMEOUTS: dict[str, float] = {
+        "tasks:list": 5,
+        "tasks:detail": 3,
+        "categories": 3,
+    }
+    BACKEND_MAX_RETRIES: int = 2
+    BACKEND_RETRY_MIN_BACKOFF: float = 0.1
+    BACKEND_RETRY_MAX_BACKOFF: float = 2
+    BACKEND_BREAKER_THRESHOLD: int = 5
+    BACKEND_BREAKER_RESET_TIMEOUT: float = 30
+    BACKEND_HEDGE_DETAIL_AFTER: float | None = None
+
+    REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_TIMEOUT: float = 0.5
+
+    CACHE_BACKEND: Literal["memory", "redis", "none"] = "memory"
+    CACHE_MAX_SIZE: int = 10_000
+    CACHE_TASK_LIST_TTL: float = 30
+    CACHE_TASK_DETAIL_TTL: float = 60
+    CACHE_CATEGORIES_TTL: float = 300
+
+    TASKS_PAGE_SIZE: int = 5
+    TASKS_WINDOW_SIZE: int = 50
+    TASKS_PREFETCH_PAGES: int = 2
+    TASKS_BATCH_CONCURRENCY: int = 5
+
+    KNOWN_USERS_DB_PATH: str = "data/known_users.sqlite3"
+
+    REMINDERS_ENABLED: bool = True
+    REMINDER_LEAD: float = 60 * 60
+    REMINDER_HORIZON: float = 6 * 60 * 60
+    REMINDER_REFRESH_INTERVAL: float = 30 * 60
+    REMINDER_MAX_PENDING: int = 200_000
+    REMINDER_FETCH_CONCURRENCY: int = 10
+    REMINDER_OVERDUE_GRACE: float = 24 * 60 * 60
+    REMINDERS_DB_PATH: str = "data/sent_reminders.sqlite3"
+
+    DEFAULT_TIMEZONE: str = "America/Adak"
+    TIMEZONES_DB_PATH: str = "data/user_timezones.sqlite3"
+    TIMEZONE_CACHE_SIZE: int = 10_000
+
+    OUTBOX_DB_PATH: str = "data/task_outbox.sqlite3"
+    OUTBOX_RETRY_INTERVAL: float = 15
+    OUTBOX_DRAIN_CONCURRENCY: int = 5
+    OUTBOX_DIRECT_TIMEOUT: float = 2
+
+    FSM_STORAGE: Literal["memory", "redis", "sqlite"] = "memory"
+    FSM_SQLITE_PATH: str = "data/fsm.sqlite3"
+    FSM_TTL: int = 7 * 24 * 60 * 60
+
+    @model_validator(mode="after")
+    def check_webhook_url(self) -> "Settings":
+        if self.BOT_MODE == "webhook" and not self.WEBHOOK_URL:
+            raise ValueError("WEBHOOK_URL обязателен в режиме webhook")
+        return self
+
+    @model_validator(mode="after")
+    def check_workers_storage(self) -> "Settings":
+        if self.WORKERS > 1 and self.FSM_STORAGE == "memory":
+            raise ValueError(
+                "Для нескольких воркеров нужно общее FSM_STORAGE "
+                "(redis или sqlite)"
+            )
+        return self
+
+    @model_validator(mode="after")
+    def check_tasks_window(self) -> "Settings":
+        if self.TASKS_WINDOW_SIZE % self.TASKS_PAGE_SIZE:
+            raise ValueError(
+                "TASKS_WINDOW_SIZE должен быть кратен TASKS_PAGE_SIZE"
+            )
+        return self
 
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8"
@@ -1,7 +1,6 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
 
-import pytz
 from aiogram.types import CallbackQuery, Message
 from aiogram_dialog import DialogManager
 from aiogram_dialog.widgets.kbd import Button, CalendarConfig, Multiselect, Row
@@ -9,10 +8,15 @@ from aiogram_dialog.widgets.kbd.calendar_kbd import CalendarData
 from aiogram_dialog.widgets.text import Const
 from aiogram_dialog.widgets.widget_event import WidgetEventProcessor
 from pydantic import ValidationError
+from pytz.tzinfo import BaseTzInfo
 
+from config import settings
 from entities.users import User
 from repositories.categories import CategoryRepository
+from repositories.client import HttpClient
 from repositories.tasks import TaskRepository
+from services.timezones import TimezoneService
+from utils.timezones import combine_local, get_zone
 
 
 class TaskBaseCreateUpdateDialog(ABC):
@@ -25,12 +29,40 @@ class TaskBaseCreateUpdateDialog(ABC):
         create_dialog, где и будет сам диалог.
         """
 
+        # пояс пользователя подставляет UserTimezoneCalendar, здесь -
+        # пояс по умолчанию
         self._calendar_config = CalendarConfig(
-            timezone=pytz.timezone("America/Adak")
+            timezone=get_zone(settings.DEFAULT_TIMEZONE)
         )
         self._task_repository = TaskRepository
         self._category_repository = CategoryRepository
 
+    @staticmethod
+    def _get_http_client(dialog_manager: DialogManager) -> HttpClient:
+        return dialog_manager.middleware_data["http_client"]
+
+    @staticmethod
+    async def _get_user_zone(dialog_manager: DialogManager) -> BaseTzInfo:
+        timezones: TimezoneService = dialog_manager.middleware_data[
+            "timezones"
+        ]
+        return await timezones.get_user_zone(
+            str(dialog_manager.event.from_user.id)
+        )
+
+    @staticmethod
+    def _get_deadline(
+        deadline_date: str, deadline_time: str, zone: BaseTzInfo
+    ) -> str:
+        """Дедлайн, введённый в поясе пользователя, в ISO 8601 со
+        смещением этого пояса."""
+
+        return combine_local(
+            datetime.strptime(deadline_date, "%Y-%m-%d").date(),
+            datetime.strptime(deadline_time, "%H:%M").time(),
+            zone,
+        ).isoformat()
+
     @staticmethod
     def _validate_title(value: str) -> str:
         if not value:
@@ -55,7 +87,7 @@ class TaskBaseCreateUpdateDialog(ABC):
         if "cached_categories" not in dialog_manager.dialog_data:
             user = User.from_message(dialog_manager.event)
             categories = await self._category_repository(
-                user
+                user, self._get_http_client(dialog_manager)
             ).get_all_categories()
             categories_dicts = [
                 {"id": category.id, "name": category.name}
@@ -151,8 +183,10 @@ class TaskBaseCreateUpdateDialog(ABC):
             ),
         )
 
-    @staticmethod
-    def _get_request_body(dialog_manager: DialogManager) -> dict:
+    @classmethod
+    def _get_request_body(
+        cls, dialog_manager: DialogManager, zone: BaseTzInfo
+    ) -> dict:
         data = dialog_manager.dialog_data
         request_body = {}
 
@@ -169,8 +203,8 @@ class TaskBaseCreateUpdateDialog(ABC):
             deadline_date = data["deadline_date"]
             deadline_time = data["deadline_time"]
             if deadline_date and deadline_time:
-                request_body["deadline"] = (
-                    f"{deadline_date}T{deadline_time}:00.000Z"
+                request_body["deadline"] = cls._get_deadline(
+                    deadline_date, deadline_time, zone
                 )
 
         return request_body
@@ -0,0 +1,17 @@
+from aiogram_dialog import DialogManager
+from aiogram_dialog.widgets.kbd import Calendar
+from aiogram_dialog.widgets.kbd.calendar_kbd import CalendarUserConfig
+
+from services.timezones import TimezoneService
+
+
+class UserTimezoneCalendar(Calendar):
+    """Календарь, у которого "сегодня" считается в часовом поясе
+    пользователя, а не в поясе из общего CalendarConfig."""
+
+    async def _get_user_config(
+        self, data: dict, manager: DialogManager
+    ) -> CalendarUserConfig:
+        timezones: TimezoneService = manager.middleware_data["timezones"]
+        zone = await timezones.get_user_zone(str(manager.event.from_user.id))
+        return CalendarUserConfig(timezone=zone)
@@ -3,18 +3,21 @@ from aiogram_dialog import Dialog, DialogManager, Window
 from aiogram_dialog.widgets.input import MessageInput
 from aiogram_dialog.widgets.kbd import (
     Button,
-    Calendar,
     Cancel,
     Multiselect,
 )
 from aiogram_dialog.widgets.text import Const, Format
 
 from dialogs.tasks.base import TaskBaseCreateUpdateDialog
+from dialogs.tasks.calendar import UserTimezoneCalendar
 from entities.users import User
+from enums.outbox import OutboxResultEnum
 from exceptions.base import ServerException
 from keyboards.tasks import get_back_keyboard
-from messages.tasks import TASK_CREATED
+from messages.tasks import OUTBOX_QUEUED, TASK_CREATED
+from services.outbox import TaskOutbox
 from states.tasks import TaskCreateStates
+from utils.metrics import count_server_error
 
 
 class TaskCreateDialog(TaskBaseCreateUpdateDialog):
@@ -24,13 +27,22 @@ class TaskCreateDialog(TaskBaseCreateUpdateDialog):
         button: Button,
         dialog_manager: DialogManager,
     ):
-        request_body = self._get_request_body(dialog_manager)
+        zone = await self._get_user_zone(dialog_manager)
+        request_body = self._get_request_body(dialog_manager, zone)
         user = User.from_callback(callback)
+        outbox: TaskOutbox = dialog_manager.middleware_data["task_outbox"]
         try:
-            await self._task_repository(user=user).create_task(request_body)
-            keyboard = get_back_keyboard()
-            await callback.message.answer(TASK_CREATED, reply_markup=keyboard)
+            result = await outbox.submit(user, "create", payload=request_body)
+            text = (
+                TASK_CREATED
+                if result is OutboxResultEnum.DONE
+                else OUTBOX_QUEUED[result]
+            )
+            await callback.message.answer(
+                text, reply_markup=get_back_keyboard()
+            )
         except ServerException as e:
+            count_server_error(e)
             await callback.message.answer(e.message)
         finally:
             await dialog_manager.done()
@@ -70,7 +82,7 @@ class TaskCreateDialog(TaskBaseCreateUpdateDialog):
             ),
             Window(
                 Const("Введите дату дедлайна:"),
-                Calendar(
+                UserTimezoneCalendar(
                     id="calendar",
                     on_click=self._on_deadline_date_entered,
                     config=self._calendar_config,
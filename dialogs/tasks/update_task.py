@@ -1,20 +1,24 @@
+from datetime import datetime
+
 from aiogram.types import CallbackQuery
 from aiogram_dialog import Dialog, DialogManager, Window
 from aiogram_dialog.widgets.input import MessageInput
 from aiogram_dialog.widgets.kbd import (
     Button,
-    Calendar,
     Cancel,
     Multiselect,
 )
 from aiogram_dialog.widgets.text import Const, Format
+from pytz.tzinfo import BaseTzInfo
 
 from dialogs.tasks.base import TaskBaseCreateUpdateDialog
+from dialogs.tasks.calendar import UserTimezoneCalendar
 from entities.users import User
 from exceptions.base import ServerException
 from keyboards.tasks import get_back_keyboard
 from messages.tasks import TASK_UPDATED
 from states.tasks import TaskUpdateStates
+from utils.metrics import count_server_error
 
 
 class TaskUpdateDialog(TaskBaseCreateUpdateDialog):
@@ -24,24 +28,32 @@ class TaskUpdateDialog(TaskBaseCreateUpdateDialog):
         button: Button,
         dialog_manager: DialogManager,
     ):
-        request_body = self._get_request_body(dialog_manager)
+        zone = await self._get_user_zone(dialog_manager)
+        request_body = self._get_request_body(dialog_manager, zone)
         task_id = dialog_manager.start_data.get("task_id")
         user = User.from_callback(callback)
         try:
-            await self._task_repository(user=user).update_task(
-                request_body, task_id
-            )
+            await self._task_repository(
+                user=user, client=self._get_http_client(dialog_manager)
+            ).update_task(request_body, task_id)
             keyboard = get_back_keyboard()
             await callback.message.answer(TASK_UPDATED, reply_markup=keyboard)
         except ServerException as e:
+            count_server_error(e)
             await callback.message.answer(e.message)
         finally:
             await dialog_manager.done()
 
-    @staticmethod
-    def _get_request_body(dialog_manager: DialogManager) -> dict:
+    @classmethod
+    def _get_request_body(
+        cls, dialog_manager: DialogManager, zone: BaseTzInfo
+    ) -> dict:
         data = dialog_manager.dialog_data
-        task = dialog_manager.start_data.get("task_data")
+        # в start_data только JSON-совместимые значения: он сохраняется
+        # в FSM хранилище вместе со стеком диалога
+        deadline = datetime.fromisoformat(
+            dialog_manager.start_data.get("deadline")
+        ).astimezone(zone)
         request_body = {}
 
         if "categories" in data:
@@ -55,15 +67,15 @@ class TaskUpdateDialog(TaskBaseCreateUpdateDialog):
 
         if "deadline_date" in data or "deadline_time" in data:
             deadline_date = data.get(
-                "deadline_date", task.deadline.date().strftime("%Y-%m-%d")
+                "deadline_date", deadline.date().strftime("%Y-%m-%d")
             )
             deadline_time = data.get(
-                "deadline_time", task.deadline.time().strftime("%H:%M")
+                "deadline_time", deadline.time().strftime("%H:%M")
             )
 
             if deadline_date and deadline_time:
-                request_body["deadline"] = (
-                    f"{deadline_date}T{deadline_time}:00.000Z"
+                request_body["deadline"] = cls._get_deadline(
+                    deadline_date, deadline_time, zone
                 )
 
         return request_body
@@ -104,7 +116,7 @@ class TaskUpdateDialog(TaskBaseCreateUpdateDialog):
             ),
             Window(
                 Const("Введите дату дедлайна:"),
-                Calendar(
+                UserTimezoneCalendar(
                     id="calendar",
                     on_click=self._on_deadline_date_entered,
                     config=self._calendar_config,
@@ -0,0 +1,10 @@
+from enum import Enum
+
+
+class OutboxResultEnum(Enum):
+    # выполнена сразу
+    DONE = "done"
+    # отложена: бэкенд недоступен
+    QUEUED = "queued"
+    # отложена за ещё не отправленными операциями пользователя
+    QUEUED_BEHIND = "queued_behind"
@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, StrEnum
 
 
 class TaskStatusEnum(Enum):
@@ -15,3 +15,11 @@ class TaskStatusEnum(Enum):
             if item.value[0] == value:
                 return item
         raise ValueError(f"{value} is not a valid {cls.__name__}")
+
+
+class TaskBulkActionEnum(StrEnum):
+    # одна буква: callback_data не длиннее 64 байт
+    START = "s"
+    TOGGLE = "t"
+    COMPLETE = "c"
+    DELETE = "d"
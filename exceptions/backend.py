@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+
+from exceptions.base import ServerException
+from exceptions.constants import status
+
+
+@dataclass
+class BackendUnavailableException(ServerException):
+    code: status.HTTP_503_SERVICE_UNAVAILABLE = (
+        status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    error_code: status.HTTP_503_SERVICE_UNAVAILABLE = (
+        status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
+    @property
+    def message(self):
+        return "Сервис задач временно недоступен, попробуйте чуть позже"
@@ -12,7 +12,8 @@ class ServerException(Exception):
 
     :param code: HTTP статус код, возвращаемый в респонсе
     :param error_code: код самой ошибки. Нужен для более
-    гибкого логирования и сбора метрик в будущем.
+    гибкого логирования, попадает в метрику
+    bot_server_exceptions_total.
     """
 
     code: status.HTTP_400_BAD_REQUEST = status.HTTP_400_BAD_REQUEST
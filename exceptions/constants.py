@@ -7,6 +7,7 @@ class Status:
     HTTP_403_FORBIDDEN = 403
     HTTP_404_NOT_FOUND = 404
     HTTP_409_CONFLICT = 409
+    HTTP_503_SERVICE_UNAVAILABLE = 503
 
 
 status = Status()
@@ -1,7 +1,16 @@
-from exceptions.base import NotFoundException
+from exceptions.base import NotFoundException, ServerException
 
 
 class UserNotFoundException(NotFoundException):
     @property
     def message(self):
         return "Пользователь не найден!"
+
+
+class UnknownTimezoneException(ServerException):
+    @property
+    def message(self):
+        return (
+            "Не знаю такого часового пояса. Укажите его в формате IANA, "
+            "например Europe/Moscow"
+        )
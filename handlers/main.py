@@ -1,23 +1,57 @@
 from aiogram import Router
-from aiogram.filters import Command
-from aiogram.types import Message
+from aiogram.filters import Command, CommandObject, ExceptionTypeFilter
+from aiogram.types import ErrorEvent, Message
 
 from entities.users import User
-from exceptions.users import UserNotFoundException
+from exceptions.base import ServerException
 from keyboards.main import get_main_keyboard
 from messages.greeting import WELCOME_NEW_USER, WELCOME_OLD_USER
-from repositories.users import UserRepository
+from messages.timezones import TIMEZONE_CURRENT, TIMEZONE_UPDATED
+from repositories.client import HttpClient
+from services.timezones import TimezoneService
+from services.users import UserRegistry
+from utils.metrics import count_server_error
 
 router = Router()
 
 
 @router.message(Command("start"))
-async def startup_handler(message: Message):
+async def startup_handler(
+    message: Message, http_client: HttpClient, user_registry: UserRegistry
+):
     user = User.from_message(message)
-    try:
-        user = await UserRepository().get_user_by_user_id(user.user_id)
-        text = WELCOME_OLD_USER
-    except UserNotFoundException:
-        await UserRepository().create_user(user)
-        text = WELCOME_NEW_USER
+    is_new = await user_registry.register(user, http_client)
+    text = WELCOME_NEW_USER if is_new else WELCOME_OLD_USER
     await message.answer(text, reply_markup=get_main_keyboard())
+
+
+@router.message(Command("timezone"))
+async def timezone_handler(
+    message: Message, command: CommandObject, timezones: TimezoneService
+):
+    user = User.from_message(message)
+    if not command.args:
+        zone = await timezones.get_user_zone(user.user_id)
+        await message.answer(TIMEZONE_CURRENT.format(timezone=zone.zone))
+        return
+    try:
+        zone = await timezones.set_user_zone(
+            user.user_id, command.args.strip()
+        )
+        await message.answer(TIMEZONE_UPDATED.format(timezone=zone.zone))
+    except ServerException as e:
+        count_server_error(e)
+        await message.answer(e.message)
+
+
+@router.errors(ExceptionTypeFilter(ServerException))
+async def server_exception_handler(event: ErrorEvent):
+    """Ошибки бэкенда, которые не разобрал сам обработчик (например,
+    бэкенд недоступен), показываются пользователю вместо молчания."""
+
+    count_server_error(event.exception)
+    message = event.exception.message
+    if event.update.callback_query is not None:
+        await event.update.callback_query.answer(message, show_alert=True)
+    elif event.update.message is not None:
+        await event.update.message.answer(message)
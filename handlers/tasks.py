@@ -2,26 +2,43 @@ from aiogram import F, Router
 from aiogram.types import CallbackQuery
 from aiogram_dialog import DialogManager, StartMode
 
-from callbacks.factory import TaskCallback
+from callbacks.factory import TaskBulkCallback, TaskCallback
 from dialogs.tasks.create_task import TaskCreateDialog
 from dialogs.tasks.update_task import TaskUpdateDialog
 from entities.users import User
+from enums.outbox import OutboxResultEnum
+from enums.tasks import TaskBulkActionEnum
 from exceptions.base import ServerException
 from keyboards.tasks import (
     get_back_keyboard,
+    get_bulk_selection,
+    get_bulk_tasks_keyboard,
     get_task_detail_keyboard,
     get_task_type_choose_keyboard,
     get_tasks_list_keyboard,
+    toggle_bulk_task,
 )
 from messages.tasks import (
+    BULK_COMPLETED,
+    BULK_DELETED,
+    BULK_HINT,
+    BULK_NOTHING_SELECTED,
+    BULK_STALE,
     NO_TASKS,
+    OUTBOX_QUEUED,
     TASK_COMPLETED,
     TASK_DELETED,
     TASK_TYPE_CHOOSE,
 )
+from repositories.client import HttpClient
+from repositories.filters import TaskFilter
 from repositories.tasks import TaskRepository
+from services.outbox import TaskOutbox
+from services.timezones import TimezoneService
 from states.tasks import TaskCreateStates, TaskUpdateStates
-from utils.tasks import get_detail_task, get_tasks_list
+from utils.metrics import count_server_error
+from utils.tasks import get_batch_summary, get_detail_task, get_tasks_list
+from utils.timezones import get_today
 
 router = Router()
 task_create_dialog = TaskCreateDialog().create_dialog()
@@ -31,7 +48,11 @@ router.include_router(task_update_dialog)
 
 
 @router.callback_query(F.data.startswith("today_tasks"))
-async def active_tasks_handler(callback: CallbackQuery):
+async def active_tasks_handler(
+    callback: CallbackQuery,
+    http_client: HttpClient,
+    timezones: TimezoneService,
+):
     page = (
         int(callback.data.split("_")[-1])
         if callback.data != "today_tasks"
@@ -39,20 +60,21 @@ async def active_tasks_handler(callback: CallbackQuery):
     )
 
     user = User.from_callback(callback)
-    tasks_data, has_next_page, has_prev_page = await TaskRepository(
-        user
-    ).get_user_today_tasks(page=page)
+    zone = await timezones.get_user_zone(user.user_id)
+    tasks_data, has_next, has_previous = await TaskRepository(
+        user, http_client
+    ).list_tasks(TaskFilter(deadline=get_today(zone)), page=page)
 
     if not tasks_data:
         await callback.answer(NO_TASKS, show_alert=True)
         return
 
-    text = get_tasks_list(tasks_data)
+    text = get_tasks_list(tasks_data, zone)
     keyboard = get_tasks_list_keyboard(
         tasks_data,
         page,
-        has_next_page is not None,
-        has_prev_page is not None,
+        has_next,
+        has_previous,
         "today_tasks",
     )
 
@@ -69,7 +91,11 @@ async def my_tasks_handler(callback: CallbackQuery):
 
 
 @router.callback_query(F.data.startswith("active_tasks"))
-async def active_tasks_handler(callback: CallbackQuery):
+async def active_tasks_handler(
+    callback: CallbackQuery,
+    http_client: HttpClient,
+    timezones: TimezoneService,
+):
     page = (
         int(callback.data.split("_")[-1])
         if callback.data != "active_tasks"
@@ -77,20 +103,21 @@ async def active_tasks_handler(callback: CallbackQuery):
     )
 
     user = User.from_callback(callback)
-    tasks_data, has_next_page, has_prev_page = await TaskRepository(
-        user
-    ).get_user_active_tasks(page=page)
+    tasks_data, has_next, has_previous = await TaskRepository(
+        user, http_client
+    ).list_tasks(TaskFilter(is_active=True), page=page)
 
     if not tasks_data:
         await callback.answer(NO_TASKS, show_alert=True)
         return
 
-    text = get_tasks_list(tasks_data)
+    zone = await timezones.get_user_zone(user.user_id)
+    text = get_tasks_list(tasks_data, zone)
     keyboard = get_tasks_list_keyboard(
         tasks_data,
         page,
-        has_next_page is not None,
-        has_prev_page is not None,
+        has_next,
+        has_previous,
         "active_tasks",
     )
 
@@ -100,7 +127,11 @@ async def active_tasks_handler(callback: CallbackQuery):
 
 
 @router.callback_query(F.data.startswith("archive_tasks"))
-async def archive_tasks_handler(callback: CallbackQuery):
+async def archive_tasks_handler(
+    callback: CallbackQuery,
+    http_client: HttpClient,
+    timezones: TimezoneService,
+):
     page = (
         int(callback.data.split("_")[-1])
         if callback.data != "archive_tasks"
@@ -108,20 +139,21 @@ async def archive_tasks_handler(callback: CallbackQuery):
     )
 
     user = User.from_callback(callback)
-    tasks_data, has_next_page, has_prev_page = await TaskRepository(
-        user
-    ).get_user_not_active_tasks(page=page)
+    tasks_data, has_next, has_previous = await TaskRepository(
+        user, http_client
+    ).list_tasks(TaskFilter(is_active=False), page=page)
 
     if not tasks_data:
         await callback.answer(NO_TASKS, show_alert=True)
         return
 
-    text = get_tasks_list(tasks_data)
+    zone = await timezones.get_user_zone(user.user_id)
+    text = get_tasks_list(tasks_data, zone)
     keyboard = get_tasks_list_keyboard(
         tasks_data,
         page,
-        has_next_page is not None,
-        has_prev_page is not None,
+        has_next,
+        has_previous,
         "archive_tasks",
     )
 
@@ -132,49 +164,166 @@ async def archive_tasks_handler(callback: CallbackQuery):
 
 @router.callback_query(TaskCallback.filter(F.action == "details"))
 async def detail_task_handler(
-    callback: CallbackQuery, callback_data: TaskCallback
+    callback: CallbackQuery,
+    callback_data: TaskCallback,
+    http_client: HttpClient,
+    timezones: TimezoneService,
 ):
     task_id = callback_data.task_id
     user = User.from_callback(callback)
     try:
-        task = await TaskRepository(user).get_detail_task(task_id)
-        text = get_detail_task(task)
+        task = await TaskRepository(user, http_client).get_detail_task(task_id)
+        zone = await timezones.get_user_zone(user.user_id)
+        text = get_detail_task(task, zone)
         keyboard = get_task_detail_keyboard(task)
         await callback.message.answer(
             text, parse_mode="HTML", reply_markup=keyboard
         )
     except ServerException as e:
+        count_server_error(e)
         await callback.message.answer(e.message, show_alert=True)
 
 
 @router.callback_query(TaskCallback.filter(F.action == "complete_task"))
 async def complete_task_handler(
-    callback: CallbackQuery, callback_data: TaskCallback
+    callback: CallbackQuery,
+    callback_data: TaskCallback,
+    task_outbox: TaskOutbox,
 ):
     task_id = callback_data.task_id
     user = User.from_callback(callback)
     try:
-        await TaskRepository(user).complete_task(task_id)
-        keyboard = get_back_keyboard()
-        await callback.message.answer(TASK_COMPLETED, reply_markup=keyboard)
+        result = await task_outbox.submit(user, "complete", task_id=task_id)
+        text = (
+            TASK_COMPLETED
+            if result is OutboxResultEnum.DONE
+            else OUTBOX_QUEUED[result]
+        )
+        await callback.message.answer(text, reply_markup=get_back_keyboard())
     except ServerException as e:
+        count_server_error(e)
         await callback.message.answer(e.message, show_alert=True)
 
 
 @router.callback_query(TaskCallback.filter(F.action == "delete_task"))
 async def delete_task_handler(
-    callback: CallbackQuery, callback_data: TaskCallback
+    callback: CallbackQuery,
+    callback_data: TaskCallback,
+    task_outbox: TaskOutbox,
 ):
     task_id = callback_data.task_id
     user = User.from_callback(callback)
     try:
-        await TaskRepository(user).delete_task(task_id)
-        keyboard = get_back_keyboard()
-        await callback.message.answer(TASK_DELETED, reply_markup=keyboard)
+        result = await task_outbox.submit(user, "delete", task_id=task_id)
+        text = (
+            TASK_DELETED
+            if result is OutboxResultEnum.DONE
+            else OUTBOX_QUEUED[result]
+        )
+        await callback.message.answer(text, reply_markup=get_back_keyboard())
     except ServerException as e:
+        count_server_error(e)
         await callback.message.answer(e.message, show_alert=True)
 
 
+def get_list_filter(list_name: str, zone) -> TaskFilter:
+    match list_name:
+        case "today_tasks":
+            return TaskFilter(deadline=get_today(zone))
+        case "archive_tasks":
+            return TaskFilter(is_active=False)
+        case _:
+            return TaskFilter(is_active=True)
+
+
+@router.callback_query(
+    TaskBulkCallback.filter(F.action == TaskBulkActionEnum.START)
+)
+async def bulk_start_handler(
+    callback: CallbackQuery,
+    callback_data: TaskBulkCallback,
+    http_client: HttpClient,
+    timezones: TimezoneService,
+):
+    user = User.from_callback(callback)
+    zone = await timezones.get_user_zone(user.user_id)
+    # та же страница, что уже показана, обычно берётся из кеша списка
+    tasks_data, _, _ = await TaskRepository(user, http_client).list_tasks(
+        get_list_filter(callback_data.list_name, zone),
+        page=callback_data.page,
+    )
+    if not tasks_data:
+        await callback.answer(NO_TASKS, show_alert=True)
+        return
+
+    # текст списка не меняется, меняется только клавиатура
+    await callback.message.edit_reply_markup(
+        reply_markup=get_bulk_tasks_keyboard(
+            tasks_data, callback_data.list_name, callback_data.page
+        )
+    )
+    await callback.answer(BULK_HINT)
+
+
+@router.callback_query(
+    TaskBulkCallback.filter(F.action == TaskBulkActionEnum.TOGGLE)
+)
+async def bulk_toggle_handler(
+    callback: CallbackQuery, callback_data: TaskBulkCallback
+):
+    await callback.message.edit_reply_markup(
+        reply_markup=toggle_bulk_task(
+            callback.message.reply_markup, callback_data
+        )
+    )
+
+
+@router.callback_query(
+    TaskBulkCallback.filter(
+        F.action.in_({TaskBulkActionEnum.COMPLETE, TaskBulkActionEnum.DELETE})
+    )
+)
+async def bulk_action_handler(
+    callback: CallbackQuery,
+    callback_data: TaskBulkCallback,
+    http_client: HttpClient,
+    timezones: TimezoneService,
+):
+    selected = get_bulk_selection(callback.message.reply_markup)
+    if not selected:
+        await callback.answer(BULK_NOTHING_SELECTED, show_alert=True)
+        return
+
+    user = User.from_callback(callback)
+    zone = await timezones.get_user_zone(user.user_id)
+    repository = TaskRepository(user, http_client)
+    # в клавиатуре номера задач на странице: id берутся из той же
+    # страницы, и если она с тех пор сдвинулась, ничего не делается
+    tasks_data, _, _ = await repository.list_tasks(
+        get_list_filter(callback_data.list_name, zone),
+        page=callback_data.page,
+    )
+    titles = {}
+    for index, title in selected.items():
+        if index >= len(tasks_data) or tasks_data[index].title != title:
+            await callback.answer(BULK_STALE, show_alert=True)
+            return
+        titles[tasks_data[index].id] = title
+
+    if callback_data.action == TaskBulkActionEnum.COMPLETE:
+        results = await repository.complete_tasks(list(titles))
+        template = BULK_COMPLETED
+    else:
+        results = await repository.delete_tasks(list(titles))
+        template = BULK_DELETED
+
+    await callback.message.edit_text(
+        get_batch_summary(template, results, titles),
+        reply_markup=get_back_keyboard(),
+        parse_mode="HTML",
+    )
+
+
 @router.callback_query(F.data == "create_task")
 async def create_task_handler(
     callback: CallbackQuery, dialog_manager: DialogManager
@@ -189,12 +338,13 @@ async def update_task_handler(
     callback: CallbackQuery,
     callback_data: TaskCallback,
     dialog_manager: DialogManager,
+    http_client: HttpClient,
 ):
     task_id = callback_data.task_id
     user = User.from_callback(callback)
-    task = await TaskRepository(user).get_detail_task(task_id)
+    task = await TaskRepository(user, http_client).get_detail_task(task_id)
     await dialog_manager.start(
         TaskUpdateStates.CATEGORY,
-        data={"task_id": task_id, "task_data": task},
+        data={"task_id": task_id, "deadline": task.deadline.isoformat()},
         mode=StartMode.RESET_STACK,
     )
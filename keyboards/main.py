@@ -1,8 +1,8 @@
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
-
-def get_main_keyboard():
-    buttons = [
+# клавиатура не зависит от пользователя, поэтому строится один раз
+MAIN_KEYBOARD = InlineKeyboardMarkup(
+    inline_keyboard=[
         [
             InlineKeyboardButton(
                 text="📝 Посмотреть мои задачи", callback_data="all_tasks"
@@ -17,4 +17,8 @@ def get_main_keyboard():
             ),
         ],
     ]
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
+)
+
+
+def get_main_keyboard():
+    return MAIN_KEYBOARD
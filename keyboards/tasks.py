@@ -1,31 +1,54 @@
-from typing import Iterable
+from functools import lru_cache
+from typing import Collection, Iterable
 
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
-from callbacks.factory import TaskCallback
-from enums.tasks import TaskStatusEnum
+from callbacks.factory import TaskBulkCallback, TaskCallback
+from enums.tasks import TaskBulkActionEnum, TaskStatusEnum
 from schemas.tasks import TaskSchema, TaskShortSchema
 
+# Статичные клавиатуры и строки кнопок строятся один раз при импорте,
+# строки с задачами и пагинацией запоминаются. Разметки общие для всех
+# вызовов, поэтому их нельзя изменять после получения.
 
-def get_tasks_list_keyboard(
-    tasks: Iterable[TaskShortSchema],
-    current_page: int,
-    has_next: bool,
-    has_previous: bool,
-    callback_data: str,
-):
-    buttons = []
-    for task in tasks:
-        task_button = [
+BACK_ROW = (
+    InlineKeyboardButton(
+        text="🔙 Назад к списку задач", callback_data="all_tasks"
+    ),
+)
+
+BACK_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[BACK_ROW])
+
+TASK_TYPE_CHOOSE_KEYBOARD = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [
             InlineKeyboardButton(
-                text=f"📄 Подробности о {task.title}",  # Добавлен смайлик
-                callback_data=TaskCallback(
-                    action="details", task_id=task.id
-                ).pack(),
-            )
+                text="📋 Активные", callback_data="active_tasks"
+            ),  # Добавлен смайлик
+            InlineKeyboardButton(
+                text="📁 Завершенные", callback_data="archive_tasks"
+            ),  # Добавлен смайлик
         ]
-        buttons.append(task_button)
+    ]
+)
+
+
+@lru_cache(maxsize=10_000)
+def get_task_row(task_id: str, title: str) -> tuple[InlineKeyboardButton]:
+    return (
+        InlineKeyboardButton(
+            text=f"📄 Подробности о {title}",  # Добавлен смайлик
+            callback_data=TaskCallback(
+                action="details", task_id=task_id
+            ).pack(),
+        ),
+    )
+
 
+@lru_cache(maxsize=1024)
+def get_pagination_row(
+    callback_data: str, current_page: int, has_next: bool, has_previous: bool
+) -> tuple[InlineKeyboardButton, ...]:
     pagination_buttons = []
     if has_previous:
         pagination_buttons.append(
@@ -41,91 +64,200 @@ def get_tasks_list_keyboard(
                 callback_data=f"{callback_data}_{current_page + 1}",
             )
         )
+    return tuple(pagination_buttons)
 
-    if pagination_buttons:
-        buttons.append(pagination_buttons)
-    buttons.append(
-        [
+
+def get_tasks_list_keyboard(
+    tasks: Iterable[TaskShortSchema],
+    current_page: int,
+    has_next: bool,
+    has_previous: bool,
+    callback_data: str,
+):
+    buttons = [get_task_row(task.id, task.title) for task in tasks]
+    pagination_row = get_pagination_row(
+        callback_data, current_page, has_next, has_previous
+    )
+    if pagination_row:
+        buttons.append(pagination_row)
+    buttons.append(get_bulk_start_row(callback_data, current_page))
+    buttons.append(BACK_ROW)
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+# Режим выбора нескольких задач. Выбор хранится в самой клавиатуре
+# сообщения (отметка в тексте кнопки), поэтому переключение задачи
+# не ходит ни в бэкенд, ни в хранилище FSM. Кнопки ссылаются на задачи
+# по номеру на странице, id берутся из страницы при выполнении действия.
+
+UNSELECTED_MARK = "⬜ "
+SELECTED_MARK = "☑️ "
+
+
+@lru_cache(maxsize=1024)
+def get_bulk_start_row(
+    list_name: str, page: int
+) -> tuple[InlineKeyboardButton]:
+    return (
+        InlineKeyboardButton(
+            text="☑️ Выбрать несколько",
+            callback_data=TaskBulkCallback(
+                action=TaskBulkActionEnum.START, list_name=list_name, page=page
+            ).pack(),
+        ),
+    )
+
+
+@lru_cache(maxsize=10_000)
+def get_bulk_task_row(
+    index: int, title: str, list_name: str, page: int, selected: bool
+) -> tuple[InlineKeyboardButton]:
+    return (
+        InlineKeyboardButton(
+            text=(SELECTED_MARK if selected else UNSELECTED_MARK) + title,
+            callback_data=TaskBulkCallback(
+                action=TaskBulkActionEnum.TOGGLE,
+                list_name=list_name,
+                page=page,
+                index=index,
+            ).pack(),
+        ),
+    )
+
+
+@lru_cache(maxsize=1024)
+def get_bulk_action_rows(
+    list_name: str, page: int, can_complete: bool
+) -> tuple[tuple[InlineKeyboardButton, ...], ...]:
+    actions = []
+    if can_complete:
+        actions.append(
             InlineKeyboardButton(
-                text="🔙 Назад к списку задач", callback_data="all_tasks"
+                text="✅ Завершить выбранные",
+                callback_data=TaskBulkCallback(
+                    action=TaskBulkActionEnum.COMPLETE,
+                    list_name=list_name,
+                    page=page,
+                ).pack(),
             )
-        ]
+        )
+    actions.append(
+        InlineKeyboardButton(
+            text="🗑️ Удалить выбранные",
+            callback_data=TaskBulkCallback(
+                action=TaskBulkActionEnum.DELETE,
+                list_name=list_name,
+                page=page,
+            ).pack(),
+        )
     )
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
+    cancel = InlineKeyboardButton(
+        text="❌ Отмена", callback_data=f"{list_name}_{page}"
+    )
+    return tuple(actions), (cancel,)
 
 
-def get_task_type_choose_keyboard():
+def get_bulk_tasks_keyboard(
+    tasks: Iterable[TaskShortSchema],
+    list_name: str,
+    page: int,
+    selected: Collection[int] = (),
+) -> InlineKeyboardMarkup:
     buttons = [
-        [
-            InlineKeyboardButton(
-                text="📋 Активные", callback_data="active_tasks"
-            ),  # Добавлен смайлик
-            InlineKeyboardButton(
-                text="📁 Завершенные", callback_data="archive_tasks"
-            ),  # Добавлен смайлик
-        ]
+        get_bulk_task_row(
+            index, task.title, list_name, page, index in selected
+        )
+        for index, task in enumerate(tasks)
     ]
+    buttons.extend(
+        get_bulk_action_rows(list_name, page, list_name != "archive_tasks")
+    )
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
-def get_task_detail_keyboard(task: TaskSchema):
+def _get_bulk_button_title(button: InlineKeyboardButton) -> str:
+    return button.text.removeprefix(SELECTED_MARK).removeprefix(
+        UNSELECTED_MARK
+    )
+
+
+def toggle_bulk_task(
+    markup: InlineKeyboardMarkup, callback_data: TaskBulkCallback
+) -> InlineKeyboardMarkup:
+    """Клавиатура сообщения с переключённой отметкой одной задачи."""
+
+    packed = callback_data.pack()
     buttons = []
+    for row in markup.inline_keyboard:
+        if row[0].callback_data == packed:
+            row = get_bulk_task_row(
+                callback_data.index,
+                _get_bulk_button_title(row[0]),
+                callback_data.list_name,
+                callback_data.page,
+                not row[0].text.startswith(SELECTED_MARK),
+            )
+        buttons.append(row)
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def get_bulk_selection(markup: InlineKeyboardMarkup) -> dict[int, str]:
+    """Отмеченные в клавиатуре задачи: номер на странице -> заголовок."""
+
+    selected = {}
+    for row in markup.inline_keyboard:
+        button = row[0]
+        if button.text.startswith(SELECTED_MARK) and button.callback_data:
+            index = TaskBulkCallback.unpack(button.callback_data).index
+            selected[index] = _get_bulk_button_title(button)
+    return selected
+
 
-    if task.status != TaskStatusEnum.DONE:
-        buttons.append(
-            [
-                InlineKeyboardButton(
-                    text="✅ Завершить задачу",
-                    callback_data=TaskCallback(
-                        action="complete_task", task_id=task.id
-                    ).pack(),
-                ),
-                InlineKeyboardButton(
-                    text="✏️ Редактировать задачу",
-                    callback_data=TaskCallback(
-                        action="update_task", task_id=task.id
-                    ).pack(),
-                ),
-            ]
+def get_task_type_choose_keyboard():
+    return TASK_TYPE_CHOOSE_KEYBOARD
+
+
+def get_task_detail_keyboard(task: TaskSchema):
+    return _get_task_detail_keyboard(
+        task.id, task.status != TaskStatusEnum.DONE
+    )
+
+
+@lru_cache(maxsize=10_000)
+def _get_task_detail_keyboard(
+    task_id: str, can_complete: bool
+) -> InlineKeyboardMarkup:
+    update_button = InlineKeyboardButton(
+        text="✏️ Редактировать задачу",
+        callback_data=TaskCallback(
+            action="update_task", task_id=task_id
+        ).pack(),
+    )
+    if can_complete:
+        complete_button = InlineKeyboardButton(
+            text="✅ Завершить задачу",
+            callback_data=TaskCallback(
+                action="complete_task", task_id=task_id
+            ).pack(),
         )
+        first_row = [complete_button, update_button]
     else:
-        buttons.append(
-            [
-                InlineKeyboardButton(
-                    text="✏️ Редактировать задачу",
-                    callback_data=TaskCallback(
-                        action="update_task", task_id=task.id
-                    ).pack(),
-                )
-            ]
-        )
+        first_row = [update_button]
 
-    buttons.append(
+    buttons = [
+        first_row,
         [
             InlineKeyboardButton(
                 text="🗑️ Удалить задачу",
                 callback_data=TaskCallback(
-                    action="delete_task", task_id=task.id
+                    action="delete_task", task_id=task_id
                 ).pack(),
             )
-        ]
-    )
-    buttons.append(
-        [
-            InlineKeyboardButton(
-                text="🔙 Назад к списку задач", callback_data="all_tasks"
-            )
-        ]
-    )
+        ],
+        BACK_ROW,
+    ]
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
 def get_back_keyboard():
-    buttons = [
-        [
-            InlineKeyboardButton(
-                text="🔙 Назад к списку задач", callback_data="all_tasks"
-            )
-        ]
-    ]
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
+    return BACK_KEYBOARD
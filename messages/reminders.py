@@ -0,0 +1,2 @@
+REMINDER_DUE_SOON = "⏰ Скоро дедлайн задачи «{title}»: {deadline}"
+REMINDER_OVERDUE = "⚠️ Задача «{title}» просрочена, дедлайн был {deadline}"
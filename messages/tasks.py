@@ -1,3 +1,5 @@
+from enums.outbox import OutboxResultEnum
+
 NO_TASKS = "У вас нет задач"
 TASK_TYPE_CHOOSE = (
     "Выберите, какие задачи вы хотите посмотреть: выполненные или активные?"
@@ -10,3 +12,24 @@ TASK_CREATED = (
     "ней"
 )
 TASK_UPDATED = "Задача была успешно обновлена!"
+BULK_HINT = "Отметьте задачи и выберите действие"
+BULK_NOTHING_SELECTED = "Сначала отметьте задачи"
+BULK_STALE = "Список задач изменился, откройте его заново"
+BULK_COMPLETED = "Завершено задач: {done} из {total}."
+BULK_DELETED = "Удалено задач: {done} из {total}."
+BULK_FAILED_ITEM = "• <b>{title}</b>: {error}"
+OUTBOX_QUEUED = {
+    OutboxResultEnum.QUEUED: (
+        "Сервер сейчас недоступен. Изменение сохранено и будет отправлено "
+        "автоматически, как только сервер заработает"
+    ),
+    OutboxResultEnum.QUEUED_BEHIND: (
+        "Изменение сохранено и будет отправлено сразу после предыдущих, "
+        "ещё не отправленных изменений"
+    ),
+}
+OUTBOX_FAILED = {
+    "create": "Не удалось создать отложенную задачу <b>{title}</b>: {error}",
+    "complete": "Не удалось завершить задачу: {error}",
+    "delete": "Не удалось удалить задачу: {error}",
+}
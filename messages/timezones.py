@@ -0,0 +1,5 @@
+TIMEZONE_CURRENT = (
+    "Ваш часовой пояс: {timezone}. Чтобы сменить его, отправьте "
+    "/timezone <пояс>, например /timezone Europe/Moscow"
+)
+TIMEZONE_UPDATED = "Часовой пояс изменён на {timezone}"
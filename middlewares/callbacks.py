@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramAPIError
+from aiogram.methods import (
+    AnswerCallbackQuery,
+    Response,
+    SendMessage,
+    TelegramMethod,
+)
+from aiogram.methods.base import TelegramType
+from aiogram.types import CallbackQuery, TelegramObject
+
+from utils.metrics import callback_ack_latency
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CallbackAck:
+    callback_id: str
+    chat_id: int | None = None
+    answered: bool = False
+    # кто ответил: handler, early, deadline, finished или unchanged
+    source: str = "handler"
+    started: float = field(default_factory=time.perf_counter)
+
+
+# нажатие, которое сейчас обрабатывается
+current_ack: ContextVar[CallbackAck | None] = ContextVar(
+    "current_ack", default=None
+)
+
+
+class CallbackAckMiddleware(BaseMiddleware):
+    def __init__(self, deadline: float = 0.3):
+        """Ранний ответ на нажатия кнопок, чтобы клиент Telegram не
+        показывал загрузку, пока обработчик ждёт бэкенд.
+
+        Если обработчик сам не ответил за deadline секунд, отвечает
+        middleware (без текста), а после завершения обработчика - сразу.
+        При deadline <= 0 ответ уходит до вызова обработчика. Alert
+        обработчика, опоздавший к уже отвеченному нажатию, отправляется
+        в чат сообщением (см. AnswerTrackingMiddleware).
+
+        Если обработчик упал, middleware не отвечает: ответ (alert с
+        ошибкой) даёт обработчик ошибок диспетчера, который вызывается
+        уже после выхода из middleware. Контекст нажатия для него
+        остаётся, поэтому при уже отправленном раннем ответе alert уйдёт
+        сообщением, а не вторым answerCallbackQuery.
+
+        Регистрируется как outer middleware на dispatcher.callback_query.
+        """
+
+        self._deadline = deadline
+
+    async def _acknowledge_later(self, bot: "Bot") -> None:
+        await asyncio.sleep(self._deadline)
+        await acknowledge(bot, "deadline")
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: CallbackQuery,
+        data: dict[str, Any],
+    ) -> Any:
+        ack = CallbackAck(
+            event.id, event.message.chat.id if event.message else None
+        )
+        token = current_ack.set(ack)
+        bot = data["bot"]
+        timer = None
+        failed = False
+        try:
+            if self._deadline <= 0:
+                await acknowledge(bot, "early")
+            else:
+                timer = asyncio.create_task(self._acknowledge_later(bot))
+            return await handler(event, data)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            if timer is not None:
+                if ack.source == "deadline":
+                    # ответ по таймеру уже отправляется
+                    await asyncio.gather(timer, return_exceptions=True)
+                else:
+                    timer.cancel()
+            if not failed:
+                await acknowledge(bot, "finished")
+                current_ack.reset(token)
+
+
+class AnswerTrackingMiddleware(BaseRequestMiddleware):
+    """Пропускает повторный ответ на уже отвеченное нажатие: Telegram
+    принимает только первый, на второй вернёт ошибку. Опоздавший alert
+    (например, с ошибкой) отправляется в чат сообщением.
+    Для первого ответа записывается время от начала обработки."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        ack = current_ack.get()
+        if (
+            ack is None
+            or not isinstance(method, AnswerCallbackQuery)
+            or method.callback_query_id != ack.callback_id
+        ):
+            return await make_request(bot, method)
+        if ack.answered:
+            if method.show_alert and method.text and ack.chat_id:
+                await bot(SendMessage(chat_id=ack.chat_id, text=method.text))
+            return True
+        ack.answered = True
+        result = await make_request(bot, method)
+        callback_ack_latency.labels(ack.source).observe(
+            time.perf_counter() - ack.started
+        )
+        return result
+
+
+async def acknowledge(bot: "Bot", source: str) -> None:
+    """Отвечает без текста на обрабатываемое нажатие, если на него ещё
+    не ответили. Ошибка ответа (например, нажатие устарело) только
+    логируется: обработку она не прерывает."""
+
+    ack = current_ack.get()
+    if ack is None or ack.answered:
+        return
+    ack.source = source
+    try:
+        await bot(AnswerCallbackQuery(callback_query_id=ack.callback_id))
+    except TelegramAPIError as e:
+        logger.debug("Не удалось ответить на нажатие %s: %s", ack, e)
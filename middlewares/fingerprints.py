@@ -0,0 +1,177 @@
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import (
+    DeleteMessage,
+    EditMessageCaption,
+    EditMessageMedia,
+    EditMessageReplyMarkup,
+    EditMessageText,
+    Response,
+    SendMessage,
+    TelegramMethod,
+)
+from aiogram.methods.base import TelegramType
+from aiogram.types import Chat, InlineKeyboardMarkup, Message
+
+from middlewares.callbacks import acknowledge
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+
+@dataclass
+class FingerprintStats:
+    skipped: int = 0
+    edited: int = 0
+
+
+@dataclass
+class _Rendered:
+    # None, если текст неизвестен (была изменена только клавиатура)
+    text: bytes | None
+    markup: bytes
+    chat: Chat
+    date: datetime
+
+
+def _digest(value: str) -> bytes:
+    return hashlib.blake2b(value.encode(), digest_size=16).digest()
+
+
+def get_text_fingerprint(method: SendMessage | EditMessageText) -> bytes:
+    entities = ",".join(
+        entity.model_dump_json(exclude_none=True)
+        for entity in method.entities or ()
+    )
+    return _digest(
+        f"{method.text}\0{method.parse_mode!r}\0{entities}\0"
+        f"{method.link_preview_options!r}"
+    )
+
+
+def get_markup_fingerprint(markup) -> bytes:
+    # edit без клавиатуры убирает инлайн клавиатуру
+    if not isinstance(markup, InlineKeyboardMarkup):
+        return b""
+    return _digest(markup.model_dump_json(exclude_none=True))
+
+
+class EditDeduplicationMiddleware(BaseRequestMiddleware):
+    def __init__(self, max_size: int = 10_000):
+        """Пропускает editMessageText и editMessageReplyMarkup, которые
+        не меняют сообщение.
+
+        Для каждого (чат, сообщение) запоминается отпечаток текста и
+        клавиатуры, с которыми сообщение последний раз отправлено или
+        изменено. Если новое изменение совпадает с ним, запрос в Telegram
+        не уходит (он вернул бы "message is not modified"), вызывающему
+        возвращается сообщение, собранное из запроса, а нажатие, в ответ
+        на которое шло изменение, сразу получает ответ. Сообщения,
+        изменённые иначе (подпись, медиа) или удалённые, забываются.
+        Хранится не больше max_size сообщений, давно не менявшиеся
+        вытесняются первыми.
+
+        Подключается к сессии до OutboundRateLimiter, чтобы пропущенные
+        изменения не расходовали лимит.
+        """
+
+        self._max_size = max_size
+        self._messages: OrderedDict[tuple[str, int], _Rendered] = OrderedDict()
+        self.stats = FingerprintStats()
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def _remember(
+        self,
+        key: tuple[str, int],
+        text: bytes | None,
+        markup: bytes,
+        chat: Chat,
+        date: datetime,
+    ) -> None:
+        self._messages[key] = _Rendered(text, markup, chat, date)
+        self._messages.move_to_end(key)
+        if len(self._messages) > self._max_size:
+            self._messages.popitem(last=False)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if isinstance(method, SendMessage):
+            result = await make_request(bot, method)
+            self._remember(
+                (str(result.chat.id), result.message_id),
+                get_text_fingerprint(method),
+                get_markup_fingerprint(method.reply_markup),
+                result.chat,
+                result.date,
+            )
+            return result
+        if isinstance(method, (EditMessageText, EditMessageReplyMarkup)):
+            if method.chat_id is None or method.message_id is None:
+                return await make_request(bot, method)
+            return await self._edit(make_request, bot, method)
+        if isinstance(
+            method, (DeleteMessage, EditMessageCaption, EditMessageMedia)
+        ):
+            if method.chat_id is not None:
+                self._messages.pop(
+                    (str(method.chat_id), method.message_id), None
+                )
+        return await make_request(bot, method)
+
+    async def _edit(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: EditMessageText | EditMessageReplyMarkup,
+    ) -> Response[TelegramType]:
+        key = (str(method.chat_id), method.message_id)
+        rendered = self._messages.get(key)
+        is_text = isinstance(method, EditMessageText)
+        text = get_text_fingerprint(method) if is_text else None
+        markup = get_markup_fingerprint(method.reply_markup)
+        if (
+            rendered is not None
+            and rendered.markup == markup
+            and (not is_text or rendered.text == text)
+        ):
+            self._messages.move_to_end(key)
+            self.stats.skipped += 1
+            await acknowledge(bot, "unchanged")
+            return Message(
+                message_id=method.message_id,
+                date=rendered.date,
+                chat=rendered.chat,
+                text=method.text if is_text else None,
+                reply_markup=method.reply_markup,
+            ).as_(bot)
+
+        if not is_text and rendered is not None:
+            text = rendered.text
+        try:
+            result = await make_request(bot, method)
+        except TelegramBadRequest as e:
+            # состояние сообщения неизвестно, кроме случая, когда оно
+            # уже такое, как в запросе
+            self._messages.pop(key, None)
+            if "message is not modified" in e.message and rendered is not None:
+                self._remember(key, text, markup, rendered.chat, rendered.date)
+            raise
+        self.stats.edited += 1
+        if isinstance(result, Message):
+            self._remember(key, text, markup, result.chat, result.date)
+        return result
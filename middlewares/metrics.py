@@ -0,0 +1,69 @@
+import re
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import CallbackQuery, Message, TelegramObject
+from aiogram_dialog.utils import CB_SEP
+
+from utils.metrics import handler_errors, handler_latency
+
+# части callback data с цифрами (id задач, номера страниц) в метки не
+# попадают, иначе число рядов метрик будет расти без ограничений
+_VARIABLE_PART = re.compile(r"[_:]?[^_:]*\d[^_:]*")
+
+
+def get_callback_prefix(data: str | None) -> str:
+    """Постоянная часть callback data: today_tasks_3 -> today_tasks,
+    task:details:42 -> task:details. У кнопок диалогов отбрасывается
+    id контекста диалога."""
+
+    if not data:
+        return ""
+    _, _, data = data.rpartition(CB_SEP)
+    return ":".join(_VARIABLE_PART.sub("", data).split(":")[:2])
+
+
+def get_event_prefix(event: TelegramObject) -> str:
+    match event:
+        case CallbackQuery():
+            return get_callback_prefix(event.data)
+        case Message(text=str(text)) if text.startswith("/"):
+            return text.split(maxsplit=1)[0].split("@")[0]
+        case Message():
+            return "message"
+    return type(event).__name__
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """Время работы и исключения обработчиков по модулю роутера,
+    обработчику и префиксу callback data или команде.
+
+    Регистрируется внутренним middleware на диспетчере и поэтому
+    действует во всех вложенных роутерах, включая диалоги.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        handler_object: HandlerObject | None = data.get("handler")
+        callback = handler_object.callback if handler_object else handler
+        labels = (
+            getattr(callback, "__module__", None) or "",
+            getattr(callback, "__qualname__", None) or "",
+            get_event_prefix(event),
+        )
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            handler_errors.labels(*labels, type(e).__name__).inc()
+            raise
+        finally:
+            handler_latency.labels(*labels).observe(
+                time.perf_counter() - started
+            )
@@ -0,0 +1,197 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import TYPE_CHECKING, Iterator
+
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from utils.rate_limit import TokenBucket
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+logger = logging.getLogger(__name__)
+
+
+class Lane(IntEnum):
+    """Полосы исходящей очереди: меньшее значение уходит раньше."""
+
+    INTERACTIVE = 0
+    BULK = 1
+
+
+_lane: ContextVar[Lane] = ContextVar("outbound_lane", default=Lane.INTERACTIVE)
+
+
+@contextmanager
+def bulk_sending() -> Iterator[None]:
+    """Вызовы бота внутри блока идут в полосе массовых рассылок и
+    пропускают вперёд ответы пользователям."""
+
+    token = _lane.set(Lane.BULK)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+@dataclass
+class OutboundStats:
+    waiting: dict[Lane, int] = field(
+        default_factory=lambda: {lane: 0 for lane in Lane}
+    )
+    sent: int = 0
+    retried: int = 0
+    dropped: int = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(self.waiting.values())
+
+
+class _ChatState:
+    __slots__ = ("bucket", "lock")
+
+    def __init__(self, rate: float, capacity: float):
+        self.bucket = TokenBucket(rate, capacity)
+        # asyncio.Lock пропускает ожидающих по порядку, поэтому
+        # сообщения в один чат уходят в порядке вызовов
+        self.lock = asyncio.Lock()
+
+
+class OutboundRateLimiter(BaseRequestMiddleware):
+    def __init__(
+        self,
+        *,
+        global_rate: float = 30,
+        chat_rate: float = 1,
+        chat_burst: float = 3,
+        group_rate: float = 20 / 60,
+        max_retries: int = 3,
+        max_chats: int = 10_000,
+    ):
+        """Исходящая очередь перед Bot API.
+
+        Вызовы с chat_id (sendMessage, editMessageText и т.п.) проходят
+        через token bucket своего чата и общий bucket бота, остальные
+        (answerCallbackQuery, getUpdates) идут без ограничений. Общие
+        токены выдаются по приоритету полос: ответы пользователям раньше
+        массовых рассылок (см. bulk_sending). На 429 чат ставится на
+        паузу по retry_after, и запрос повторяется до max_retries раз.
+
+        Подключается к сессии: bot.session.middleware(limiter).
+        """
+
+        # без запаса на всплеск: иначе в первую секунду уйдёт вдвое
+        # больше лимита
+        self._global = TokenBucket(global_rate, 1)
+        self._chat_rate = chat_rate
+        self._chat_burst = chat_burst
+        self._group_rate = group_rate
+        self._max_retries = max_retries
+        self._max_chats = max_chats
+        self._chats: OrderedDict[int | str, _ChatState] = OrderedDict()
+        self._waiters: list[tuple[Lane, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._pump: asyncio.Task | None = None
+        self.stats = OutboundStats()
+
+    def _get_chat(self, chat_id: int | str) -> _ChatState:
+        state = self._chats.get(chat_id)
+        if state is None:
+            # группы и каналы: отрицательный id или @username
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            rate = self._group_rate if is_group else self._chat_rate
+            state = self._chats[chat_id] = _ChatState(rate, self._chat_burst)
+            self._evict()
+        self._chats.move_to_end(chat_id)
+        return state
+
+    def _evict(self) -> None:
+        if len(self._chats) <= self._max_chats:
+            return
+        for chat_id, state in list(self._chats.items()):
+            if len(self._chats) <= self._max_chats:
+                break
+            # состояние чата без ожидающих и с полным bucket ничего
+            # не ограничивает, его можно забыть
+            if not state.lock.locked() and state.bucket.is_full:
+                del self._chats[chat_id]
+
+    async def _acquire_global(self, lane: Lane) -> None:
+        if not self._waiters and self._global.try_take():
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (lane, next(self._sequence), future))
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._pump_tokens())
+        await future
+
+    async def _pump_tokens(self) -> None:
+        while self._waiters:
+            delay = self._global.delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                # ожидающий отменён, токен достанется следующему
+                continue
+            self._global.take()
+            future.set_result(None)
+
+    async def _acquire(self, chat: _ChatState, lane: Lane) -> None:
+        async with chat.lock:
+            while (delay := chat.bucket.delay()) > 0:
+                await asyncio.sleep(delay)
+            chat.bucket.take()
+            await self._acquire_global(lane)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        chat = self._get_chat(chat_id)
+        lane = _lane.get()
+        attempt = 0
+        while True:
+            self.stats.waiting[lane] += 1
+            try:
+                await self._acquire(chat, lane)
+            finally:
+                self.stats.waiting[lane] -= 1
+            try:
+                response = await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                chat.bucket.pause(e.retry_after)
+                attempt += 1
+                if attempt > self._max_retries:
+                    self.stats.dropped += 1
+                    raise
+                self.stats.retried += 1
+                logger.warning(
+                    "429 от Telegram для чата %s, повтор через %s с",
+                    chat_id,
+                    e.retry_after,
+                )
+                continue
+            self.stats.sent += 1
+            return response
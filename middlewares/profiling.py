@@ -0,0 +1,154 @@
+import cProfile
+import io
+import logging
+import pstats
+import random
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update
+
+from middlewares.metrics import get_event_prefix
+from utils.profiling import UpdateTimings, current_timings, timed
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+
+class TelegramTimingMiddleware(BaseRequestMiddleware):
+    def __init__(self, kind: str = "telegram"):
+        """Считает время вызовов Bot API для профилируемого апдейта.
+
+        Регистрируется на сессии бота дважды: до OutboundRateLimiter
+        (kind="telegram", вместе с ожиданием лимита) и после него
+        (kind="telegram_network", только сам запрос).
+        """
+
+        self._kind = kind
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        with timed(self._kind):
+            return await make_request(bot, method)
+
+
+class ProfilingMiddleware(BaseMiddleware):
+    def __init__(
+        self,
+        *,
+        log_path: str,
+        sample_rate: float = 0.01,
+        slow_threshold: float = 1,
+        max_bytes: int = 10 * 1024 * 1024,
+        backups: int = 5,
+        top: int = 30,
+    ):
+        """Профилирование обработки апдейтов с записью в slow-log.
+
+        Для каждого апдейта считается, сколько времени ушло на ожидание
+        бэкенда, Telegram и на всё остальное (CPU: разбор ответов,
+        рендеринг, а также ожидание event loop). Апдейты медленнее
+        slow_threshold пишутся в лог с этой разбивкой. Доля sample_rate
+        апдейтов дополнительно профилируется cProfile и пишется в лог
+        всегда.
+
+        cProfile профилирует весь поток, поэтому одновременно
+        профилируется не больше одного апдейта, а в профиль попадают и
+        другие задачи event loop. Лог ротируется по размеру.
+        """
+
+        self._log_path = log_path
+        self._sample_rate = sample_rate
+        self._slow_threshold = slow_threshold
+        self._max_bytes = max_bytes
+        self._backups = backups
+        self._top = top
+        self._profiling = False
+        self._logger: logging.Logger | None = None
+
+    def _get_logger(self) -> logging.Logger:
+        if self._logger is None:
+            Path(self._log_path).parent.mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(
+                self._log_path,
+                maxBytes=self._max_bytes,
+                backupCount=self._backups,
+                encoding="utf-8",
+            )
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self._logger = logging.getLogger("slow_updates")
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+            self._logger.addHandler(handler)
+        return self._logger
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        profile = None
+        if not self._profiling and random.random() < self._sample_rate:
+            self._profiling = True
+            profile = cProfile.Profile()
+            profile.enable()
+        timings = UpdateTimings()
+        token = current_timings.set(timings)
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        try:
+            return await handler(event, data)
+        finally:
+            elapsed = time.perf_counter() - started
+            cpu = time.process_time() - cpu_started
+            current_timings.reset(token)
+            if profile is not None:
+                profile.disable()
+                self._profiling = False
+            if profile is not None or elapsed >= self._slow_threshold:
+                self._write(event, elapsed, cpu, timings, profile)
+
+    def _write(
+        self,
+        event: TelegramObject,
+        elapsed: float,
+        cpu: float,
+        timings: UpdateTimings,
+        profile: cProfile.Profile | None,
+    ) -> None:
+        if isinstance(event, Update):
+            name = (
+                f"update {event.update_id} {event.event_type} "
+                f"{get_event_prefix(event.event)}"
+            )
+        else:
+            name = type(event).__name__
+        other = max(elapsed - timings.backend - timings.telegram, 0)
+        lines = [
+            f"{name}: {elapsed:.3f} с",
+            f"  бэкенд {timings.backend:.3f} с, "
+            f"telegram {timings.telegram:.3f} с "
+            f"(из них запросы {timings.telegram_network:.3f} с), "
+            f"остальное {other:.3f} с, "
+            f"CPU процесса за это время {cpu:.3f} с",
+        ]
+        if profile is not None:
+            stream = io.StringIO()
+            stats = pstats.Stats(profile, stream=stream)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self._top)
+            lines.append(stream.getvalue())
+        self._get_logger().info("\n".join(lines))
@@ -0,0 +1,28 @@
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from utils.recording import UpdateRecorder
+
+
+class RecordingMiddleware(BaseMiddleware):
+    def __init__(self, recorder: UpdateRecorder):
+        """Пишет каждый входящий апдейт в запись для воспроизведения.
+        Ответы бэкенда пишет HttpClient с тем же recorder."""
+
+        self._recorder = recorder
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if isinstance(event, Update):
+            self._recorder.record_update(
+                event.model_dump(
+                    mode="json", exclude_unset=True, by_alias=True
+                )
+            )
+        return await handler(event, data)
@@ -0,0 +1,216 @@
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from config import Settings
+from repositories.responses import ApiResponse
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    # ошибки недоступности бэкенда кеша: пока они повторяются,
+    # ResponseCache работает без кеша
+    errors: tuple[type[Exception], ...] = ()
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    @abstractmethod
+    async def delete_prefix(self, prefix: str) -> None: ...
+
+    async def close(self) -> None:
+        return None
+
+
+class InMemoryCacheBackend(CacheBackend):
+    def __init__(self, max_size: int = 10_000):
+        """Кеш в памяти процесса с TTL на запись и LRU вытеснением."""
+
+        self._max_size = max_size
+        self._data: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    async def get(self, key: str) -> bytes | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._max_size:
+            self._data.popitem(last=False)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        for key in [key for key in self._data if key.startswith(prefix)]:
+            del self._data[key]
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    # запросы мимо кеша, пока бэкенд кеша недоступен
+    errors: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttls: dict[str, float],
+        retry_interval: float = 5,
+    ):
+        """Read-through кеш ответов бэкенда.
+
+        Ключ строится из пользователя, эндпоинта, URL и параметров запроса,
+        поэтому все записи пользователя можно сбросить одним префиксом.
+        Кешируются только успешные ответы эндпоинтов, для которых
+        задан TTL.
+
+        Ошибка бэкенда кеша (например, Redis недоступен) запросы не
+        ломает: она логируется, и следующие retry_interval секунд запросы
+        идут напрямую на бэкенд. Несделанные инвалидации запоминаются и
+        повторяются, а пока они не выполнены, кеш не читается, чтобы не
+        отдать устаревший ответ.
+
+        :param ttls: TTL в секундах для каждого эндпоинта
+        """
+
+        self._backend = backend
+        self._ttls = ttls
+        self._retry_interval = retry_interval
+        self._retry_at = 0.0
+        # префиксы, инвалидация которых ещё не дошла до бэкенда кеша
+        self._stale: set[str] = set()
+        self.stats: dict[str, CacheStats] = {
+            endpoint: CacheStats() for endpoint in ttls
+        }
+        # растёт при каждой инвалидации: ответ, запрошенный до неё
+        # (например, фоновой предзагрузкой), не попадёт в кеш
+        self._generation = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ResponseCache | None":
+        match settings.CACHE_BACKEND:
+            case "memory":
+                backend = InMemoryCacheBackend(settings.CACHE_MAX_SIZE)
+            case "redis":
+                # redis импортируется, только если кеш в нём
+                from repositories.redis_cache import RedisCacheBackend
+
+                backend = RedisCacheBackend.from_url(
+                    settings.REDIS_URL, timeout=settings.REDIS_TIMEOUT
+                )
+            case _:
+                return None
+        return cls(
+            backend,
+            ttls={
+                "tasks:list": settings.CACHE_TASK_LIST_TTL,
+                "tasks:detail": settings.CACHE_TASK_DETAIL_TTL,
+                "categories": settings.CACHE_CATEGORIES_TTL,
+            },
+        )
+
+    @staticmethod
+    def make_key(
+        user_id: str, endpoint: str, url: str, params: dict | None = None
+    ) -> str:
+        key = f"{user_id}:{endpoint}:{url}"
+        if params:
+            key += "?" + "&".join(
+                f"{name}={params[name]}" for name in sorted(params)
+            )
+        return key
+
+    def _fail(self, error: Exception) -> None:
+        logger.warning(
+            "Кеш недоступен, запросы идут мимо него %s с: %r",
+            self._retry_interval,
+            error,
+        )
+        self._retry_at = time.monotonic() + self._retry_interval
+
+    async def _flush_stale(self) -> bool:
+        """Повторяет несделанные инвалидации. False, если бэкенд кеша
+        сейчас недоступен."""
+
+        if time.monotonic() < self._retry_at:
+            return False
+        for prefix in list(self._stale):
+            try:
+                await self._backend.delete_prefix(prefix)
+            except self._backend.errors as e:
+                self._fail(e)
+                return False
+            self._stale.discard(prefix)
+        return True
+
+    async def get_or_fetch(
+        self,
+        user_id: str,
+        endpoint: str,
+        url: str,
+        params: dict | None,
+        fetch: Callable[[], Awaitable[ApiResponse]],
+    ) -> ApiResponse:
+        ttl = self._ttls.get(endpoint)
+        if not ttl:
+            return await fetch()
+        if not await self._flush_stale():
+            self.stats[endpoint].errors += 1
+            return await fetch()
+
+        key = self.make_key(user_id, endpoint, url, params)
+        try:
+            body = await self._backend.get(key)
+        except self._backend.errors as e:
+            self._fail(e)
+            self.stats[endpoint].errors += 1
+            return await fetch()
+        if body is not None:
+            self.stats[endpoint].hits += 1
+            return ApiResponse(method="GET", url=key, status=200, body=body)
+
+        self.stats[endpoint].misses += 1
+        generation = self._generation
+        response = await fetch()
+        if (
+            response.ok
+            and generation == self._generation
+            and time.monotonic() >= self._retry_at
+        ):
+            try:
+                await self._backend.set(key, response.body, ttl)
+            except self._backend.errors as e:
+                self._fail(e)
+        return response
+
+    async def invalidate(self, user_id: str, endpoint: str = "") -> None:
+        self._generation += 1
+        self._stale.add(f"{user_id}:{endpoint}")
+        await self._flush_stale()
+
+    async def close(self) -> None:
+        await self._backend.close()
@@ -1,16 +1,15 @@
-from typing import Iterable
-
-import aiohttp
-
 from config import settings
-from entities.categories import Category
 from entities.users import User
+from repositories.client import HttpClient
+from repositories.singleflight import single_flight
 from schemas.categories import CategorySchema
+from schemas.pagination import PageSchema
 
 
 class CategoryRepository:
-    def __init__(self, user: User):
+    def __init__(self, user: User, client: HttpClient):
         self._user = user
+        self._client = client
 
     @property
     def headers(self):
@@ -20,20 +19,15 @@ class CategoryRepository:
     def _get_list_url() -> str:
         return f"{settings.API_URL}/api/v1/tasks/categories/"
 
+    @single_flight
     async def get_all_categories(
         self,
-    ) -> Iterable[CategorySchema] | Iterable[None]:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                self._get_list_url(), headers=self.headers
-            ) as response:
-                response.raise_for_status()
-                response = await response.json()
-                categories_entities = [
-                    Category.to_entity(category)
-                    for category in response["results"]
-                ]
-                return [
-                    CategorySchema.to_schema(category)
-                    for category in categories_entities
-                ]
+    ) -> list[CategorySchema]:
+        response = await self._client.get_cached(
+            self._get_list_url(),
+            user_id=self._user.user_id,
+            endpoint="categories",
+            headers=self.headers,
+        )
+        response.raise_for_status()
+        return response.validate(PageSchema[CategorySchema]).results
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import time
+from functools import partial
+from typing import Any, Coroutine
+
+import aiohttp
+
+from config import Settings
+from repositories.cache import ResponseCache
+from repositories.policy import RequestPolicy
+from repositories.responses import ApiResponse
+from repositories.singleflight import SingleFlight
+from utils.metrics import backend_bytes, backend_latency
+from utils.profiling import add_timing
+from utils.recording import UpdateRecorder
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClient:
+    def __init__(
+        self,
+        *,
+        limit: int = 100,
+        limit_per_host: int = 20,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 30,
+        connect_timeout: float = 5,
+        total_timeout: float = 30,
+        cache: ResponseCache | None = None,
+        policy: RequestPolicy | None = None,
+        recorder: UpdateRecorder | None = None,
+    ):
+        """Общий на всё приложение HTTP клиент к бэкенду.
+
+        Держит один ClientSession с пулом keep-alive соединений и кешем
+        DNS. Сессия создаётся лениво внутри работающего event loop и
+        пересоздаётся после close(), поэтому клиент переживает
+        перезапуски поллинга.
+
+        :param cache: необязательный read-through кеш для GET запросов,
+        см. get_cached
+        :param policy: таймауты, повторы и предохранитель для запросов,
+        настраиваются по имени эндпоинта (параметр endpoint)
+        :param recorder: необязательная запись ответов бэкенда для
+        воспроизведения, см. utils.recording
+
+        Одинаковые одновременные чтения репозиториев объединяются через
+        single_flight (см. repositories.singleflight), фоновые запросы
+        (например, предзагрузка страниц) запускаются через
+        run_in_background и отменяются при close().
+        """
+
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._dns_cache_ttl = dns_cache_ttl
+        self._keepalive_timeout = keepalive_timeout
+        self._timeout = aiohttp.ClientTimeout(
+            total=total_timeout, sock_connect=connect_timeout
+        )
+        self._session: aiohttp.ClientSession | None = None
+        self.cache = cache
+        self.policy = policy
+        self.recorder = recorder
+        self.single_flight = SingleFlight()
+        self._background: set[asyncio.Task] = set()
+
+    @classmethod
+    def from_settings(
+        cls, settings: Settings, recorder: UpdateRecorder | None = None
+    ) -> "HttpClient":
+        return cls(
+            limit=settings.HTTP_POOL_LIMIT,
+            limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+            dns_cache_ttl=settings.HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+            connect_timeout=settings.HTTP_CONNECT_TIMEOUT,
+            total_timeout=settings.HTTP_TOTAL_TIMEOUT,
+            cache=ResponseCache.from_settings(settings),
+            policy=RequestPolicy.from_settings(settings),
+            recorder=recorder,
+        )
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._limit,
+                limit_per_host=self._limit_per_host,
+                use_dns_cache=True,
+                ttl_dns_cache=self._dns_cache_ttl,
+                keepalive_timeout=self._keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=self._timeout
+            )
+        return self._session
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: dict | None = None,
+        params: dict | None = None,
+        json: Any = None,
+        endpoint: str | None = None,
+    ) -> ApiResponse:
+        send = partial(
+            self._send,
+            method,
+            url,
+            headers=headers,
+            params=params,
+            json=json,
+            endpoint=endpoint,
+        )
+        if self.policy is None:
+            return await send()
+        return await self.policy.execute(method, endpoint, send)
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: dict | None = None,
+        params: dict | None = None,
+        json: Any = None,
+        endpoint: str | None = None,
+    ) -> ApiResponse:
+        endpoint = endpoint or "other"
+        started = time.perf_counter()
+        status = "error"
+        try:
+            async with self.session.request(
+                method, url, headers=headers, params=params, json=json
+            ) as response:
+                body = await response.read()
+                status = str(response.status)
+        except asyncio.CancelledError:
+            # таймаут политики или отменённый дублирующий запрос
+            status = "cancelled"
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            backend_latency.labels(endpoint, method, status).observe(elapsed)
+            add_timing("backend", elapsed)
+        backend_bytes.labels(endpoint, method).observe(len(body))
+        if self.recorder is not None:
+            self.recorder.record_backend(
+                method, str(response.url), response.status, body
+            )
+        return ApiResponse(
+            method=method,
+            url=str(response.url),
+            status=response.status,
+            body=body,
+            reason=response.reason,
+        )
+
+    async def get(self, url: str, **kwargs) -> ApiResponse:
+        return await self.request("GET", url, **kwargs)
+
+    async def get_cached(
+        self,
+        url: str,
+        *,
+        user_id: str,
+        endpoint: str,
+        headers: dict | None = None,
+        params: dict | None = None,
+    ) -> ApiResponse:
+        fetch = partial(
+            self.get, url, headers=headers, params=params, endpoint=endpoint
+        )
+        if self.cache is None:
+            return await fetch()
+        return await self.cache.get_or_fetch(
+            user_id, endpoint, url, params, fetch
+        )
+
+    async def invalidate(self, user_id: str, endpoint: str = "") -> None:
+        if self.cache is not None:
+            await self.cache.invalidate(user_id, endpoint)
+
+    def run_in_background(self, coroutine: Coroutine) -> asyncio.Task:
+        task = asyncio.create_task(coroutine)
+        self._background.add(task)
+        task.add_done_callback(self._background_done)
+        return task
+
+    def _background_done(self, task: asyncio.Task) -> None:
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(
+                "Фоновый запрос к бэкенду не удался: %r", task.exception()
+            )
+
+    async def post(self, url: str, **kwargs) -> ApiResponse:
+        return await self.request("POST", url, **kwargs)
+
+    async def patch(self, url: str, **kwargs) -> ApiResponse:
+        return await self.request("PATCH", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> ApiResponse:
+        return await self.request("DELETE", url, **kwargs)
+
+    async def close(self) -> None:
+        for task in self._background:
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self.cache is not None:
+            await self.cache.close()
@@ -0,0 +1,47 @@
+import logging
+from dataclasses import dataclass
+from typing import Callable, Literal
+
+from schemas.tasks import TaskShortSchema
+
+logger = logging.getLogger(__name__)
+
+TaskAction = Literal["created", "updated", "completed", "deleted"]
+
+
+@dataclass(frozen=True)
+class TaskEvent:
+    action: TaskAction
+    user_id: str
+    task_id: str
+    # для created и updated - задача после изменения
+    task: TaskShortSchema | None = None
+
+
+class TaskEvents:
+    def __init__(self):
+        """Уведомления об изменениях задач через TaskRepository.
+
+        Подписчики вызываются синхронно после успешного ответа бэкенда,
+        поэтому должны быть быстрыми; ошибка подписчика логируется и не
+        влияет на сам запрос.
+        """
+
+        self._subscribers: list[Callable[[TaskEvent], None]] = []
+
+    def subscribe(self, subscriber: Callable[[TaskEvent], None]) -> None:
+        self._subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber: Callable[[TaskEvent], None]) -> None:
+        if subscriber in self._subscribers:
+            self._subscribers.remove(subscriber)
+
+    def emit(self, event: TaskEvent) -> None:
+        for subscriber in self._subscribers:
+            try:
+                subscriber(event)
+            except Exception:
+                logger.exception("Ошибка подписчика событий задач")
+
+
+task_events = TaskEvents()
@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+from datetime import date
+
+
+@dataclass(frozen=True)
+class TaskFilter:
+    """Фильтр списка задач, переводится в query параметры бэкенда.
+
+    Неизменяемый и хешируемый, поэтому годится в ключ single_flight.
+    """
+
+    is_active: bool | None = None
+    deadline: date | None = None
+    ordering: str = "deadline"
+
+    def to_params(self) -> dict[str, str]:
+        params = {"ordering": self.ordering}
+        if self.is_active is not None:
+            params["is_active"] = "true" if self.is_active else "false"
+        if self.deadline is not None:
+            params["deadline"] = self.deadline.isoformat()
+        return params
@@ -0,0 +1,84 @@
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterator
+
+from utils.bloom import BloomFilter
+
+
+class KnownUsersRepository:
+    def __init__(
+        self, path: str, capacity: int = 100_000, error_rate: float = 0.01
+    ):
+        """Локальный список пользователей, уже зарегистрированных на бэкенде.
+
+        Хранится в SQLite и переживает перезапуски. Перед базой стоит
+        фильтр Блума, поэтому для новых пользователей проверка обходится
+        без обращения к диску.
+
+        contains и add обращаются к диску, из event loop их вызывают через
+        asyncio.to_thread; соединение и фильтр общие для потоков и
+        защищены блокировкой.
+        """
+
+        self._path = path
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        if self._connection is not None:
+            return
+        Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self._path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS known_users "
+            "(user_id TEXT PRIMARY KEY) WITHOUT ROWID"
+        )
+        for (user_id,) in self._connection.execute(
+            "SELECT user_id FROM known_users"
+        ):
+            self._bloom.add(user_id)
+
+    def contains(self, user_id: str) -> bool:
+        with self._lock:
+            if user_id not in self._bloom:
+                return False
+            row = self._connection.execute(
+                "SELECT 1 FROM known_users WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return row is not None
+
+    def add(self, user_id: str) -> None:
+        with self._lock:
+            with self._connection:
+                self._connection.execute(
+                    "INSERT OR IGNORE INTO known_users (user_id) VALUES (?)",
+                    (user_id,),
+                )
+            self._bloom.add(user_id)
+
+    def iter_user_ids(self) -> Iterator[str]:
+        """Все известные пользователи, читаются курсором без загрузки
+        списка в память."""
+
+        # курсор читается порциями под блокировкой: между порциями
+        # соединением могут пользоваться другие потоки
+        with self._lock:
+            cursor = self._connection.execute(
+                "SELECT user_id FROM known_users"
+            )
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(500)
+            if not rows:
+                return
+            for (user_id,) in rows:
+                yield user_id
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,137 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Literal
+
+OutboxAction = Literal["create", "complete", "delete"]
+
+
+@dataclass(frozen=True)
+class OutboxOperation:
+    id: int
+    user_id: str
+    action: OutboxAction
+    task_id: str | None
+    payload: dict | None
+    idempotency_key: str
+
+
+class TaskOutboxRepository:
+    def __init__(self, path: str):
+        """Отложенные изменения задач, которые не удалось сразу отправить
+        на бэкенд. Хранятся в SQLite и переживают перезапуски, операции
+        одного пользователя читаются в порядке добавления.
+
+        Число операций каждого пользователя держится в памяти, чтобы
+        проверка "есть ли у пользователя очередь" не ходила в базу.
+        add, first и remove обращаются к диску, из event loop их
+        вызывают через asyncio.to_thread; соединение общее для потоков и
+        защищено блокировкой.
+        """
+
+        self._path = path
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._pending: Counter[str] = Counter()
+
+    def load(self) -> None:
+        if self._connection is not None:
+            return
+        Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self._path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS task_outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "user_id TEXT NOT NULL, "
+            "action TEXT NOT NULL, "
+            "task_id TEXT, "
+            "payload TEXT, "
+            "idempotency_key TEXT NOT NULL UNIQUE, "
+            "created_at REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS task_outbox_user "
+            "ON task_outbox (user_id, id)"
+        )
+        self._pending = Counter(
+            dict(
+                self._connection.execute(
+                    "SELECT user_id, COUNT(*) FROM task_outbox "
+                    "GROUP BY user_id"
+                )
+            )
+        )
+
+    def __len__(self) -> int:
+        return self._pending.total()
+
+    def has_pending(self, user_id: str) -> bool:
+        return user_id in self._pending
+
+    def pending_user_ids(self) -> list[str]:
+        return list(self._pending)
+
+    def add(
+        self,
+        user_id: str,
+        action: OutboxAction,
+        task_id: str | None,
+        payload: dict | None,
+        idempotency_key: str,
+    ) -> None:
+        with self._lock:
+            with self._connection:
+                self._connection.execute(
+                    "INSERT INTO task_outbox (user_id, action, "
+                    "task_id, payload, idempotency_key, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        user_id,
+                        action,
+                        task_id,
+                        json.dumps(payload) if payload is not None else None,
+                        idempotency_key,
+                        time.time(),
+                    ),
+                )
+            self._pending[user_id] += 1
+
+    def first(self, user_id: str) -> OutboxOperation | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT id, user_id, action, task_id, payload, idempotency_key "
+                "FROM task_outbox WHERE user_id = ? ORDER BY id LIMIT 1",
+                (user_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        id_, user_id, action, task_id, payload, key = row
+        return OutboxOperation(
+            id_,
+            user_id,
+            action,
+            task_id,
+            json.loads(payload) if payload is not None else None,
+            key,
+        )
+
+    def remove(self, operation: OutboxOperation) -> None:
+        with self._lock:
+            with self._connection:
+                self._connection.execute(
+                    "DELETE FROM task_outbox WHERE id = ?", (operation.id,)
+                )
+            self._pending[operation.user_id] -= 1
+            if self._pending[operation.user_id] <= 0:
+                del self._pending[operation.user_id]
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
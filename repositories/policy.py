@@ -0,0 +1,281 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+import aiohttp
+
+from config import Settings
+from exceptions.backend import BackendUnavailableException
+from repositories.responses import ApiResponse
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+TRANSIENT_ERRORS = (asyncio.TimeoutError, aiohttp.ClientError)
+
+
+@dataclass(frozen=True)
+class EndpointPolicy:
+    """Настройки запросов к одному эндпоинту бэкенда.
+
+    :param timeout: таймаут одной попытки в секундах
+    :param hedge_after: через сколько секунд без ответа отправить
+    второй такой же запрос (только для идемпотентных), None - не
+    отправлять
+    :param max_retries: число повторов, None - как у RequestPolicy
+    :param background: фоновые запросы (обходы всех пользователей)
+    идут, только пока предохранитель замкнут, и не влияют на него,
+    чтобы их ошибки не отключали запросы пользователей
+    """
+
+    timeout: float
+    hedge_after: float | None = None
+    max_retries: int | None = None
+    background: bool = False
+
+
+@dataclass
+class PolicyStats:
+    requests: int = 0
+    retries: int = 0
+    timeouts: int = 0
+    failures: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+    rejected: int = 0
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        """Размыкается после failure_threshold неудачных запросов подряд
+        и reset_timeout секунд отклоняет запросы сразу. Затем пропускает
+        один пробный запрос: успех замыкает цепь, неудача снова
+        размыкает."""
+
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.state = self.CLOSED
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self._reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._probing = False
+        self.state = self.CLOSED
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probing = False
+        if (
+            self.state == self.HALF_OPEN
+            or self._failures >= self._failure_threshold
+        ):
+            if self.state != self.OPEN:
+                logger.warning("Бэкенд недоступен, запросы приостановлены")
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Пробный запрос отменён, не дождавшись ответа."""
+
+        self._probing = False
+
+
+class RequestPolicy:
+    def __init__(
+        self,
+        *,
+        default: EndpointPolicy,
+        endpoints: dict[str, EndpointPolicy] | None = None,
+        max_retries: int = 2,
+        min_backoff: float = 0.1,
+        max_backoff: float = 2,
+        breaker: CircuitBreaker | None = None,
+    ):
+        """Таймауты, повторы и предохранитель для запросов к бэкенду.
+
+        Повторяются только идемпотентные запросы при таймауте, ошибке
+        соединения или ответе 5xx, с задержкой, выбранной случайно из
+        [0, min(max_backoff, min_backoff * 2 ** n)]. Если бэкенд так и не
+        ответил, или предохранитель разомкнут, выбрасывается
+        BackendUnavailableException с понятным пользователю сообщением.
+        """
+
+        self._default = default
+        self._endpoints = endpoints or {}
+        self._max_retries = max_retries
+        self._min_backoff = min_backoff
+        self._max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.stats = PolicyStats()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "RequestPolicy":
+        default = EndpointPolicy(timeout=settings.BACKEND_TIMEOUT)
+        endpoints = {
+            endpoint: EndpointPolicy(timeout=timeout)
+            for endpoint, timeout in settings.BACKEND_ENDPOINT_TIMEOUTS.items()
+        }
+        # обновление напоминаний обходит списки всех пользователей: без
+        # повторов и в стороне от предохранителя
+        endpoints["reminders:list"] = EndpointPolicy(
+            timeout=endpoints.get(
+                "reminders:list", endpoints.get("tasks:list", default)
+            ).timeout,
+            max_retries=0,
+            background=True,
+        )
+        if settings.BACKEND_HEDGE_DETAIL_AFTER is not None:
+            detail = endpoints.get("tasks:detail", default)
+            endpoints["tasks:detail"] = EndpointPolicy(
+                timeout=detail.timeout,
+                hedge_after=settings.BACKEND_HEDGE_DETAIL_AFTER,
+            )
+        return cls(
+            default=default,
+            endpoints=endpoints,
+            max_retries=settings.BACKEND_MAX_RETRIES,
+            min_backoff=settings.BACKEND_RETRY_MIN_BACKOFF,
+            max_backoff=settings.BACKEND_RETRY_MAX_BACKOFF,
+            breaker=CircuitBreaker(
+                failure_threshold=settings.BACKEND_BREAKER_THRESHOLD,
+                reset_timeout=settings.BACKEND_BREAKER_RESET_TIMEOUT,
+            ),
+        )
+
+    def get_policy(self, endpoint: str | None) -> EndpointPolicy:
+        return self._endpoints.get(endpoint, self._default)
+
+    def _backoff(self, attempt: int) -> float:
+        ceiling = self._min_backoff * 2**attempt
+        return random.uniform(0, min(self._max_backoff, ceiling))
+
+    async def _attempt(
+        self,
+        send: Callable[[], Awaitable[ApiResponse]],
+        policy: EndpointPolicy,
+    ) -> ApiResponse:
+        if policy.background:
+            allowed = self.breaker.state == CircuitBreaker.CLOSED
+        else:
+            allowed = self.breaker.allow()
+        if not allowed:
+            self.stats.rejected += 1
+            raise BackendUnavailableException
+        # в полуоткрытом состоянии allow пропускает только пробный
+        # запрос; отменённые остальные (проигравший hedge, запрос,
+        # начатый до размыкания) чужую пробу снимать не должны
+        probe = self.breaker.state == CircuitBreaker.HALF_OPEN
+        track = not policy.background
+        try:
+            async with asyncio.timeout(policy.timeout):
+                response = await send()
+        except TRANSIENT_ERRORS as e:
+            if isinstance(e, asyncio.TimeoutError):
+                self.stats.timeouts += 1
+            if track:
+                self.breaker.record_failure()
+            raise e
+        except asyncio.CancelledError:
+            if probe and track:
+                self.breaker.release()
+            raise
+        if not track:
+            return response
+        if response.status >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    async def _hedged_attempt(
+        self,
+        send: Callable[[], Awaitable[ApiResponse]],
+        policy: EndpointPolicy,
+    ) -> ApiResponse:
+        """Если первый запрос не ответил за hedge_after, параллельно
+        отправляется второй, берётся первый удачный ответ."""
+
+        first = asyncio.ensure_future(self._attempt(send, policy))
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=policy.hedge_after)
+            if not done and self.breaker.state == CircuitBreaker.CLOSED:
+                self.stats.hedged += 1
+                tasks.add(asyncio.ensure_future(self._attempt(send, policy)))
+            while True:
+                done, _ = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    tasks.discard(task)
+                    if task.exception() is None and task.result().status < 500:
+                        if task is not first:
+                            self.stats.hedge_wins += 1
+                        return task.result()
+                    if not tasks:
+                        return task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def execute(
+        self,
+        method: str,
+        endpoint: str | None,
+        send: Callable[[], Awaitable[ApiResponse]],
+    ) -> ApiResponse:
+        policy = self.get_policy(endpoint)
+        idempotent = method in IDEMPOTENT_METHODS
+        retries = 0
+        if idempotent:
+            retries = (
+                self._max_retries
+                if policy.max_retries is None
+                else policy.max_retries
+            )
+        self.stats.requests += 1
+        for attempt in range(retries + 1):
+            if attempt:
+                self.stats.retries += 1
+                await asyncio.sleep(self._backoff(attempt - 1))
+            try:
+                if idempotent and policy.hedge_after is not None:
+                    response = await self._hedged_attempt(send, policy)
+                else:
+                    response = await self._attempt(send, policy)
+            except TRANSIENT_ERRORS as e:
+                error = e
+                continue
+            if response.status < 500:
+                return response
+            error = None
+        self.stats.failures += 1
+        logger.warning(
+            "Запрос %s %s не удался после %s попыток: %r",
+            method,
+            endpoint,
+            retries + 1,
+            error or response.status,
+        )
+        raise BackendUnavailableException from error
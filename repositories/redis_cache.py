@@ -0,0 +1,44 @@
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from repositories.cache import CacheBackend
+
+
+class RedisCacheBackend(CacheBackend):
+    errors = (RedisError, OSError)
+
+    def __init__(self, redis: Redis, namespace: str = "bot:cache:"):
+        """Кеш в Redis. Размер ограничивается политикой maxmemory самого
+        Redis (рекомендуется allkeys-lru), TTL задаётся через PX."""
+
+        self._redis = redis
+        self._namespace = namespace
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float) -> "RedisCacheBackend":
+        return cls(
+            Redis.from_url(
+                url, socket_timeout=timeout, socket_connect_timeout=timeout
+            )
+        )
+
+    @staticmethod
+    def _escape_pattern(value: str) -> str:
+        for char in "\\*?[]":
+            value = value.replace(char, f"\\{char}")
+        return value
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._redis.get(self._namespace + key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._redis.set(self._namespace + key, value, px=int(ttl * 1000))
+
+    async def delete_prefix(self, prefix: str) -> None:
+        pattern = self._escape_pattern(self._namespace + prefix) + "*"
+        keys = [key async for key in self._redis.scan_iter(pattern, count=500)]
+        if keys:
+            await self._redis.delete(*keys)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
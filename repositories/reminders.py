@@ -0,0 +1,63 @@
+import sqlite3
+from pathlib import Path
+
+
+class SentRemindersRepository:
+    def __init__(self, path: str):
+        """Отправленные напоминания: пользователь, задача, вид и дедлайн,
+        о котором напомнили.
+
+        Хранится в SQLite и переживает перезапуски: после рестарта бот не
+        повторяет уже отправленные напоминания и досылает просрочки,
+        наступившие, пока он не работал. Перенос дедлайна даёт новый
+        ключ, поэтому о новом дедлайне напомнят заново.
+        """
+
+        self._path = path
+        self._connection: sqlite3.Connection | None = None
+
+    def load(self) -> None:
+        if self._connection is not None:
+            return
+        Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self._path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS sent_reminders "
+            "(user_id TEXT, task_id TEXT, kind INTEGER, deadline REAL, "
+            "PRIMARY KEY (user_id, task_id, kind, deadline)) WITHOUT ROWID"
+        )
+
+    def contains(
+        self, user_id: str, task_id: str, kind: int, deadline: float
+    ) -> bool:
+        row = self._connection.execute(
+            "SELECT 1 FROM sent_reminders WHERE user_id = ? AND task_id = ? "
+            "AND kind = ? AND deadline = ?",
+            (user_id, task_id, kind, deadline),
+        ).fetchone()
+        return row is not None
+
+    def add(
+        self, user_id: str, task_id: str, kind: int, deadline: float
+    ) -> None:
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO sent_reminders "
+                "(user_id, task_id, kind, deadline) VALUES (?, ?, ?, ?)",
+                (user_id, task_id, kind, deadline),
+            )
+
+    def prune(self, before: float) -> None:
+        """Удаляет записи о дедлайнах раньше before."""
+
+        with self._connection:
+            self._connection.execute(
+                "DELETE FROM sent_reminders WHERE deadline < ?", (before,)
+            )
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
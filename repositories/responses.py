@@ -0,0 +1,59 @@
+import json
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from pydantic import BaseModel
+from yarl import URL
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+@dataclass(frozen=True)
+class ApiResponse:
+    """Полностью вычитанный ответ бэкенда.
+
+    Тело читается целиком до возврата соединения в пул, поэтому ответ
+    можно безопасно передавать дальше, кешировать и разделять между
+    несколькими ожидающими.
+    """
+
+    method: str
+    url: str
+    status: int
+    body: bytes
+    reason: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    def json(self) -> Any:
+        return json.loads(self.body) if self.body else None
+
+    def validate(self, schema: type[ModelT], **context: Any) -> ModelT:
+        """Разбирает тело сразу в схему за один проход: парсер JSON
+        pydantic-core без промежуточных dict и сущностей. Используется
+        для ответов бэкенда, которым мы доверяем по формату.
+
+        :param context: контекст валидации, доступный валидаторам схемы
+        """
+
+        return schema.model_validate_json(self.body, context=context or None)
+
+    def raise_for_status(self) -> None:
+        if self.ok:
+            return
+        request_info = aiohttp.RequestInfo(
+            url=URL(self.url),
+            method=self.method,
+            headers=CIMultiDictProxy(CIMultiDict()),
+            real_url=URL(self.url),
+        )
+        raise aiohttp.ClientResponseError(
+            request_info,
+            (),
+            status=self.status,
+            message=self.reason or "",
+        )
@@ -0,0 +1,74 @@
+import asyncio
+from dataclasses import dataclass
+from functools import partial, wraps
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    calls: int = 0
+    deduplicated: int = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        """Объединение одинаковых одновременных вызовов.
+
+        Пока вызов с ключом выполняется, все остальные вызовы с тем же
+        ключом ждут его результат (или исключение) вместо того, чтобы
+        выполнять работу повторно. Вызов идёт отдельной задачей, поэтому
+        отмена одного из ждущих не отменяет остальных.
+        """
+
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+        self.stats = SingleFlightStats()
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    @staticmethod
+    def _consume_exception(task: asyncio.Task) -> None:
+        if not task.cancelled():
+            task.exception()
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        self.stats.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(self._consume_exception)
+            task.add_done_callback(partial(self._forget, key))
+        else:
+            self.stats.deduplicated += 1
+        return await asyncio.shield(task)
+
+
+def single_flight(method: Callable[..., Awaitable[T]]):
+    """Декоратор для чтений репозитория: одинаковые одновременные вызовы
+    (тот же метод, пользователь и аргументы) делят один запрос к бэкенду
+    и один разобранный результат.
+
+    Использует SingleFlight клиента репозитория (self._client).
+    """
+
+    @wraps(method)
+    async def wrapper(self, *args: Any, **kwargs: Any) -> T:
+        user = getattr(self, "_user", None)
+        key = (
+            method.__qualname__,
+            user.user_id if user is not None else None,
+            args,
+            tuple(sorted(kwargs.items())),
+        )
+        return await self._client.single_flight.do(
+            key, partial(method, self, *args, **kwargs)
+        )
+
+    return wrapper
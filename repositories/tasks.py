@@ -1,12 +1,12 @@
-from datetime import datetime
-from typing import Iterable, NoReturn, TypeVar
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, NoReturn, TypeVar
 
 import aiohttp
-import pytz
 
 from config import settings
 from entities.tasks import Task
 from entities.users import User
+from exceptions.base import ServerException
 from exceptions.constants import status
 from exceptions.tasks import (
     TaskAlreadyDoneException,
@@ -15,19 +15,35 @@ from exceptions.tasks import (
     TaskIncorrectDeadline,
     TaskNotFoundException,
 )
-from schemas.tasks import TaskSchema, TaskShortSchema
+from repositories.client import HttpClient
+from repositories.events import TaskAction, TaskEvent, task_events
+from repositories.filters import TaskFilter
+from repositories.singleflight import single_flight
+from schemas.pagination import PageSchema
+from schemas.tasks import TaskBatchResult, TaskSchema, TaskShortSchema
+from utils.metrics import count_server_error
 
 TelegramUserId = TypeVar("TelegramUserId")
 
 
 class TaskRepository:
-    def __init__(self, user: User):
+    def __init__(self, user: User, client: HttpClient):
         self._user = user
+        self._client = client
 
     @property
     def headers(self):
         return {"User-Id": self._user.user_id}
 
+    def _get_write_headers(self, idempotency_key: str | None) -> dict:
+        """Заголовки изменяющих запросов. С ключом идемпотентности
+        бэкенд не выполнит повтор уже выполненного запроса (например,
+        POST, ответ на который не дошёл из-за таймаута)."""
+
+        if idempotency_key is None:
+            return self.headers
+        return {**self.headers, "Idempotency-Key": idempotency_key}
+
     @staticmethod
     def _get_list_url() -> str:
         return f"{settings.API_URL}/api/v1/tasks/"
@@ -49,194 +65,245 @@ class TaskRepository:
             "categories": [category.id for category in task.categories],
         }
 
-    @staticmethod
-    def _get_correct_tz_time(date: datetime) -> datetime:
-        tz = pytz.timezone("America/Adak")
-        return date.astimezone(tz)
-
-    async def create_task(self, task_payload: dict) -> TaskShortSchema:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                self._get_list_url(), json=task_payload, headers=self.headers
-            ) as response:
-                try:
-                    response.raise_for_status()
-                    task = await response.json()
-                    task_entity = Task.to_entity(task)
-                    return TaskShortSchema.to_schema(task_entity)
-                except aiohttp.ClientResponseError as e:
-                    match e.status:
-                        case status.HTTP_400_BAD_REQUEST:
-                            raise TaskIncorrectDeadline
-                        case status.HTTP_409_CONFLICT:
-                            raise TaskAlreadyExistsException
-                        case _:
-                            raise e
+    def _emit(
+        self,
+        action: TaskAction,
+        task_id: str,
+        task: TaskShortSchema | None = None,
+    ) -> None:
+        task_events.emit(
+            TaskEvent(action, self._user.user_id, str(task_id), task)
+        )
+
+    async def create_task(
+        self, task_payload: dict, idempotency_key: str | None = None
+    ) -> TaskShortSchema:
+        response = await self._client.post(
+            self._get_list_url(),
+            json=task_payload,
+            headers=self._get_write_headers(idempotency_key),
+            endpoint="tasks:create",
+        )
+        await self._client.invalidate(self._user.user_id, "tasks")
+        try:
+            response.raise_for_status()
+            task = response.validate(TaskShortSchema)
+        except aiohttp.ClientResponseError as e:
+            match e.status:
+                case status.HTTP_400_BAD_REQUEST:
+                    raise TaskIncorrectDeadline
+                case status.HTTP_409_CONFLICT:
+                    raise TaskAlreadyExistsException
+                case _:
+                    raise e
+        self._emit("created", task.id, task)
+        return task
 
     async def update_task(
         self, task_payload: Task, task_id: str
     ) -> TaskShortSchema:
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(
-                self._get_detail_url(task_id),
-                json=task_payload,
-                headers=self.headers,
-            ) as response:
-                try:
-                    response.raise_for_status()
-                    task = await response.json()
-                    task_entity = Task.to_entity(task)
-                    return TaskShortSchema.to_schema(task_entity)
-                except aiohttp.ClientResponseError as e:
-                    match e.status:
-                        case status.HTTP_400_BAD_REQUEST:
-                            raise TaskIncorrectDeadline
-                        case status.HTTP_409_CONFLICT:
-                            raise TaskAlreadyExistsException
-                        case status.HTTP_403_FORBIDDEN:
-                            raise TaskAnotherAuthorException
-                        case _:
-                            raise e
-
-    async def get_user_today_tasks(
-        self, page: int, page_size: int = 5
-    ) -> Iterable[TaskShortSchema] | Iterable[None]:
-        async with aiohttp.ClientSession() as session:
-            today = (
-                self._get_correct_tz_time(datetime.today()).date().isoformat()
+        response = await self._client.patch(
+            self._get_detail_url(task_id),
+            json=task_payload,
+            headers=self.headers,
+            endpoint="tasks:update",
+        )
+        await self._client.invalidate(self._user.user_id, "tasks")
+        try:
+            response.raise_for_status()
+            task = response.validate(TaskShortSchema)
+        except aiohttp.ClientResponseError as e:
+            match e.status:
+                case status.HTTP_400_BAD_REQUEST:
+                    raise TaskIncorrectDeadline
+                case status.HTTP_409_CONFLICT:
+                    raise TaskAlreadyExistsException
+                case status.HTTP_403_FORBIDDEN:
+                    raise TaskAnotherAuthorException
+                case _:
+                    raise e
+        self._emit("updated", task_id, task)
+        return task
+
+    def _get_list_params(
+        self, task_filter: TaskFilter, page: int, page_size: int
+    ) -> dict:
+        return {
+            "user_id": self._user.user_id,
+            "page": page,
+            "page_size": page_size,
+            **task_filter.to_params(),
+        }
+
+    @single_flight
+    async def _get_window(
+        self, task_filter: TaskFilter, window: int
+    ) -> PageSchema[TaskShortSchema]:
+        """Окно из TASKS_WINDOW_SIZE задач, из которого нарезаются
+        страницы. Ответ кешируется целиком, поэтому соседние страницы
+        берутся из кеша без запроса к бэкенду."""
+
+        response = await self._client.get_cached(
+            self._get_list_url(),
+            user_id=self._user.user_id,
+            endpoint="tasks:list",
+            params=self._get_list_params(
+                task_filter, window, settings.TASKS_WINDOW_SIZE
+            ),
+            headers=self.headers,
+        )
+        response.raise_for_status()
+        return response.validate(PageSchema[TaskShortSchema])
+
+    async def list_tasks(
+        self, task_filter: TaskFilter, page: int, page_size: int | None = None
+    ) -> tuple[list[TaskShortSchema], bool, bool]:
+        """Страница списка задач и признаки наличия следующей и
+        предыдущей страниц."""
+
+        page_size = page_size or settings.TASKS_PAGE_SIZE
+        offset = (page - 1) * page_size
+        window, start = divmod(offset, settings.TASKS_WINDOW_SIZE)
+        try:
+            data = await self._get_window(task_filter, window + 1)
+        except aiohttp.ClientResponseError as e:
+            # страница за пределами списка
+            if e.status == status.HTTP_404_NOT_FOUND:
+                return [], False, page > 1
+            raise e
+
+        results = data.results
+        end = start + page_size
+        if data.next is not None and (
+            len(results) - end < page_size * settings.TASKS_PREFETCH_PAGES
+        ):
+            self._client.run_in_background(
+                self._get_window(task_filter, window + 2)
             )
-            async with session.get(
-                self._get_list_url(),
-                params={
-                    "user_id": self._user.user_id,
-                    "deadline": today,
-                    "page": page,
-                    "page_size": page_size,
-                    "ordering": "deadline",
-                },
-                headers=self.headers,
-            ) as response:
-                response.raise_for_status()
-                task = await response.json()
-                task_entities = [
-                    Task.to_entity(task) for task in task["results"]
-                ]
-                return (
-                    [
-                        TaskShortSchema.to_schema(task_entity)
-                        for task_entity in task_entities
-                    ],
-                    task["next"],
-                    task["previous"],
-                )
-
-    async def get_user_active_tasks(
-        self, page: int, page_size: int = 5
-    ) -> (
-        tuple[Iterable[TaskShortSchema], str | None, str | None]
-        | Iterable[None]
-    ):
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                self._get_list_url(),
-                params={
-                    "user_id": self._user.user_id,
-                    "page": page,
-                    "page_size": page_size,
-                    "is_active": "true",
-                    "ordering": "deadline",
-                },
-                headers=self.headers,
-            ) as response:
-                response.raise_for_status()
-                task = await response.json()
-                task_entities = [
-                    Task.to_entity(task) for task in task["results"]
-                ]
-                return (
-                    [
-                        TaskShortSchema.to_schema(task_entity)
-                        for task_entity in task_entities
-                    ],
-                    task["next"],
-                    task["previous"],
-                )
-
-    async def get_user_not_active_tasks(
-        self, page: int, page_size: int = 5
-    ) -> (
-        tuple[Iterable[TaskShortSchema], str | None, str | None]
-        | Iterable[None]
-    ):
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                self._get_list_url(),
-                params={
-                    "user_id": self._user.user_id,
-                    "page": page,
-                    "page_size": page_size,
-                    "is_active": "false",
-                    "ordering": "deadline",
-                },
-                headers=self.headers,
-            ) as response:
-                response.raise_for_status()
-                task = await response.json()
-                task_entities = [
-                    Task.to_entity(task) for task in task["results"]
-                ]
-                return (
-                    [
-                        TaskShortSchema.to_schema(task_entity)
-                        for task_entity in task_entities
-                    ],
-                    task["next"],
-                    task["previous"],
-                )
 
+        has_next = end < len(results) or data.next is not None
+        return results[start:end], has_next, page > 1
+
+    async def iter_tasks(
+        self,
+        task_filter: TaskFilter,
+        page_size: int = 100,
+        endpoint: str = "tasks:list",
+    ) -> AsyncIterator[TaskShortSchema]:
+        """Все задачи по фильтру. Страницы запрашиваются лениво по ссылке
+        next, в памяти держится только текущая, поэтому подходит для
+        выгрузок и обхода больших списков. Кеш не используется.
+
+        :param endpoint: эндпоинт для политики запросов, фоновые обходы
+        передают свой
+        """
+
+        url = self._get_list_url()
+        params = self._get_list_params(task_filter, 1, page_size)
+        while url is not None:
+            response = await self._client.get(
+                url, params=params, headers=self.headers, endpoint=endpoint
+            )
+            response.raise_for_status()
+            data = response.validate(PageSchema[TaskShortSchema])
+            for task in data.results:
+                yield task
+            # ссылка next уже содержит все параметры запроса
+            url, params = data.next, None
+
+    @single_flight
     async def get_detail_task(self, task_id: str) -> TaskSchema | NoReturn:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                self._get_detail_url(task_id), headers=self.headers
-            ) as response:
-                try:
-                    response.raise_for_status()
-                    task = await response.json()
-                    task["user"] = self._user
-                    task_entity = Task.to_entity(task)
-                    return TaskSchema.to_schema(task_entity)
-                except aiohttp.ClientResponseError as e:
-                    if e.status == status.HTTP_404_NOT_FOUND:
-                        raise TaskNotFoundException
+        response = await self._client.get_cached(
+            self._get_detail_url(task_id),
+            user_id=self._user.user_id,
+            endpoint="tasks:detail",
+            headers=self.headers,
+        )
+        try:
+            response.raise_for_status()
+            return response.validate(TaskSchema, user=self._user)
+        except aiohttp.ClientResponseError as e:
+            if e.status == status.HTTP_404_NOT_FOUND:
+                raise TaskNotFoundException
+            raise e
+
+    async def complete_task(
+        self, task_id: str, idempotency_key: str | None = None
+    ) -> NoReturn:
+        response = await self._client.post(
+            self._get_complete_url(task_id),
+            headers=self._get_write_headers(idempotency_key),
+            endpoint="tasks:complete",
+        )
+        await self._client.invalidate(self._user.user_id, "tasks")
+        try:
+            response.raise_for_status()
+
+        except aiohttp.ClientResponseError as e:
+            match e.status:
+                case status.HTTP_404_NOT_FOUND:
+                    raise TaskNotFoundException
+                case status.HTTP_409_CONFLICT:
+                    raise TaskAlreadyDoneException
+                case status.HTTP_403_FORBIDDEN:
+                    raise TaskAnotherAuthorException
+                case _:
                     raise e
+        self._emit("completed", task_id)
 
-    async def complete_task(self, task_id: str) -> NoReturn:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                self._get_complete_url(task_id), headers=self.headers
-            ) as response:
-                try:
-                    response.raise_for_status()
-
-                except aiohttp.ClientResponseError as e:
-                    match e.status:
-                        case status.HTTP_404_NOT_FOUND:
-                            raise TaskNotFoundException
-                        case status.HTTP_409_CONFLICT:
-                            raise TaskAlreadyDoneException
-                        case status.HTTP_403_FORBIDDEN:
-                            raise TaskAnotherAuthorException
-                        case _:
-                            raise e
-
-    async def delete_task(self, task_id):
-        async with aiohttp.ClientSession() as session:
-            async with session.delete(
-                self._get_detail_url(task_id), headers=self.headers
-            ) as response:
+    async def delete_task(
+        self, task_id: str, idempotency_key: str | None = None
+    ):
+        response = await self._client.delete(
+            self._get_detail_url(task_id),
+            headers=self._get_write_headers(idempotency_key),
+            endpoint="tasks:delete",
+        )
+        await self._client.invalidate(self._user.user_id, "tasks")
+        try:
+            response.raise_for_status()
+        except aiohttp.ClientResponseError as e:
+            if e.status == status.HTTP_403_FORBIDDEN:
+                raise TaskAnotherAuthorException
+            raise e
+        self._emit("deleted", task_id)
+
+    async def _run_batch(
+        self,
+        operation: Callable[[str], Awaitable[None]],
+        task_ids: list[str],
+        concurrency: int | None,
+    ) -> list[TaskBatchResult]:
+        """Выполняет операцию над несколькими задачами параллельно, не
+        больше concurrency запросов одновременно (через общий пул
+        соединений клиента). Ошибка одной задачи не прерывает остальные.
+        """
+
+        semaphore = asyncio.Semaphore(
+            concurrency or settings.TASKS_BATCH_CONCURRENCY
+        )
+
+        async def run(task_id: str) -> TaskBatchResult:
+            async with semaphore:
                 try:
-                    response.raise_for_status()
-                except aiohttp.ClientResponseError as e:
-                    if e.status == status.HTTP_403_FORBIDDEN:
-                        raise TaskAnotherAuthorException
-                    raise e
+                    await operation(task_id)
+                except ServerException as e:
+                    error = e
+                except aiohttp.ClientError:
+                    error = ServerException()
+                else:
+                    return TaskBatchResult(task_id)
+            count_server_error(error)
+            return TaskBatchResult(task_id, error)
+
+        return await asyncio.gather(*(run(task_id) for task_id in task_ids))
+
+    async def complete_tasks(
+        self, task_ids: list[str], concurrency: int | None = None
+    ) -> list[TaskBatchResult]:
+        return await self._run_batch(self.complete_task, task_ids, concurrency)
+
+    async def delete_tasks(
+        self, task_ids: list[str], concurrency: int | None = None
+    ) -> list[TaskBatchResult]:
+        return await self._run_batch(self.delete_task, task_ids, concurrency)
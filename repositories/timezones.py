@@ -0,0 +1,53 @@
+import sqlite3
+import threading
+from pathlib import Path
+
+
+class UserTimezoneRepository:
+    def __init__(self, path: str):
+        """Часовые пояса, выбранные пользователями. Хранятся в SQLite,
+        для пользователей без записи используется пояс по умолчанию.
+
+        get и set обращаются к диску, из event loop их вызывают через
+        asyncio.to_thread; соединение общее для потоков и защищено
+        блокировкой.
+        """
+
+        self._path = path
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        if self._connection is not None:
+            return
+        Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self._path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS user_timezones "
+            "(user_id TEXT PRIMARY KEY, timezone TEXT NOT NULL) "
+            "WITHOUT ROWID"
+        )
+
+    def get(self, user_id: str) -> str | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT timezone FROM user_timezones WHERE user_id = ?",
+                (user_id,),
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def set(self, user_id: str, timezone: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO user_timezones (user_id, timezone) "
+                "VALUES (?, ?) ON CONFLICT (user_id) "
+                "DO UPDATE SET timezone = excluded.timezone",
+                (user_id, timezone),
+            )
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
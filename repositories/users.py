@@ -5,12 +5,17 @@ import aiohttp
 from config import settings
 from entities.users import User
 from exceptions.users import UserNotFoundException
+from repositories.client import HttpClient
+from repositories.singleflight import single_flight
 from schemas.users import UserSchema
 
 TelegramUserId = TypeVar("TelegramUserId")
 
 
 class UserRepository:
+    def __init__(self, client: HttpClient):
+        self._client = client
+
     @staticmethod
     def _get_list_url() -> str:
         return f"{settings.API_URL}/api/v1/users/"
@@ -29,29 +34,28 @@ class UserRepository:
         }
 
     async def create_user(self, user: User) -> UserSchema:
-        async with aiohttp.ClientSession() as session:
-            payload = self._get_create_payload(user)
-            async with session.post(
-                self._get_list_url(), json=payload
-            ) as response:
-                response.raise_for_status()
-                user = await response.json()
-                user_entity = User.to_entity(user)
-                return UserSchema.to_schema(user_entity)
-
+        payload = self._get_create_payload(user)
+        response = await self._client.post(
+            self._get_list_url(), json=payload, endpoint="users:create"
+        )
+        response.raise_for_status()
+        user = response.json()
+        user_entity = User.to_entity(user)
+        return UserSchema.to_schema(user_entity)
+
+    @single_flight
     async def get_user_by_user_id(
         self, user_id: TelegramUserId
     ) -> UserSchema | None:
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(
-                    self._get_detail_url(user_id)
-                ) as response:
-                    response.raise_for_status()
-                    user = await response.json()
-                    user_entity = User.to_entity(user)
-                    return UserSchema.to_schema(user_entity)
-            except aiohttp.ClientResponseError as e:
-                if e.status == 404:
-                    raise UserNotFoundException
-                raise e
+        response = await self._client.get(
+            self._get_detail_url(user_id), endpoint="users:detail"
+        )
+        try:
+            response.raise_for_status()
+            user = response.json()
+            user_entity = User.to_entity(user)
+            return UserSchema.to_schema(user_entity)
+        except aiohttp.ClientResponseError as e:
+            if e.status == 404:
+                raise UserNotFoundException
+            raise e
@@ -0,0 +1,13 @@
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class PageSchema(BaseModel, Generic[T]):
+    """Страница списка бэкенда в формате DRF пагинации."""
+
+    results: list[T]
+    next: str | None = None
+    previous: str | None = None
@@ -1,12 +1,19 @@
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Iterable
+from typing import Any, Iterable
 
-import pytz
-from pydantic import BaseModel, Field
+from pydantic import (
+    BaseModel,
+    Field,
+    ValidationInfo,
+    field_validator,
+    model_validator,
+)
 
 from entities.categories import Category
 from entities.tasks import Task
 from enums.tasks import TaskStatusEnum
+from exceptions.base import ServerException
 from schemas.categories import CategorySchema
 from schemas.users import UserSchema
 
@@ -17,11 +24,29 @@ class TaskSchema(BaseModel):
     deadline: datetime
     status: TaskStatusEnum
     id: str | None = None
-    categories: Iterable[CategorySchema] | None = Field(default=None)
+    categories: list[CategorySchema] | None = Field(default=None)
     created_at: datetime | None = Field(default=None)
     completed_at: datetime | None = Field(default=None)
     description: str | None = Field(default=None)
 
+    @model_validator(mode="before")
+    @classmethod
+    def set_user(cls, data: Any, info: ValidationInfo) -> Any:
+        # бэкенд не отдаёт пользователя целиком, он берётся из контекста
+        if isinstance(data, dict) and info.context and "user" in info.context:
+            data = {
+                **data,
+                "user": UserSchema.to_schema(info.context["user"]),
+            }
+        return data
+
+    @field_validator("status", mode="before")
+    @classmethod
+    def parse_status(cls, value: Any) -> Any:
+        if isinstance(value, int):
+            return TaskStatusEnum.from_value(value)
+        return value
+
     @classmethod
     def to_schema(cls, task: Task) -> "TaskSchema":
         return cls(
@@ -39,7 +64,7 @@ class TaskSchema(BaseModel):
     @classmethod
     def get_categories(
         cls, categories: Iterable[Category] | None
-    ) -> Iterable[CategorySchema] | None:
+    ) -> list[CategorySchema] | None:
         if categories:
             return [
                 CategorySchema.to_schema(category) for category in categories
@@ -53,16 +78,14 @@ class TaskShortSchema(BaseModel):
     deadline: datetime
     created_at: datetime
 
-    @classmethod
-    def to_schema(cls, task: Task) -> "TaskShortSchema":
-        return cls(
-            id=task.id,
-            title=task.title,
-            deadline=cls.get_correct_tz_date(task.deadline),
-            created_at=cls.get_correct_tz_date(task.created_at),
-        )
 
-    @classmethod
-    def get_correct_tz_date(cls, date: datetime):
-        tz = pytz.timezone("America/Adak")
-        return date.astimezone(tz)
+@dataclass(frozen=True)
+class TaskBatchResult:
+    """Результат массовой операции для одной задачи."""
+
+    task_id: str
+    error: ServerException | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
@@ -0,0 +1,217 @@
+import logging
+
+from aiohttp import web
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    generate_latest,
+)
+
+from middlewares.fingerprints import EditDeduplicationMiddleware
+from middlewares.inflight import InFlightMiddleware
+from middlewares.outbound import OutboundRateLimiter
+from repositories.client import HttpClient
+from repositories.policy import CircuitBreaker
+from services.outbox import TaskOutbox
+from services.reminders import ReminderScheduler
+from utils.metrics import CounterCallback, GaugeCallback
+
+logger = logging.getLogger(__name__)
+
+
+def create_metrics_app(registry: CollectorRegistry) -> web.Application:
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(
+            body=generate_latest(registry),
+            headers={"Content-Type": CONTENT_TYPE_LATEST},
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    return app
+
+
+def register_runtime_metrics(
+    registry: CollectorRegistry,
+    *,
+    http_client: HttpClient,
+    outbound: OutboundRateLimiter,
+    edits: EditDeduplicationMiddleware,
+    reminders: ReminderScheduler,
+    outbox: TaskOutbox,
+    in_flight: InFlightMiddleware,
+) -> None:
+    """Метрики из статистики, которую компоненты уже собирают сами."""
+
+    registry.register(
+        GaugeCallback(
+            "bot_updates_in_flight",
+            "Апдейты, которые сейчас обрабатываются",
+            (),
+            lambda: [((), in_flight.in_flight)],
+        )
+    )
+    registry.register(
+        GaugeCallback(
+            "bot_outbound_waiting",
+            "Вызовы Bot API, ждущие лимита, по полосам",
+            ("lane",),
+            lambda: [
+                ((lane.name.lower(),), count)
+                for lane, count in outbound.stats.waiting.items()
+            ],
+        )
+    )
+    registry.register(
+        CounterCallback(
+            "bot_outbound_calls_total",
+            "Вызовы Bot API по результату",
+            ("result",),
+            lambda: [
+                (("sent",), outbound.stats.sent),
+                (("retried",), outbound.stats.retried),
+                (("dropped",), outbound.stats.dropped),
+            ],
+        )
+    )
+    registry.register(
+        CounterCallback(
+            "bot_message_edits_total",
+            "Изменения сообщений: отправленные и пропущенные без изменений",
+            ("result",),
+            lambda: [
+                (("edited",), edits.stats.edited),
+                (("skipped",), edits.stats.skipped),
+            ],
+        )
+    )
+    registry.register(
+        GaugeCallback(
+            "bot_message_fingerprints",
+            "Сообщения с запомненным отпечатком",
+            (),
+            lambda: [((), len(edits))],
+        )
+    )
+    registry.register(
+        GaugeCallback(
+            "bot_reminders_pending",
+            "Запланированные напоминания",
+            (),
+            lambda: [((), reminders.stats.pending)],
+        )
+    )
+    registry.register(
+        CounterCallback(
+            "bot_reminders_total",
+            "Напоминания по результату",
+            ("result",),
+            lambda: [
+                (("fired",), reminders.stats.fired),
+                (("failed",), reminders.stats.failed),
+                (("dropped",), reminders.stats.dropped),
+            ],
+        )
+    )
+    registry.register(
+        GaugeCallback(
+            "bot_outbox_pending",
+            "Отложенные изменения задач, ждущие бэкенда",
+            (),
+            lambda: [((), outbox.pending)],
+        )
+    )
+    registry.register(
+        CounterCallback(
+            "bot_outbox_operations_total",
+            "Отложенные изменения задач по результату",
+            ("result",),
+            lambda: [
+                ((name,), value) for name, value in vars(outbox.stats).items()
+            ],
+        )
+    )
+    registry.register(
+        CounterCallback(
+            "bot_single_flight_calls_total",
+            "Чтения репозиториев через single flight",
+            ("result",),
+            lambda: [
+                (
+                    ("executed",),
+                    http_client.single_flight.stats.calls
+                    - http_client.single_flight.stats.deduplicated,
+                ),
+                (
+                    ("deduplicated",),
+                    http_client.single_flight.stats.deduplicated,
+                ),
+            ],
+        )
+    )
+    if http_client.cache is not None:
+        registry.register(
+            CounterCallback(
+                "bot_cache_requests_total",
+                "Обращения к кешу ответов бэкенда",
+                ("endpoint", "result"),
+                lambda: [
+                    item
+                    for endpoint, stats in http_client.cache.stats.items()
+                    for item in (
+                        ((endpoint, "hit"), stats.hits),
+                        ((endpoint, "miss"), stats.misses),
+                        ((endpoint, "error"), stats.errors),
+                    )
+                ],
+            )
+        )
+    if http_client.policy is not None:
+        policy = http_client.policy
+        registry.register(
+            CounterCallback(
+                "bot_backend_policy_total",
+                "Повторы, таймауты и отказы политики запросов к бэкенду",
+                ("event",),
+                lambda: [
+                    ((name,), value)
+                    for name, value in vars(policy.stats).items()
+                ],
+            )
+        )
+        registry.register(
+            GaugeCallback(
+                "bot_backend_circuit_open",
+                "1, если предохранитель запросов к бэкенду разомкнут",
+                (),
+                lambda: [((), policy.breaker.state != CircuitBreaker.CLOSED)],
+            )
+        )
+
+
+class MetricsServer:
+    def __init__(self, registry: CollectorRegistry, host: str, port: int):
+        """Отдельный локальный HTTP сервер с /metrics. Поднимается в
+        хуке startup диспетчера, поэтому в шардированном режиме у каждого
+        воркера свой порт (см. set_shard)."""
+
+        self._registry = registry
+        self._host = host
+        self._port = port
+        self._runner: web.AppRunner | None = None
+
+    def set_shard(self, index: int) -> None:
+        self._port += index
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(create_metrics_app(self._registry))
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self._host, self._port).start()
+        logger.info(
+            "Метрики доступны на http://%s:%s/metrics", self._host, self._port
+        )
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,26 @@
+import asyncio
+
+from aiogram import Bot, Dispatcher
+
+
+async def run_polling(
+    dispatcher: Dispatcher, bot: Bot, *, drop_pending_updates: bool = False
+) -> None:
+    """Long polling, который корректно останавливается при отмене.
+
+    Отмена задачи start_polling не останавливает внутренний цикл
+    getUpdates, поэтому при отмене вызывается stop_polling и
+    дожидается штатного завершения вместе с хуками shutdown.
+    """
+
+    await bot.delete_webhook(drop_pending_updates=drop_pending_updates)
+    polling = asyncio.create_task(
+        dispatcher.start_polling(bot, handle_signals=False)
+    )
+    try:
+        await asyncio.shield(polling)
+    except asyncio.CancelledError:
+        if not polling.done():
+            await dispatcher.stop_polling()
+        await polling
+        raise
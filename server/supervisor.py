@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import random
+import signal
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SupervisorStats:
+    starts: int = 0
+    crashes: int = 0
+    consecutive_crashes: int = 0
+    last_error: str | None = None
+
+
+class Supervisor:
+    def __init__(
+        self,
+        run: Callable[[bool], Awaitable[None]],
+        *,
+        drop_pending_updates_on_start: bool = False,
+        min_backoff: float = 1,
+        max_backoff: float = 60,
+        reset_after: float = 60,
+    ):
+        """Перезапускает упавший бот с экспоненциальной задержкой.
+
+        Задержка выбирается случайно из [0, min(max_backoff,
+        min_backoff * 2 ** n)], где n - число падений подряд. Если бот
+        проработал дольше reset_after, счётчик падений подряд
+        сбрасывается. Всё работает в одном event loop.
+
+        :param run: корутина запуска бота; аргумент - нужно ли сбросить
+        накопившиеся апдейты. Сброс возможен только при первом запуске
+        процесса, при перезапусках апдейты сохраняются.
+        """
+
+        self._run = run
+        self._drop_pending_updates_on_start = drop_pending_updates_on_start
+        self._min_backoff = min_backoff
+        self._max_backoff = max_backoff
+        self._reset_after = reset_after
+        self._stopping = False
+        self._stop_event = asyncio.Event()
+        self._current: asyncio.Task | None = None
+        self.stats = SupervisorStats()
+
+    def _backoff(self) -> float:
+        ceiling = self._min_backoff * 2 ** (self.stats.consecutive_crashes - 1)
+        return random.uniform(0, min(self._max_backoff, ceiling))
+
+    def stop(self) -> None:
+        """Останавливает бота. Обработчики, которые уже выполняются,
+        дорабатывают в хуках shutdown диспетчера."""
+
+        if self._stopping:
+            return
+        logger.info("Получен сигнал остановки")
+        self._stopping = True
+        self._stop_event.set()
+        if self._current is not None:
+            self._current.cancel()
+
+    def _install_signal_handlers(self) -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except NotImplementedError:  # pragma: no cover - Windows
+                pass
+
+    async def _sleep(self, delay: float) -> None:
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def run(self) -> None:
+        self._install_signal_handlers()
+        while not self._stopping:
+            drop_pending = (
+                self._drop_pending_updates_on_start and not self.stats.starts
+            )
+            self.stats.starts += 1
+            started_at = time.monotonic()
+            self._current = asyncio.create_task(self._run(drop_pending))
+            try:
+                await self._current
+                error = None
+            except asyncio.CancelledError:
+                if not self._stopping:
+                    raise
+                break
+            except Exception as e:
+                error = e
+            finally:
+                self._current = None
+            if self._stopping:
+                break
+
+            self.stats.crashes += 1
+            if time.monotonic() - started_at > self._reset_after:
+                self.stats.consecutive_crashes = 0
+            self.stats.consecutive_crashes += 1
+            self.stats.last_error = repr(error)
+            delay = self._backoff()
+            logger.error(
+                "Бот остановился (%s подряд, всего %s), перезапуск через %.1f с",
+                self.stats.consecutive_crashes,
+                self.stats.crashes,
+                delay,
+                exc_info=error,
+            )
+            await self._sleep(delay)
@@ -0,0 +1,141 @@
+import asyncio
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import (
+    SimpleRequestHandler,
+    setup_application,
+)
+from aiohttp import web
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        max_concurrent_updates: int,
+        secret_token: str | None = None,
+        **data: Any,
+    ):
+        """Обработчик вебхука с ограничением числа одновременно
+        обрабатываемых апдейтов.
+
+        Апдейты обрабатываются в фоне, но пока все слоты заняты, ответ
+        Telegram задерживается. Так Telegram сам притормаживает отправку,
+        а не копит у нас неограниченную очередь задач.
+        """
+
+        super().__init__(
+            dispatcher,
+            bot,
+            handle_in_background=True,
+            secret_token=secret_token,
+            **data,
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrent_updates)
+
+    async def _handle_request_background(
+        self, bot: Bot, request: web.Request
+    ) -> web.Response:
+        await self._semaphore.acquire()
+        try:
+            return await super()._handle_request_background(bot, request)
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    async def _background_feed_update(self, bot: Bot, update: dict) -> None:
+        try:
+            await super()._background_feed_update(bot, update)
+        finally:
+            self._semaphore.release()
+
+
+def create_webhook_app(
+    dispatcher: Dispatcher,
+    bot: Bot,
+    *,
+    path: str,
+    secret_token: str,
+    max_concurrent_updates: int,
+) -> web.Application:
+    app = web.Application()
+    # хуки shutdown диспетчера (в т.ч. ожидание обработчиков) должны
+    # отработать до закрытия сессии бота в обработчике вебхука
+    setup_application(app, dispatcher, bot=bot)
+    BoundedRequestHandler(
+        dispatcher,
+        bot,
+        max_concurrent_updates=max_concurrent_updates,
+        secret_token=secret_token,
+    ).register(app, path=path)
+    return app
+
+
+async def serve_webhook(
+    app: web.Application,
+    bot: Bot,
+    *,
+    base_url: str,
+    path: str,
+    secret_token: str,
+    host: str,
+    port: int,
+    max_connections: int,
+    allowed_updates: list[str],
+    drop_pending_updates: bool = False,
+) -> None:
+    """Поднимает aiohttp приложение, регистрирует вебхук в Telegram и
+    работает до отмены."""
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+        await bot.set_webhook(
+            url=f"{base_url.rstrip('/')}{path}",
+            secret_token=secret_token,
+            max_connections=min(max_connections, 100),
+            allowed_updates=allowed_updates,
+            drop_pending_updates=drop_pending_updates,
+        )
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+async def run_webhook(
+    dispatcher: Dispatcher,
+    bot: Bot,
+    *,
+    base_url: str,
+    path: str,
+    secret_token: str,
+    host: str,
+    port: int,
+    max_concurrent_updates: int,
+    drop_pending_updates: bool = False,
+) -> None:
+    """Вебхук с обработкой апдейтов в этом же процессе. Хуки
+    startup/shutdown диспетчера вызываются сервером."""
+
+    app = create_webhook_app(
+        dispatcher,
+        bot,
+        path=path,
+        secret_token=secret_token,
+        max_concurrent_updates=max_concurrent_updates,
+    )
+    await serve_webhook(
+        app,
+        bot,
+        base_url=base_url,
+        path=path,
+        secret_token=secret_token,
+        host=host,
+        port=port,
+        max_connections=max_concurrent_updates,
+        allowed_updates=dispatcher.resolve_used_update_types(),
+        drop_pending_updates=drop_pending_updates,
+    )
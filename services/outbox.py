@@ -0,0 +1,304 @@
+import asyncio
+import logging
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator
+
+import aiohttp
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+from aiogram.utils.text_decorations import html_decoration
+
+from entities.users import User
+from enums.outbox import OutboxResultEnum
+from exceptions.backend import BackendUnavailableException
+from exceptions.base import ServerException
+from exceptions.constants import status
+from exceptions.tasks import TaskAlreadyDoneException
+from messages.tasks import OUTBOX_FAILED
+from middlewares.outbound import bulk_sending
+from repositories.client import HttpClient
+from repositories.filters import TaskFilter
+from repositories.outbox import (
+    OutboxAction,
+    OutboxOperation,
+    TaskOutboxRepository,
+)
+from repositories.tasks import TaskRepository
+from utils.metrics import count_server_error
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutboxStats:
+    queued: int = 0
+    replayed: int = 0
+    rejected: int = 0
+
+
+class TaskOutbox:
+    def __init__(
+        self,
+        bot: Bot,
+        client: HttpClient,
+        repository: TaskOutboxRepository,
+        *,
+        retry_interval: float = 15,
+        drain_concurrency: int = 5,
+        direct_timeout: float = 2,
+    ):
+        """Отложенная отправка изменений задач, когда бэкенд недоступен.
+
+        Создание, завершение и удаление задачи сначала отправляются
+        сразу, но не дольше direct_timeout секунд. Если бэкенд
+        недоступен (BackendUnavailableException: таймаут, 5xx,
+        разомкнутый предохранитель), не ответил за direct_timeout или у
+        пользователя уже есть отложенные операции, операция сохраняется
+        в TaskOutboxRepository, а пользователь получает подтверждение.
+        Операции одного пользователя принимаются по очереди, поэтому
+        следующая не обгонит предыдущую, пока та ждёт бэкенд. Фоновый разборщик раз в retry_interval отправляет
+        операции каждого пользователя по порядку, пользователей -
+        параллельно. Если бэкенд отклонил операцию (исключения из
+        exceptions.tasks), пользователю отправляется сообщение с
+        причиной.
+
+        Операция, ответ на которую не пришёл (таймаут), могла дойти до
+        бэкенда. У каждой операции свой заголовок Idempotency-Key, один
+        и тот же при всех попытках, но поддержка его бэкендом не
+        гарантирована, поэтому повтор безопасен и без неё (см. _replay).
+        """
+
+        self._bot = bot
+        self._client = client
+        self._repository = repository
+        self._retry_interval = retry_interval
+        self._drain_concurrency = drain_concurrency
+        self._direct_timeout = direct_timeout
+        self._user_locks: dict[str, asyncio.Lock] = {}
+        self._lock_waiters: Counter[str] = Counter()
+        self._shard = (0, 1)
+        self._wake = asyncio.Event()
+        self._drainer: asyncio.Task | None = None
+        self.stats = OutboxStats()
+
+    @property
+    def pending(self) -> int:
+        return len(self._repository)
+
+    def set_shard(self, index: int, count: int) -> None:
+        """В шардированном режиме воркер отправляет только операции
+        своих пользователей - только он их и добавляет."""
+
+        self._shard = (index, count)
+
+    def _is_own(self, user_id: str) -> bool:
+        index, count = self._shard
+        return count == 1 or int(user_id) % count == index
+
+    @staticmethod
+    async def _run(
+        repository: TaskRepository,
+        action: OutboxAction,
+        task_id: str | None,
+        payload: dict | None,
+        idempotency_key: str,
+    ) -> None:
+        match action:
+            case "create":
+                await repository.create_task(payload, idempotency_key)
+            case "complete":
+                await repository.complete_task(task_id, idempotency_key)
+            case "delete":
+                await repository.delete_task(task_id, idempotency_key)
+
+    @asynccontextmanager
+    async def _user_lock(self, user_id: str) -> AsyncIterator[None]:
+        lock = self._user_locks.setdefault(user_id, asyncio.Lock())
+        self._lock_waiters[user_id] += 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._lock_waiters[user_id] -= 1
+            if not self._lock_waiters[user_id]:
+                del self._lock_waiters[user_id]
+                del self._user_locks[user_id]
+
+    async def submit(
+        self,
+        user: User,
+        action: OutboxAction,
+        *,
+        task_id: str | None = None,
+        payload: dict | None = None,
+    ) -> OutboxResultEnum:
+        """Выполняет операцию или откладывает её.
+
+        :return: DONE, если операция выполнена сразу, QUEUED - если
+        отложена из-за недоступности бэкенда, QUEUED_BEHIND - если
+        отложена, чтобы не обогнать ещё не отправленные операции
+        пользователя. Ошибки бэкенда, кроме недоступности,
+        пробрасываются.
+        """
+
+        idempotency_key = uuid.uuid4().hex
+        async with self._user_lock(user.user_id):
+            result = OutboxResultEnum.QUEUED_BEHIND
+            if not self._repository.has_pending(user.user_id):
+                try:
+                    # при повторе дубль отсекается в _replay, поэтому
+                    # прерванная попытка безопасна
+                    async with asyncio.timeout(self._direct_timeout):
+                        await self._run(
+                            TaskRepository(user, self._client),
+                            action,
+                            task_id,
+                            payload,
+                            idempotency_key,
+                        )
+                    return OutboxResultEnum.DONE
+                except (BackendUnavailableException, TimeoutError):
+                    result = OutboxResultEnum.QUEUED
+            await asyncio.to_thread(
+                self._repository.add,
+                user.user_id,
+                action,
+                task_id,
+                payload,
+                idempotency_key,
+            )
+            self.stats.queued += 1
+            return result
+
+    @staticmethod
+    async def _find_created(repository: TaskRepository, payload: dict) -> bool:
+        """Есть ли уже активная задача с заголовком и дедлайном
+        payload."""
+
+        if "deadline" not in payload:
+            return False
+        deadline = datetime.fromisoformat(payload["deadline"])
+        # задачи упорядочены по дедлайну, дальше нужного не читаем
+        async for task in repository.iter_tasks(TaskFilter(is_active=True)):
+            if task.deadline > deadline:
+                break
+            if task.deadline == deadline and task.title == payload["title"]:
+                return True
+        return False
+
+    async def _replay(
+        self, repository: TaskRepository, operation: OutboxOperation
+    ) -> None:
+        """Повтор отложенной операции, которая могла уже выполниться
+        предыдущей попыткой. Создание пропускается, если такая задача
+        уже есть; уже завершённая или удалённая задача считается
+        успехом."""
+
+        if operation.action == "create" and await self._find_created(
+            repository, operation.payload
+        ):
+            return
+        try:
+            await self._run(
+                repository,
+                operation.action,
+                operation.task_id,
+                operation.payload,
+                operation.idempotency_key,
+            )
+        except TaskAlreadyDoneException:
+            return
+        except aiohttp.ClientResponseError as e:
+            if not (
+                operation.action == "delete"
+                and e.status == status.HTTP_404_NOT_FOUND
+            ):
+                raise
+
+    async def _drain_user(
+        self, user_id: str, semaphore: asyncio.Semaphore
+    ) -> None:
+        # бэкенду достаточно User-Id, остальные поля не отправляются
+        repository = TaskRepository(
+            User(user_id, None, None, None), self._client
+        )
+        async with semaphore:
+            while operation := await asyncio.to_thread(
+                self._repository.first, user_id
+            ):
+                try:
+                    await self._replay(repository, operation)
+                except BackendUnavailableException:
+                    return
+                except ServerException as e:
+                    await self._reject(operation, e)
+                except aiohttp.ClientResponseError as e:
+                    logger.warning(
+                        "Отложенная операция %s отклонена: %s", operation, e
+                    )
+                    await self._reject(operation, ServerException())
+                else:
+                    self.stats.replayed += 1
+                await asyncio.to_thread(self._repository.remove, operation)
+
+    async def _reject(
+        self, operation: OutboxOperation, error: ServerException
+    ) -> None:
+        self.stats.rejected += 1
+        count_server_error(error)
+        # название задачи и текст ошибки попадают в HTML
+        title = (operation.payload or {}).get("title", "")
+        text = OUTBOX_FAILED[operation.action].format(
+            title=html_decoration.quote(title),
+            error=html_decoration.quote(error.message),
+        )
+        try:
+            with bulk_sending():
+                await self._bot.send_message(
+                    int(operation.user_id), text, parse_mode="HTML"
+                )
+        except TelegramAPIError as e:
+            logger.warning(
+                "Сообщение об отклонённой операции для %s не отправлено: %s",
+                operation.user_id,
+                e,
+            )
+
+    async def drain(self) -> None:
+        semaphore = asyncio.Semaphore(self._drain_concurrency)
+        await asyncio.gather(
+            *(
+                self._drain_user(user_id, semaphore)
+                for user_id in self._repository.pending_user_ids()
+                if self._is_own(user_id)
+            )
+        )
+
+    async def _drain_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self._retry_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.drain()
+            except Exception:
+                logger.exception("Ошибка отправки отложенных операций")
+
+    async def start(self) -> None:
+        self._repository.load()
+        self._drainer = asyncio.create_task(self._drain_loop())
+        if len(self._repository):
+            self._wake.set()
+
+    async def stop(self) -> None:
+        if self._drainer is not None:
+            self._drainer.cancel()
+            await asyncio.gather(self._drainer, return_exceptions=True)
+            self._drainer = None
+        self._repository.close()
@@ -0,0 +1,331 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+
+from entities.users import User
+from messages.reminders import REMINDER_DUE_SOON, REMINDER_OVERDUE
+from middlewares.outbound import bulk_sending
+from repositories.client import HttpClient
+from repositories.events import TaskEvent, TaskEvents
+from repositories.filters import TaskFilter
+from repositories.known_users import KnownUsersRepository
+from repositories.reminders import SentRemindersRepository
+from repositories.tasks import TaskRepository
+from services.timezones import TimezoneService
+from utils.tasks import get_date_strf
+
+logger = logging.getLogger(__name__)
+
+DUE_SOON = 0
+OVERDUE = 1
+
+
+@dataclass
+class ReminderStats:
+    pending: int = 0
+    fired: int = 0
+    failed: int = 0
+    dropped: int = 0
+
+
+class ReminderScheduler:
+    def __init__(
+        self,
+        bot: Bot,
+        client: HttpClient,
+        known_users: KnownUsersRepository,
+        timezones: TimezoneService,
+        events: TaskEvents,
+        sent: SentRemindersRepository,
+        *,
+        lead: float = 60 * 60,
+        overdue_grace: float = 24 * 60 * 60,
+        horizon: float = 6 * 60 * 60,
+        refresh_interval: float = 30 * 60,
+        max_pending: int = 200_000,
+        fetch_concurrency: int = 10,
+        send_concurrency: int = 20,
+    ):
+        """Напоминания о дедлайнах: за lead секунд до дедлайна и в момент
+        просрочки.
+
+        Задачи с дедлайном в ближайшие horizon секунд подгружаются с
+        бэкенда раз в refresh_interval и лежат в куче по времени
+        срабатывания, поэтому память ограничена окном (и max_pending), а
+        не числом всех задач. Создание, изменение, завершение и удаление
+        задач через TaskRepository обновляют кучу сразу (events).
+        Отменённые напоминания не удаляются из кучи, а пропускаются при
+        срабатывании по номеру версии.
+
+        Отправленные напоминания запоминаются в sent. Просрочка, о
+        которой ещё не напомнили (бот не работал или задачу создали с
+        прошедшим дедлайном), отправляется сразу, если прошло не больше
+        overdue_grace секунд.
+
+        Уведомления уходят в полосе массовых рассылок исходящей очереди,
+        поэтому не мешают ответам пользователям. Задачи читаются через
+        эндпоинт reminders:list: без повторов и без влияния на
+        предохранитель запросов пользователей.
+        """
+
+        self._bot = bot
+        self._client = client
+        self._known_users = known_users
+        self._timezones = timezones
+        self._events = events
+        self._sent = sent
+        self._lead = lead
+        self._overdue_grace = overdue_grace
+        self._horizon = horizon
+        self._refresh_interval = refresh_interval
+        self._max_pending = max_pending
+        self._fetch_concurrency = fetch_concurrency
+        self._send_semaphore = asyncio.Semaphore(send_concurrency)
+        # (user_id, task_id) -> (версия, заголовок, дедлайн)
+        self._tasks: dict[tuple[str, str], tuple[int, str, float]] = {}
+        # (время срабатывания, порядковый номер, user_id, task_id, вид,
+        # версия)
+        self._heap: list[tuple[float, int, str, str, int, int]] = []
+        self._sequence = itertools.count()
+        self._versions = itertools.count()
+        self._wake = asyncio.Event()
+        self._shard = (0, 1)
+        self._background: set[asyncio.Task] = set()
+        self.stats = ReminderStats()
+
+    def set_shard(self, index: int, count: int) -> None:
+        """В шардированном режиме воркер напоминает только своим
+        пользователям - тем, чьи апдейты он и так обрабатывает."""
+
+        self._shard = (index, count)
+
+    def _is_own(self, user_id: str) -> bool:
+        index, count = self._shard
+        return count == 1 or int(user_id) % count == index
+
+    def _push(self, fire_at: float, key: tuple[str, str], kind: int) -> None:
+        version = self._tasks[key][0]
+        entry = (fire_at, next(self._sequence), *key, kind, version)
+        if not self._heap or fire_at < self._heap[0][0]:
+            self._wake.set()
+        heapq.heappush(self._heap, entry)
+
+    def schedule(
+        self, user_id: str, task_id: str, title: str, deadline: datetime
+    ) -> None:
+        key = (user_id, str(task_id))
+        timestamp = deadline.timestamp()
+        current = self._tasks.get(key)
+        if current is not None and current[1:] == (title, timestamp):
+            return
+        now = time.time()
+        if timestamp > now + self._horizon or (
+            timestamp <= now
+            and (
+                timestamp < now - self._overdue_grace
+                or self._sent.contains(*key, OVERDUE, timestamp)
+            )
+        ):
+            # дедлайн за окном (его подгрузит следующее обновление) или
+            # о просрочке уже напомнили либо она слишком давняя
+            self.cancel(user_id, task_id)
+            return
+        if current is None and len(self._tasks) >= self._max_pending:
+            self.stats.dropped += 1
+            return
+
+        self._tasks[key] = (next(self._versions), title, timestamp)
+        if timestamp - self._lead > now:
+            self._push(timestamp - self._lead, key, DUE_SOON)
+        self._push(timestamp, key, OVERDUE)
+        self.stats.pending = len(self._tasks)
+        self._compact()
+
+    def cancel(self, user_id: str, task_id: str) -> None:
+        self._tasks.pop((user_id, str(task_id)), None)
+        self.stats.pending = len(self._tasks)
+
+    def _compact(self) -> None:
+        # в куче копятся записи отменённых и перенесённых задач
+        if len(self._heap) > 4 * len(self._tasks) + 1024:
+            self._heap = [
+                entry
+                for entry in self._heap
+                if self._tasks.get((entry[2], entry[3]), (None,))[0]
+                == entry[5]
+            ]
+            heapq.heapify(self._heap)
+
+    def on_task_event(self, event: TaskEvent) -> None:
+        match event.action:
+            case "created" | "updated" if event.task is not None:
+                self.schedule(
+                    event.user_id,
+                    event.task_id,
+                    event.task.title,
+                    event.task.deadline,
+                )
+            case "completed" | "deleted":
+                self.cancel(event.user_id, event.task_id)
+
+    async def _load_user(
+        self, user_id: str, seen: set[tuple[str, str]]
+    ) -> None:
+        horizon = time.time() + self._horizon
+        repository = TaskRepository(
+            User(user_id=user_id, username="", first_name="", last_name=""),
+            self._client,
+        )
+        # задачи упорядочены по дедлайну, дальше окна не читаем
+        async for task in repository.iter_tasks(
+            TaskFilter(is_active=True), endpoint="reminders:list"
+        ):
+            if task.deadline.timestamp() > horizon:
+                break
+            self.schedule(user_id, task.id, task.title, task.deadline)
+            seen.add((user_id, str(task.id)))
+
+    def _cancel_missing(
+        self, loaded: dict[str, int], seen: set[tuple[str, str]]
+    ) -> None:
+        """Отменяет напоминания загруженных пользователей о задачах,
+        которых не было в ответе бэкенда. Запланированные после начала
+        загрузки пользователя (события TaskRepository) не трогаются."""
+
+        for key, (version, _, _) in list(self._tasks.items()):
+            started = loaded.get(key[0])
+            if started is not None and version < started and key not in seen:
+                del self._tasks[key]
+        self.stats.pending = len(self._tasks)
+
+    async def refresh(self) -> None:
+        """Подгружает дедлайны всех своих пользователей в окне.
+
+        Задачи, пропавшие из ответа (завершены или удалены на бэкенде,
+        в другом шарде или мимо TaskRepository), отменяются.
+        """
+
+        self._sent.prune(time.time() - self._overdue_grace)
+        semaphore = asyncio.Semaphore(self._fetch_concurrency)
+        # пользователь -> версия на начало его загрузки
+        loaded: dict[str, int] = {}
+        seen: set[tuple[str, str]] = set()
+
+        async def load(user_id: str) -> None:
+            version = next(self._versions)
+            try:
+                await self._load_user(user_id, seen)
+                loaded[user_id] = version
+            except Exception as e:
+                logger.warning(
+                    "Не удалось загрузить задачи пользователя %s: %r",
+                    user_id,
+                    e,
+                )
+            finally:
+                semaphore.release()
+
+        tasks = set()
+        try:
+            for user_id in self._known_users.iter_user_ids():
+                if not self._is_own(user_id):
+                    continue
+                await semaphore.acquire()
+                task = asyncio.create_task(load(user_id))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        self._cancel_missing(loaded, seen)
+        logger.info("Напоминаний в очереди: %s", len(self._tasks))
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Не удалось обновить напоминания")
+            await asyncio.sleep(self._refresh_interval)
+
+    async def _fire_loop(self) -> None:
+        while True:
+            delay = self._heap[0][0] - time.time() if self._heap else None
+            if delay is None or delay > 0:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, user_id, task_id, kind, version = heapq.heappop(self._heap)
+            current = self._tasks.get((user_id, task_id))
+            if current is None or current[0] != version:
+                continue
+            if kind == OVERDUE:
+                self.cancel(user_id, task_id)
+            if self._sent.contains(user_id, task_id, kind, current[2]):
+                # отправлено до перезапуска
+                continue
+            await self._send_semaphore.acquire()
+            task = asyncio.create_task(
+                self._notify(user_id, task_id, kind, current[1], current[2])
+            )
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    async def _notify(
+        self,
+        user_id: str,
+        task_id: str,
+        kind: int,
+        title: str,
+        deadline: float,
+    ) -> None:
+        try:
+            zone = await self._timezones.get_user_zone(user_id)
+            template = (
+                REMINDER_DUE_SOON if kind == DUE_SOON else REMINDER_OVERDUE
+            )
+            text = template.format(
+                title=title,
+                deadline=get_date_strf(datetime.fromtimestamp(deadline, zone)),
+            )
+            with bulk_sending():
+                await self._bot.send_message(int(user_id), text)
+            self.stats.fired += 1
+            self._sent.add(user_id, task_id, kind, deadline)
+        except TelegramAPIError as e:
+            # например, пользователь заблокировал бота
+            self.stats.failed += 1
+            logger.warning("Напоминание для %s не отправлено: %s", user_id, e)
+        except Exception:
+            self.stats.failed += 1
+            logger.exception("Напоминание для %s не отправлено", user_id)
+        finally:
+            self._send_semaphore.release()
+
+    async def start(self) -> None:
+        self._sent.load()
+        self._events.subscribe(self.on_task_event)
+        for loop in (self._refresh_loop(), self._fire_loop()):
+            task = asyncio.create_task(loop)
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    async def stop(self) -> None:
+        self._events.unsubscribe(self.on_task_event)
+        for task in self._background:
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        self._sent.close()
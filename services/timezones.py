@@ -0,0 +1,60 @@
+import asyncio
+from collections import OrderedDict
+
+import pytz
+from pytz.tzinfo import BaseTzInfo
+
+from exceptions.users import UnknownTimezoneException
+from repositories.timezones import UserTimezoneRepository
+from utils.timezones import get_zone
+
+
+class TimezoneService:
+    def __init__(
+        self,
+        repository: UserTimezoneRepository,
+        default: str,
+        max_size: int = 10_000,
+    ):
+        """Часовые пояса пользователей.
+
+        Пояс пользователя читается из хранилища один раз и дальше берётся
+        из LRU кеша на max_size пользователей. Пользователи без выбранного
+        пояса получают пояс по умолчанию.
+        """
+
+        self._repository = repository
+        self._max_size = max_size
+        self._zones: OrderedDict[str, BaseTzInfo] = OrderedDict()
+        self.default = get_zone(default)
+
+    async def load(self) -> None:
+        self._repository.load()
+
+    async def close(self) -> None:
+        self._repository.close()
+
+    def _remember(self, user_id: str, zone: BaseTzInfo) -> None:
+        self._zones[user_id] = zone
+        self._zones.move_to_end(user_id)
+        while len(self._zones) > self._max_size:
+            self._zones.popitem(last=False)
+
+    async def get_user_zone(self, user_id: str) -> BaseTzInfo:
+        zone = self._zones.get(user_id)
+        if zone is not None:
+            self._zones.move_to_end(user_id)
+            return zone
+        name = await asyncio.to_thread(self._repository.get, user_id)
+        zone = get_zone(name) if name else self.default
+        self._remember(user_id, zone)
+        return zone
+
+    async def set_user_zone(self, user_id: str, name: str) -> BaseTzInfo:
+        try:
+            zone = get_zone(name)
+        except pytz.UnknownTimeZoneError:
+            raise UnknownTimezoneException
+        await asyncio.to_thread(self._repository.set, user_id, zone.zone)
+        self._remember(user_id, zone)
+        return zone
@@ -0,0 +1,51 @@
+import asyncio
+from functools import partial
+
+from entities.users import User
+from exceptions.users import UserNotFoundException
+from repositories.client import HttpClient
+from repositories.known_users import KnownUsersRepository
+from repositories.singleflight import SingleFlight
+from repositories.users import UserRepository
+
+
+class UserRegistry:
+    def __init__(self, known_users: KnownUsersRepository):
+        """Регистрация пользователей с локальным кешем известных.
+
+        Уже известные пользователи не требуют запросов к бэкенду.
+        Одновременные /start от одного нового пользователя объединяются
+        в один запрос на создание.
+        """
+
+        self._known_users = known_users
+        self._registrations = SingleFlight()
+
+    async def load(self) -> None:
+        self._known_users.load()
+
+    async def close(self) -> None:
+        self._known_users.close()
+
+    async def register(self, user: User, client: HttpClient) -> bool:
+        """Убеждается, что пользователь есть на бэкенде.
+
+        :return: True, если пользователь был создан только что
+        """
+
+        if await asyncio.to_thread(self._known_users.contains, user.user_id):
+            return False
+
+        return await self._registrations.do(
+            user.user_id, partial(self._register, user, UserRepository(client))
+        )
+
+    async def _register(self, user: User, repository: UserRepository) -> bool:
+        try:
+            await repository.get_user_by_user_id(user.user_id)
+            is_new = False
+        except UserNotFoundException:
+            await repository.create_user(user)
+            is_new = True
+        await asyncio.to_thread(self._known_users.add, user.user_id)
+        return is_new
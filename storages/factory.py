@@ -0,0 +1,61 @@
+from typing import TYPE_CHECKING
+
+from aiogram.fsm.storage.base import (
+    BaseEventIsolation,
+    BaseStorage,
+    DefaultKeyBuilder,
+)
+from aiogram.fsm.storage.memory import MemoryStorage, SimpleEventIsolation
+
+from config import Settings
+from storages.serialization import dumps, loads
+from storages.sqlite import SQLiteStorage
+
+if TYPE_CHECKING:
+    from aiogram.fsm.storage.redis import RedisStorage
+
+
+def create_redis_storage(url: str, ttl: int | None = None) -> "RedisStorage":
+    """RedisStorage aiogram с ключами по destiny (нужны aiogram_dialog)
+    и компактной сериализацией данных.
+
+    :param ttl: время жизни состояния и данных в секундах; обновляется
+    при каждой записи, так что брошенные диалоги удаляются сами
+    """
+
+    # redis импортируется, только если состояния хранятся в нём
+    from aiogram.fsm.storage.redis import RedisStorage
+
+    return RedisStorage.from_url(
+        url,
+        key_builder=DefaultKeyBuilder(with_destiny=True),
+        state_ttl=ttl,
+        data_ttl=ttl,
+        json_loads=loads,
+        json_dumps=dumps,
+    )
+
+
+def create_fsm_storage(
+    settings: Settings,
+) -> tuple[BaseStorage, BaseEventIsolation]:
+    """FSM хранилище и изоляция событий по настройке FSM_STORAGE.
+
+    SQLite годится для одного процесса или нескольких процессов на одной
+    машине, если апдейты одного чата всегда попадают в один процесс;
+    для нескольких машин нужен Redis.
+    """
+
+    match settings.FSM_STORAGE:
+        case "redis":
+            storage = create_redis_storage(
+                settings.REDIS_URL, settings.FSM_TTL
+            )
+            return storage, storage.create_isolation()
+        case "sqlite":
+            return (
+                SQLiteStorage(settings.FSM_SQLITE_PATH, ttl=settings.FSM_TTL),
+                SimpleEventIsolation(),
+            )
+        case _:
+            return MemoryStorage(), SimpleEventIsolation()
@@ -0,0 +1,13 @@
+import json
+from typing import Any
+
+
+def dumps(data: dict[str, Any]) -> str:
+    """Компактная сериализация данных FSM и стеков диалогов: без
+    пробелов и без экранирования кириллицы."""
+
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def loads(raw: str | bytes | None) -> dict[str, Any]:
+    return json.loads(raw) if raw else {}
@@ -0,0 +1,113 @@
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import (
+    BaseStorage,
+    DefaultKeyBuilder,
+    KeyBuilder,
+    StateType,
+    StorageKey,
+)
+
+from storages.serialization import dumps, loads
+
+
+class SQLiteStorage(BaseStorage):
+    def __init__(
+        self,
+        path: str,
+        ttl: int | None = None,
+        key_builder: KeyBuilder | None = None,
+        purge_every: int = 1000,
+    ):
+        """Встроенное FSM хранилище в SQLite (WAL).
+
+        Состояние и данные одного ключа лежат в одной строке. Пустые
+        записи удаляются сразу, просроченные (ttl секунд без записи)
+        перестают читаться и вычищаются раз в purge_every записей.
+        """
+
+        self._path = path
+        self._ttl = ttl
+        self._key_builder = key_builder or DefaultKeyBuilder(
+            prefix="fsm", with_destiny=True
+        )
+        self._purge_every = purge_every
+        self._writes = 0
+        self._connection: sqlite3.Connection | None = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self._path, timeout=5)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS fsm ("
+                "key TEXT PRIMARY KEY, state TEXT, data TEXT, "
+                "expires_at REAL) WITHOUT ROWID"
+            )
+        return self._connection
+
+    def _expires_at(self) -> float | None:
+        return time.time() + self._ttl if self._ttl else None
+
+    def _read(self, key: StorageKey) -> tuple[str | None, str | None]:
+        row = self.connection.execute(
+            "SELECT state, data FROM fsm WHERE key = ? "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+            (self._key_builder.build(key), time.time()),
+        ).fetchone()
+        return row if row is not None else (None, None)
+
+    def _write(self, key: StorageKey, column: str, value: str | None) -> None:
+        other = "data" if column == "state" else "state"
+        now = time.time()
+        storage_key = self._key_builder.build(key)
+        with self.connection as connection:
+            # у просроченной записи второе поле сбрасывается, чтобы оно
+            # не "ожило" вместе с новым expires_at
+            connection.execute(
+                f"INSERT INTO fsm (key, {column}, expires_at) "
+                f"VALUES (?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+                f"{column} = excluded.{column}, "
+                f"{other} = CASE WHEN fsm.expires_at <= ? THEN NULL "
+                f"ELSE fsm.{other} END, "
+                f"expires_at = excluded.expires_at",
+                (storage_key, value, self._expires_at(), now),
+            )
+            connection.execute(
+                "DELETE FROM fsm WHERE key = ? "
+                "AND state IS NULL AND data IS NULL",
+                (storage_key,),
+            )
+            self._writes += 1
+            if self._writes % self._purge_every == 0:
+                connection.execute(
+                    "DELETE FROM fsm WHERE expires_at < ?", (now,)
+                )
+
+    async def set_state(
+        self, key: StorageKey, state: StateType = None
+    ) -> None:
+        if isinstance(state, State):
+            state = state.state
+        self._write(key, "state", state)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        return self._read(key)[0]
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        self._write(key, "data", dumps(data) if data else None)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        return loads(self._read(key)[1])
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,29 @@
+import subprocess
+import sys
+
+
+def test_load_flows_run_without_errors():
+    """Короткий прогон benchmarks.load: все сценарии пользователей
+    проходят через настоящий бот против заглушек без ошибок."""
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.load",
+            "--users",
+            "3",
+            "--rounds",
+            "1",
+            "--latency",
+            "0",
+            "--jitter",
+            "0",
+        ],
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "ошибки" not in result.stdout
+    assert "dialog:done" in result.stdout
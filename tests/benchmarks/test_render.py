@@ -0,0 +1,7 @@
+from benchmarks.render import main
+
+
+def test_render_matches_reference():
+    """Отрисовка списка совпадает с эталонной (assert внутри main)."""
+
+    main(iterations=1)
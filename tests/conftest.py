@@ -0,0 +1,27 @@
+import os
+import socket
+
+import pytest
+
+# config читает обязательные настройки при импорте
+os.environ.setdefault("BOT_TOKEN", "42:TEST")
+os.environ.setdefault("API_URL", "http://backend.test")
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture()
+def backend(monkeypatch):
+    """Заглушка бэкенда из benchmarks на свободном порту, репозитории
+    ходят в неё. Запускается и останавливается самим тестом."""
+
+    from benchmarks.fake_backend import FakeBackend
+    from config import settings
+
+    backend = FakeBackend(port=get_free_port(), tasks_per_user=10)
+    monkeypatch.setattr(settings, "API_URL", backend.url)
+    return backend
@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+
+from callbacks.factory import TaskBulkCallback
+from enums.tasks import TaskBulkActionEnum
+from keyboards.tasks import (
+    get_bulk_selection,
+    get_bulk_tasks_keyboard,
+    toggle_bulk_task,
+)
+from schemas.tasks import TaskShortSchema
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def make_task(index: int) -> TaskShortSchema:
+    # id в виде UUID: в callback_data он бы не поместился
+    return TaskShortSchema(
+        id=f"00000000-0000-0000-0000-{index:012d}",
+        title=f"Задача {index}",
+        deadline=NOW,
+        created_at=NOW,
+    )
+
+
+def test_bulk_callback_data_fits_limit():
+    tasks = [make_task(index) for index in range(50)]
+    keyboard = get_bulk_tasks_keyboard(tasks, "archive_tasks", 99_999)
+    for row in keyboard.inline_keyboard:
+        for button in row:
+            assert len(button.callback_data.encode()) <= 64
+
+
+def test_bulk_selection_by_index():
+    tasks = [make_task(index) for index in range(3)]
+    keyboard = get_bulk_tasks_keyboard(tasks, "active_tasks", 2)
+    toggle = TaskBulkCallback(
+        action=TaskBulkActionEnum.TOGGLE,
+        list_name="active_tasks",
+        page=2,
+        index=1,
+    )
+    keyboard = toggle_bulk_task(keyboard, toggle)
+    assert get_bulk_selection(keyboard) == {1: "Задача 1"}
+
+    keyboard = toggle_bulk_task(keyboard, toggle)
+    assert get_bulk_selection(keyboard) == {}
@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import AnswerCallbackQuery, SendMessage
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from exceptions.base import ServerException
+from handlers.main import server_exception_handler
+from middlewares.callbacks import (
+    AnswerTrackingMiddleware,
+    CallbackAckMiddleware,
+)
+
+
+class FakeSession(BaseSession):
+    def __init__(self):
+        super().__init__()
+        self.calls: list[object] = []
+
+    async def make_request(self, bot, method, timeout=None):
+        self.calls.append(method)
+        return True
+
+    async def close(self) -> None:
+        return None
+
+    async def stream_content(self, *args, **kwargs):
+        yield b""
+
+
+def make_update() -> Update:
+    user = User(id=1, is_bot=False, first_name="Test")
+    message = Message(
+        message_id=1,
+        date=datetime.now(),
+        chat=Chat(id=1, type="private"),
+        text="Задачи",
+    )
+    return Update(
+        update_id=1,
+        callback_query=CallbackQuery(
+            id="42",
+            from_user=user,
+            chat_instance="1",
+            message=message,
+            data="fail",
+        ),
+    )
+
+
+def make_dispatcher(delay: float, deadline: float) -> Dispatcher:
+    router = Router()
+
+    @router.callback_query()
+    async def failing_handler(callback: CallbackQuery):
+        await asyncio.sleep(delay)
+        raise ServerException
+
+    router.errors()(server_exception_handler)
+    dispatcher = Dispatcher()
+    dispatcher.callback_query.outer_middleware(CallbackAckMiddleware(deadline))
+    dispatcher.include_router(router)
+    return dispatcher
+
+
+def run(delay: float, deadline: float) -> list[object]:
+    async def main():
+        session = FakeSession()
+        session.middleware(AnswerTrackingMiddleware())
+        bot = Bot("42:TEST", session=session)
+        await make_dispatcher(delay, deadline).feed_update(bot, make_update())
+        return session.calls
+
+    return asyncio.run(main())
+
+
+def test_error_handler_gives_the_only_answer():
+    calls = run(delay=0, deadline=1)
+    assert len(calls) == 1
+    assert isinstance(calls[0], AnswerCallbackQuery)
+    assert calls[0].show_alert
+
+
+def test_error_after_early_answer_sent_as_message():
+    calls = run(delay=0.05, deadline=0.01)
+    assert [type(call) for call in calls] == [
+        AnswerCallbackQuery,
+        SendMessage,
+    ]
+    assert not calls[0].show_alert
@@ -0,0 +1,184 @@
+import asyncio
+from datetime import datetime
+
+from aiogram.methods import (
+    AnswerCallbackQuery,
+    DeleteMessage,
+    EditMessageCaption,
+    EditMessageReplyMarkup,
+    EditMessageText,
+    SendMessage,
+)
+from aiogram.types import (
+    Chat,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    Message,
+)
+
+from middlewares.callbacks import (
+    AnswerTrackingMiddleware,
+    CallbackAck,
+    current_ack,
+)
+from middlewares.fingerprints import EditDeduplicationMiddleware
+
+MARKUP = InlineKeyboardMarkup(
+    inline_keyboard=[[InlineKeyboardButton(text="Назад", callback_data="b")]]
+)
+
+
+class FakeApi:
+    def __init__(self):
+        self.sent: list[object] = []
+        self._message_id = 0
+
+    async def __call__(self, bot, method):
+        self.sent.append(method)
+        if isinstance(method, SendMessage):
+            self._message_id += 1
+            return Message(
+                message_id=self._message_id,
+                date=datetime.now(),
+                chat=Chat(id=method.chat_id, type="private"),
+                text=method.text,
+            )
+        if isinstance(method, (EditMessageText, EditMessageReplyMarkup)):
+            return Message(
+                message_id=method.message_id,
+                date=datetime.now(),
+                chat=Chat(id=method.chat_id, type="private"),
+                text=getattr(method, "text", None),
+            )
+        return True
+
+
+class FakeBot:
+    """Ответы на нажатия идут через AnswerTrackingMiddleware, как в
+    сессии бота."""
+
+    def __init__(self, api: FakeApi):
+        self._api = api
+        self._tracking = AnswerTrackingMiddleware()
+
+    async def __call__(self, method):
+        return await self._tracking(self._api, self, method)
+
+
+def edit(message_id: int, text: str = "a") -> EditMessageText:
+    return EditMessageText(
+        chat_id=1, message_id=message_id, text=text, reply_markup=MARKUP
+    )
+
+
+async def send(
+    edits: EditDeduplicationMiddleware, api: FakeApi, text: str = "a"
+) -> Message:
+    return await edits(
+        api,
+        FakeBot(api),
+        SendMessage(chat_id=1, text=text, reply_markup=MARKUP),
+    )
+
+
+def test_identical_edit_skipped_and_acknowledged_once():
+    async def main():
+        edits = EditDeduplicationMiddleware()
+        api = FakeApi()
+        bot = FakeBot(api)
+        message = await send(edits, api)
+        ack = CallbackAck("42", chat_id=1)
+        current_ack.set(ack)
+
+        first = await edits(api, bot, edit(message.message_id))
+        await edits(api, bot, edit(message.message_id))
+        await edits(
+            api,
+            bot,
+            EditMessageReplyMarkup(
+                chat_id=1, message_id=message.message_id, reply_markup=MARKUP
+            ),
+        )
+
+        assert isinstance(first, Message)
+        assert (first.message_id, first.chat.id, first.text) == (
+            message.message_id,
+            1,
+            "a",
+        )
+        assert [type(method) for method in api.sent] == [
+            SendMessage,
+            AnswerCallbackQuery,
+        ]
+        assert ack.source == "unchanged"
+        assert (edits.stats.skipped, edits.stats.edited) == (3, 0)
+
+    asyncio.run(main())
+
+
+def test_changed_edit_sent_and_remembered():
+    async def main():
+        edits = EditDeduplicationMiddleware()
+        api = FakeApi()
+        bot = FakeBot(api)
+        message = await send(edits, api)
+
+        await edits(api, bot, edit(message.message_id, "b"))
+        await edits(api, bot, edit(message.message_id, "b"))
+
+        assert [type(method) for method in api.sent] == [
+            SendMessage,
+            EditMessageText,
+        ]
+        assert (edits.stats.skipped, edits.stats.edited) == (1, 1)
+
+    asyncio.run(main())
+
+
+def test_forgotten_after_delete_or_caption_edit():
+    async def main():
+        edits = EditDeduplicationMiddleware()
+        api = FakeApi()
+        bot = FakeBot(api)
+        deleted = await send(edits, api)
+        captioned = await send(edits, api)
+
+        await edits(
+            api,
+            bot,
+            DeleteMessage(chat_id=1, message_id=deleted.message_id),
+        )
+        await edits(
+            api,
+            bot,
+            EditMessageCaption(
+                chat_id=1, message_id=captioned.message_id, caption="c"
+            ),
+        )
+        assert len(edits) == 0
+
+        await edits(api, bot, edit(deleted.message_id))
+        await edits(api, bot, edit(captioned.message_id))
+        assert (edits.stats.skipped, edits.stats.edited) == (0, 2)
+
+    asyncio.run(main())
+
+
+def test_least_recently_changed_message_evicted():
+    async def main():
+        edits = EditDeduplicationMiddleware(max_size=2)
+        api = FakeApi()
+        bot = FakeBot(api)
+        first, second = await send(edits, api), await send(edits, api)
+        # пропущенное изменение тоже освежает сообщение
+        await edits(api, bot, edit(first.message_id))
+        third = await send(edits, api)
+        assert len(edits) == 2
+
+        await edits(api, bot, edit(first.message_id))
+        await edits(api, bot, edit(third.message_id))
+        await edits(api, bot, edit(second.message_id))
+        assert (edits.stats.skipped, edits.stats.edited) == (3, 1)
+        assert api.sent[-1].message_id == second.message_id
+
+    asyncio.run(main())
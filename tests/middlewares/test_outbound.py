@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, SendMessage
+
+from middlewares.outbound import OutboundRateLimiter, bulk_sending
+
+
+class FakeApi:
+    def __init__(self, retry_after: list[int] | None = None):
+        self.sent: list[tuple[float, object]] = []
+        self._retry_after = list(retry_after or ())
+
+    async def __call__(self, bot, method):
+        if self._retry_after:
+            raise TelegramRetryAfter(
+                method, "Too Many Requests", self._retry_after.pop(0)
+            )
+        self.sent.append((time.monotonic(), method))
+        return True
+
+
+def send(chat_id: int) -> SendMessage:
+    return SendMessage(chat_id=chat_id, text=str(chat_id))
+
+
+def test_retry_after_pauses_chat_and_retries():
+    async def main():
+        limiter = OutboundRateLimiter(global_rate=1000, chat_rate=1000)
+        api = FakeApi(retry_after=[1])
+        started = time.monotonic()
+        assert await limiter(api, None, send(1))
+        assert api.sent[0][0] - started >= 1
+        assert (limiter.stats.retried, limiter.stats.sent) == (1, 1)
+
+    asyncio.run(main())
+
+
+def test_gives_up_after_max_retries():
+    async def main():
+        limiter = OutboundRateLimiter(max_retries=0)
+        with pytest.raises(TelegramRetryAfter):
+            await limiter(FakeApi(retry_after=[1]), None, send(1))
+        assert limiter.stats.dropped == 1
+
+    asyncio.run(main())
+
+
+def test_calls_without_chat_are_not_limited():
+    async def main():
+        limiter = OutboundRateLimiter(global_rate=1)
+        api = FakeApi()
+        for _ in range(5):
+            await limiter(
+                api, None, AnswerCallbackQuery(callback_query_id="1")
+            )
+        assert len(api.sent) == 5
+
+    asyncio.run(main())
+
+
+def test_interactive_lane_goes_before_bulk():
+    async def main():
+        limiter = OutboundRateLimiter(global_rate=10, chat_rate=1000)
+        api = FakeApi()
+        # первый вызов забирает единственный общий токен
+        await limiter(api, None, send(1))
+
+        async def bulk():
+            with bulk_sending():
+                await limiter(api, None, send(2))
+
+        await asyncio.gather(bulk(), limiter(api, None, send(3)))
+        assert [method.chat_id for _, method in api.sent] == [1, 3, 2]
+
+    asyncio.run(main())
+
+
+def test_chat_rate_spaces_messages_to_one_chat():
+    async def main():
+        limiter = OutboundRateLimiter(
+            global_rate=1000, chat_rate=10, chat_burst=1
+        )
+        api = FakeApi()
+        for _ in range(3):
+            await limiter(api, None, send(1))
+        times = [sent_at for sent_at, _ in api.sent]
+        assert times[2] - times[0] >= 0.19
+
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+import asyncio
+
+from redis.asyncio import Redis
+
+from benchmarks.fake_redis import FakeRedis
+from repositories.cache import InMemoryCacheBackend, ResponseCache
+from repositories.redis_cache import RedisCacheBackend
+from repositories.responses import ApiResponse
+
+URL = "http://backend.test/tasks"
+TTLS = {"tasks:list": 30}
+
+
+class Fetcher:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self) -> ApiResponse:
+        self.calls += 1
+        return ApiResponse("GET", URL, 200, b"[%d]" % self.calls)
+
+
+class FlakyBackend(InMemoryCacheBackend):
+    errors = (ConnectionError,)
+
+    def __init__(self):
+        super().__init__()
+        self.down = False
+
+    def _check(self) -> None:
+        if self.down:
+            raise ConnectionError("cache is down")
+
+    async def get(self, key):
+        self._check()
+        return await super().get(key)
+
+    async def set(self, key, value, ttl):
+        self._check()
+        await super().set(key, value, ttl)
+
+    async def delete_prefix(self, prefix):
+        self._check()
+        await super().delete_prefix(prefix)
+
+
+async def get(cache: ResponseCache, fetch: Fetcher, user_id="1") -> bytes:
+    response = await cache.get_or_fetch(user_id, "tasks:list", URL, {}, fetch)
+    return response.body
+
+
+def test_redis_backend_read_through_and_invalidate():
+    async def scenario():
+        fake = FakeRedis()
+        await fake.start()
+        cache = ResponseCache(
+            RedisCacheBackend(Redis.from_url(fake.url)), TTLS
+        )
+        fetch = Fetcher()
+        try:
+            assert await get(cache, fetch) == b"[1]"
+            assert await get(cache, fetch) == b"[1]"
+            assert await get(cache, fetch, user_id="2") == b"[2]"
+            await cache.invalidate("1", "tasks")
+            assert await get(cache, fetch) == b"[3]"
+            assert await get(cache, fetch, user_id="2") == b"[2]"
+        finally:
+            await cache.close()
+            await fake.stop()
+        assert fetch.calls == 3
+        assert cache.stats["tasks:list"].hits == 2
+
+    asyncio.run(scenario())
+
+
+def test_unreachable_redis_fails_open():
+    async def scenario():
+        # на этом порту никто не слушает
+        redis = Redis.from_url(
+            "redis://127.0.0.1:1/0", socket_connect_timeout=0.1
+        )
+        cache = ResponseCache(RedisCacheBackend(redis), TTLS)
+        fetch = Fetcher()
+        assert await get(cache, fetch) == b"[1]"
+        await cache.invalidate("1", "tasks")
+        assert await get(cache, fetch) == b"[2]"
+        await cache.close()
+        assert cache.stats["tasks:list"].errors == 2
+
+    asyncio.run(scenario())
+
+
+def test_invalidation_missed_during_outage_is_replayed():
+    async def scenario():
+        backend = FlakyBackend()
+        cache = ResponseCache(backend, TTLS, retry_interval=0)
+        fetch = Fetcher()
+        assert await get(cache, fetch) == b"[1]"
+
+        backend.down = True
+        await cache.invalidate("1", "tasks")
+        assert await get(cache, fetch) == b"[2]"
+
+        # после восстановления устаревший ответ не отдаётся
+        backend.down = False
+        assert await get(cache, fetch) == b"[3]"
+        assert await get(cache, fetch) == b"[3]"
+
+    asyncio.run(scenario())
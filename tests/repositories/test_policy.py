@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from exceptions.backend import BackendUnavailableException
+from repositories.policy import CircuitBreaker, EndpointPolicy, RequestPolicy
+from repositories.responses import ApiResponse
+
+
+class SlowBackend:
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def __call__(self) -> ApiResponse:
+        await self.release.wait()
+        return ApiResponse("GET", "/", 200, b"")
+
+
+def make_policy() -> RequestPolicy:
+    return RequestPolicy(
+        default=EndpointPolicy(timeout=10),
+        max_retries=0,
+        breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0),
+    )
+
+
+def test_cancelled_attempt_keeps_foreign_probe():
+    async def main():
+        policy = make_policy()
+        backend = SlowBackend()
+        # запрос начат, пока цепь замкнута
+        stale = asyncio.create_task(policy.execute("GET", None, backend))
+        await asyncio.sleep(0)
+
+        policy.breaker.record_failure()
+        probe = asyncio.create_task(policy.execute("GET", None, backend))
+        await asyncio.sleep(0)
+        assert policy.breaker.state == CircuitBreaker.HALF_OPEN
+
+        stale.cancel()
+        await asyncio.gather(stale, return_exceptions=True)
+        # проба всё ещё занята, второй пробный запрос не пропускается
+        with pytest.raises(BackendUnavailableException):
+            await policy.execute("GET", None, backend)
+
+        backend.release.set()
+        assert (await probe).status == 200
+        assert policy.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(main())
+
+
+def test_cancelled_probe_frees_slot():
+    async def main():
+        policy = make_policy()
+        backend = SlowBackend()
+        policy.breaker.record_failure()
+        probe = asyncio.create_task(policy.execute("GET", None, backend))
+        await asyncio.sleep(0)
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+
+        backend.release.set()
+        response = await policy.execute("GET", None, backend)
+        assert response.status == 200
+
+    asyncio.run(main())
+
+
+def test_background_endpoint_keeps_breaker():
+    async def main():
+        policy = RequestPolicy(
+            default=EndpointPolicy(timeout=10),
+            endpoints={
+                "reminders:list": EndpointPolicy(
+                    timeout=10, max_retries=0, background=True
+                )
+            },
+            max_retries=3,
+            breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60),
+        )
+        calls = 0
+
+        async def failing() -> ApiResponse:
+            nonlocal calls
+            calls += 1
+            return ApiResponse("GET", "/", 503, b"")
+
+        with pytest.raises(BackendUnavailableException):
+            await policy.execute("GET", "reminders:list", failing)
+        # без повторов, и цепь для запросов пользователей не разомкнута
+        assert calls == 1
+        assert policy.breaker.state == CircuitBreaker.CLOSED
+
+        policy.breaker.record_failure()
+        with pytest.raises(BackendUnavailableException):
+            await policy.execute("GET", "reminders:list", failing)
+        assert calls == 1
+
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+from prometheus_client import CollectorRegistry, generate_latest
+
+from exceptions.tasks import TaskNotFoundException
+from utils.metrics import (
+    CounterCallback,
+    GaugeCallback,
+    count_server_error,
+    registry,
+)
+
+
+def get_server_errors() -> float:
+    return (
+        registry.get_sample_value(
+            "bot_server_exceptions_total",
+            {"exception": "TaskNotFoundException", "error_code": "404"},
+        )
+        or 0
+    )
+
+
+def test_server_errors_counted_when_handled():
+    before = get_server_errors()
+    error = TaskNotFoundException()
+    # создание исключения (например, заглушки результата) не учитывается
+    assert get_server_errors() == before
+
+    count_server_error(error)
+    assert get_server_errors() == before + 1
+
+
+def test_callback_collectors_read_stats_on_scrape():
+    stats = {"sent": 0}
+    local = CollectorRegistry()
+    local.register(
+        CounterCallback(
+            "bot_test_calls_total",
+            "Тестовый счётчик",
+            ("result",),
+            lambda: [((name,), value) for name, value in stats.items()],
+        )
+    )
+    local.register(
+        GaugeCallback(
+            "bot_test_open", "Тестовый флаг", (), lambda: [((), True)]
+        )
+    )
+
+    stats["sent"] = 3
+    text = generate_latest(local).decode()
+    assert 'bot_test_calls_total{result="sent"} 3.0' in text
+    assert "bot_test_open 1.0" in text
@@ -0,0 +1,134 @@
+import asyncio
+import queue as queues
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from server.sharding import (
+    STOP,
+    ShardedRunner,
+    consume_updates,
+    create_sharded_webhook_app,
+    get_shard_key,
+)
+
+
+def message(update_id: int, chat_id: int, user_id: int | None = None) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": user_id or chat_id},
+        },
+    }
+
+
+def worker_target(index, queue, in_flight) -> None:
+    pass
+
+
+def test_shard_key_prefers_chat():
+    assert get_shard_key(message(1, chat_id=-100, user_id=7)) == -100
+    callback = {
+        "update_id": 2,
+        "callback_query": {
+            "id": "1",
+            "from": {"id": 7},
+            "message": {"chat": {"id": 5}},
+        },
+    }
+    assert get_shard_key(callback) == 5
+
+
+def test_shard_key_falls_back_to_user():
+    inline = {"update_id": 1, "inline_query": {"id": "1", "from": {"id": 9}}}
+    assert get_shard_key(inline) == 9
+    assert get_shard_key({"update_id": 1}) == 0
+
+
+def test_route_keeps_chat_order_within_shard():
+    async def main():
+        runner = ShardedRunner(worker_target, 3, start_method="spawn")
+        updates = [message(i, chat_id=i % 4) for i in range(1, 13)]
+        for update in updates:
+            await runner.route(update)
+        for index, queue in enumerate(runner._queues):
+            expected = [u for u in updates if get_shard_key(u) % 3 == index]
+            received = [queue.get(timeout=1) for _ in expected]
+            assert received == expected
+        assert [stats.queued for stats in runner.stats()] == [0, 0, 0]
+
+    asyncio.run(main())
+
+
+class FakeDispatcher:
+    def __init__(self, delays: dict[int, float]):
+        self.workflow_data = {}
+        self.events: list[tuple[str, int]] = []
+        self._delays = delays
+
+    async def emit_startup(self, **kwargs) -> None:
+        pass
+
+    async def emit_shutdown(self, **kwargs) -> None:
+        pass
+
+    async def feed_raw_update(self, bot, update: dict) -> None:
+        update_id = update["update_id"]
+        self.events.append(("start", update_id))
+        await asyncio.sleep(self._delays.get(update_id, 0))
+        self.events.append(("end", update_id))
+
+
+class FakeSession:
+    async def close(self) -> None:
+        pass
+
+
+class FakeBot:
+    session = FakeSession()
+
+
+def test_worker_serializes_chat_and_overlaps_chats():
+    # апдейт 1 долгий; 2 из того же чата ждёт его, 3 из другого - нет
+    dispatcher = FakeDispatcher({1: 0.2})
+    queue = queues.Queue()
+    for update in (message(1, chat_id=1), message(2, 1), message(3, 2)):
+        queue.put(update)
+    queue.put(STOP)
+    in_flight = [0]
+
+    asyncio.run(consume_updates(dispatcher, FakeBot(), queue, in_flight, 0))
+
+    events = dispatcher.events
+    assert events.index(("end", 1)) < events.index(("start", 2))
+    assert events.index(("end", 3)) < events.index(("end", 1))
+    assert in_flight == [0]
+
+
+def test_sharded_webhook_checks_secret():
+    async def main():
+        routed = []
+
+        async def route(update: dict) -> None:
+            routed.append(update)
+
+        app = create_sharded_webhook_app(
+            route, path="/webhook", secret_token="secret"
+        )
+        async with TestClient(TestServer(app)) as client:
+            response = await client.post(
+                "/webhook",
+                json=message(1, 1),
+                headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"},
+            )
+            assert response.status == 401
+            response = await client.post(
+                "/webhook",
+                json=message(2, 1),
+                headers={"X-Telegram-Bot-Api-Secret-Token": "secret"},
+            )
+            assert response.status == 200
+        assert routed == [message(2, 1)]
+
+    asyncio.run(main())
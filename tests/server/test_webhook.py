@@ -0,0 +1,108 @@
+import asyncio
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message
+from aiohttp.test_utils import TestClient, TestServer
+
+from server.webhook import create_webhook_app
+
+SECRET = "webhook-secret"
+PATH = "/webhook"
+HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def make_update(update_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": 1, "type": "private"},
+            "text": "hi",
+        },
+    }
+
+
+class Handler:
+    def __init__(self):
+        self.seen: list[int] = []
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def handle(self, message: Message) -> None:
+        self.seen.append(message.message_id)
+        self.started.set()
+        await self.release.wait()
+
+
+def run(scenario, max_concurrent_updates: int = 10) -> None:
+    async def main():
+        handler = Handler()
+        dispatcher = Dispatcher()
+        dispatcher.message.register(handler.handle)
+        app = create_webhook_app(
+            dispatcher,
+            Bot("42:TEST"),
+            path=PATH,
+            secret_token=SECRET,
+            max_concurrent_updates=max_concurrent_updates,
+        )
+        async with TestClient(TestServer(app)) as client:
+            await scenario(client, handler)
+
+    asyncio.run(main())
+
+
+def test_rejects_missing_or_wrong_secret():
+    async def scenario(client: TestClient, handler: Handler):
+        response = await client.post(PATH, json=make_update(1))
+        assert response.status == 401
+        response = await client.post(
+            PATH, json=make_update(2), headers={HEADER: "wrong"}
+        )
+        assert response.status == 401
+        await asyncio.sleep(0.05)
+        assert handler.seen == []
+
+    run(scenario)
+
+
+def test_serves_only_configured_path():
+    async def scenario(client: TestClient, handler: Handler):
+        response = await client.post(
+            "/other", json=make_update(1), headers={HEADER: SECRET}
+        )
+        assert response.status == 404
+        response = await client.post(
+            PATH, json=make_update(2), headers={HEADER: SECRET}
+        )
+        assert response.status == 200
+        await asyncio.wait_for(handler.started.wait(), 1)
+        assert handler.seen == [2]
+
+    run(scenario)
+
+
+def test_bounds_concurrent_updates():
+    async def scenario(client: TestClient, handler: Handler):
+        handler.release.clear()
+        response = await client.post(
+            PATH, json=make_update(1), headers={HEADER: SECRET}
+        )
+        assert response.status == 200
+        await asyncio.wait_for(handler.started.wait(), 1)
+
+        # единственный слот занят: ответ на второй апдейт задерживается
+        second = asyncio.create_task(
+            client.post(PATH, json=make_update(2), headers={HEADER: SECRET})
+        )
+        await asyncio.sleep(0.1)
+        assert not second.done()
+
+        handler.release.set()
+        assert (await asyncio.wait_for(second, 1)).status == 200
+        await asyncio.sleep(0.05)
+        assert handler.seen == [1, 2]
+
+    run(scenario, max_concurrent_updates=1)
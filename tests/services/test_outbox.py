@@ -0,0 +1,141 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from entities.users import User
+from enums.outbox import OutboxResultEnum
+from exceptions.base import ServerException
+from repositories.client import HttpClient
+from repositories.outbox import OutboxOperation, TaskOutboxRepository
+from repositories.tasks import TaskRepository
+from services.outbox import TaskOutbox
+
+USER = User("1", "test", "Test", "")
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent: list[str] = []
+
+    async def send_message(self, chat_id: int, text: str, **kwargs) -> None:
+        self.sent.append(text)
+
+
+@dataclass
+class BackendError(ServerException):
+    @property
+    def message(self):
+        return "значение <x> недопустимо"
+
+
+def make_outbox(tmp_path, client: HttpClient, bot=None) -> TaskOutbox:
+    repository = TaskOutboxRepository(str(tmp_path / "outbox.sqlite3"))
+    repository.load()
+    return TaskOutbox(bot, client, repository)
+
+
+def test_replay_after_applied_attempt_does_not_duplicate(backend, tmp_path):
+    """Первая попытка дошла до бэкенда, но ответ потерян: повтор не
+    создаёт задачу второй раз, а завершение и удаление не считаются
+    ошибкой. Заглушка бэкенда Idempotency-Key не поддерживает."""
+
+    async def main():
+        await backend.start()
+        client = HttpClient()
+        try:
+            outbox = make_outbox(tmp_path, client)
+            repository = TaskRepository(USER, client)
+            deadline = datetime.now(timezone.utc) + timedelta(days=2)
+            payload = {"title": "Новая", "deadline": deadline.isoformat()}
+            tasks = backend.get_user_tasks(USER.user_id)
+            done_id, deleted_id = [
+                task_id
+                for task_id, task in tasks.items()
+                if task["completed_at"] is None
+            ][:2]
+
+            await repository.create_task(payload)
+            await repository.complete_task(done_id)
+            await repository.delete_task(deleted_id)
+            count = len(tasks)
+            outbox._repository.add(USER.user_id, "create", None, payload, "a")
+            outbox._repository.add(
+                USER.user_id, "complete", done_id, None, "b"
+            )
+            outbox._repository.add(
+                USER.user_id, "delete", deleted_id, None, "c"
+            )
+
+            await outbox.drain()
+            assert len(tasks) == count
+            assert (outbox.stats.replayed, outbox.stats.rejected) == (3, 0)
+            assert outbox.pending == 0
+        finally:
+            await client.close()
+            await backend.stop()
+
+    asyncio.run(main())
+
+
+def test_submit_behind_pending_is_reported_separately(backend, tmp_path):
+    async def main():
+        await backend.start()
+        client = HttpClient()
+        try:
+            outbox = make_outbox(tmp_path, client)
+            task_id = next(iter(backend.get_user_tasks(USER.user_id)))
+            outbox._repository.add(USER.user_id, "delete", "999", None, "a")
+
+            result = await outbox.submit(USER, "complete", task_id=task_id)
+            assert result is OutboxResultEnum.QUEUED_BEHIND
+            assert outbox.pending == 2
+        finally:
+            await client.close()
+            await backend.stop()
+
+    asyncio.run(main())
+
+
+def test_concurrent_submits_keep_order_with_bounded_latency(backend, tmp_path):
+    """Бэкенд отвечает дольше direct_timeout: обе операции
+    откладываются быстро и в порядке отправки."""
+
+    async def main():
+        backend.latency = 1
+        await backend.start()
+        client = HttpClient()
+        try:
+            outbox = make_outbox(tmp_path, client)
+            outbox._direct_timeout = 0.1
+            started = time.monotonic()
+            results = await asyncio.gather(
+                outbox.submit(USER, "delete", task_id="1"),
+                outbox.submit(USER, "delete", task_id="2"),
+            )
+            assert time.monotonic() - started < 0.5
+            assert results == [
+                OutboxResultEnum.QUEUED,
+                OutboxResultEnum.QUEUED_BEHIND,
+            ]
+            first = outbox._repository.first(USER.user_id)
+            assert first.task_id == "1"
+        finally:
+            await client.close()
+            await backend.stop()
+
+    asyncio.run(main())
+
+
+def test_rejected_create_escapes_title_and_error(tmp_path):
+    bot = FakeBot()
+    outbox = make_outbox(tmp_path, None, bot)
+    operation = OutboxOperation(
+        1, USER.user_id, "create", None, {"title": "a<b"}, "a"
+    )
+
+    asyncio.run(outbox._reject(operation, BackendError()))
+    assert bot.sent == [
+        "Не удалось создать отложенную задачу <b>a&lt;b</b>: "
+        "значение &lt;x&gt; недопустимо"
+    ]
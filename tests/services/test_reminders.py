@@ -0,0 +1,125 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from repositories.client import HttpClient
+from repositories.events import TaskEvents
+from repositories.reminders import SentRemindersRepository
+from services.reminders import OVERDUE, ReminderScheduler
+
+
+class FakeBot:
+    def __init__(self, fail: Exception | None = None):
+        self.fail = fail
+        self.sent: list[tuple[int, str]] = []
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        if self.fail is not None:
+            raise self.fail
+        self.sent.append((chat_id, text))
+
+
+class FakeKnownUsers:
+    def __init__(self, *user_ids: str):
+        self.user_ids = user_ids
+
+    def iter_user_ids(self):
+        return iter(self.user_ids)
+
+
+class FakeTimezones:
+    async def get_user_zone(self, user_id: str):
+        return timezone.utc
+
+
+def make_scheduler(tmp_path, bot: FakeBot) -> ReminderScheduler:
+    return ReminderScheduler(
+        bot,
+        None,
+        FakeKnownUsers(),
+        FakeTimezones(),
+        TaskEvents(),
+        SentRemindersRepository(str(tmp_path / "sent.sqlite3")),
+        overdue_grace=60 * 60,
+    )
+
+
+async def run(scheduler: ReminderScheduler, *tasks) -> None:
+    await scheduler.start()
+    for task in tasks:
+        scheduler.schedule(*task)
+    await asyncio.sleep(0.05)
+    await scheduler.stop()
+
+
+def test_overdue_sent_once_across_restarts(tmp_path):
+    deadline = datetime.now(timezone.utc) - timedelta(minutes=5)
+    bot = FakeBot()
+    # просрочка наступила, пока бот не работал
+    asyncio.run(run(make_scheduler(tmp_path, bot), ("1", "7", "A", deadline)))
+    assert [chat_id for chat_id, _ in bot.sent] == [1]
+
+    asyncio.run(run(make_scheduler(tmp_path, bot), ("1", "7", "A", deadline)))
+    assert len(bot.sent) == 1
+
+
+def test_old_overdue_skipped(tmp_path):
+    deadline = datetime.now(timezone.utc) - timedelta(hours=2)
+    bot = FakeBot()
+    asyncio.run(run(make_scheduler(tmp_path, bot), ("1", "7", "A", deadline)))
+    assert bot.sent == []
+
+
+def test_unexpected_error_counted(tmp_path):
+    deadline = datetime.now(timezone.utc) - timedelta(minutes=5)
+    scheduler = make_scheduler(tmp_path, FakeBot(fail=RuntimeError("boom")))
+    asyncio.run(run(scheduler, ("1", "7", "A", deadline)))
+    assert scheduler.stats.failed == 1
+
+    sent = SentRemindersRepository(str(tmp_path / "sent.sqlite3"))
+    sent.load()
+    assert not sent.contains("1", "7", OVERDUE, deadline.timestamp())
+    sent.prune(time.time())
+    sent.close()
+
+
+def test_refresh_cancels_tasks_removed_on_backend(backend, tmp_path):
+    """Задача удалена на бэкенде мимо TaskRepository: после следующего
+    обновления о ней не напоминают."""
+
+    async def main():
+        await backend.start()
+        client = HttpClient()
+        bot = FakeBot()
+        scheduler = ReminderScheduler(
+            bot,
+            client,
+            FakeKnownUsers("1"),
+            FakeTimezones(),
+            TaskEvents(),
+            SentRemindersRepository(str(tmp_path / "sent.sqlite3")),
+            lead=0.5,
+            refresh_interval=60,
+        )
+        backend.tasks_per_user = 0
+        deadline = datetime.now(timezone.utc) + timedelta(seconds=1)
+        task = backend._add_task(
+            "1", {"title": "A", "deadline": deadline.isoformat()}
+        )
+        try:
+            await scheduler.start()
+            await asyncio.sleep(0.2)
+            assert scheduler.stats.pending == 1
+
+            del backend.tasks["1"][task["id"]]
+            await scheduler.refresh()
+            assert scheduler.stats.pending == 0
+
+            await asyncio.sleep(1)
+            assert bot.sent == []
+        finally:
+            await scheduler.stop()
+            await client.close()
+            await backend.stop()
+
+    asyncio.run(main())
@@ -0,0 +1,25 @@
+from dataclasses import dataclass
+
+from exceptions.base import ServerException
+from messages.tasks import BULK_COMPLETED
+from schemas.tasks import TaskBatchResult
+from utils.tasks import get_batch_summary
+
+
+@dataclass
+class BackendError(ServerException):
+    @property
+    def message(self):
+        return "значение <x> недопустимо"
+
+
+def test_batch_summary_escapes_titles_and_errors():
+    text = get_batch_summary(
+        BULK_COMPLETED,
+        [TaskBatchResult("1"), TaskBatchResult("2", BackendError())],
+        {"1": "ok", "2": "a<b"},
+    )
+    assert text.splitlines() == [
+        "Завершено задач: 1 из 2.",
+        "• <b>a&lt;b</b>: значение &lt;x&gt; недопустимо",
+    ]
@@ -0,0 +1,63 @@
+import pytest
+
+from utils import rate_limit
+from utils.rate_limit import TokenBucket
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+def test_starts_full_and_allows_burst(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    assert bucket.is_full
+    assert [bucket.try_take() for _ in range(4)] == [True, True, True, False]
+    assert bucket.delay() == pytest.approx(0.5)
+
+
+def test_refills_at_rate_up_to_capacity(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    for _ in range(3):
+        bucket.take()
+    clock.now += 0.5
+    assert bucket.try_take()
+    assert not bucket.try_take()
+
+    clock.now += 60
+    assert bucket.is_full
+    assert [bucket.try_take() for _ in range(4)] == [True, True, True, False]
+
+
+def test_take_borrows_future_tokens(clock):
+    bucket = TokenBucket(rate=1, capacity=1)
+    bucket.take()
+    bucket.take()
+    assert bucket.delay() == pytest.approx(2)
+
+
+def test_pause_holds_tokens_until_it_ends(clock):
+    bucket = TokenBucket(rate=1, capacity=3)
+    bucket.pause(5)
+    assert bucket.delay() == pytest.approx(6)
+    clock.now += 5
+    assert not bucket.try_take()
+    clock.now += 1
+    assert bucket.try_take()
+
+
+def test_shorter_pause_does_not_cut_longer_one(clock):
+    bucket = TokenBucket(rate=1, capacity=1)
+    bucket.pause(10)
+    bucket.pause(2)
+    assert bucket.delay() == pytest.approx(11)
@@ -0,0 +1,115 @@
+from typing import Callable, Iterable, Iterator
+
+from prometheus_client import CollectorRegistry, Counter, Histogram
+from prometheus_client.core import (
+    CounterMetricFamily,
+    GaugeMetricFamily,
+    Metric,
+)
+from prometheus_client.registry import Collector
+
+# границы бакетов гистограмм задержек в секундах
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+Labels = tuple[str, ...]
+
+
+class GaugeCallback(Collector):
+    family = GaugeMetricFamily
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Labels,
+        callback: Callable[[], Iterable[tuple[Labels, float]]],
+    ):
+        """Значения считываются при каждом запросе /metrics из уже
+        существующей статистики компонента (stats), поэтому сами
+        компоненты о метриках ничего не знают."""
+
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._callback = callback
+
+    def describe(self) -> Iterator[Metric]:
+        yield self.family(self.name, self.documentation, labels=self.labels)
+
+    def collect(self) -> Iterator[Metric]:
+        family = self.family(self.name, self.documentation, labels=self.labels)
+        for labels, value in self._callback():
+            family.add_metric(labels, float(value))
+        yield family
+
+
+class CounterCallback(GaugeCallback):
+    """Монотонный счётчик, который ведёт сам компонент."""
+
+    family = CounterMetricFamily
+
+
+registry = CollectorRegistry()
+
+handler_latency = Histogram(
+    "bot_handler_duration_seconds",
+    "Время работы обработчиков апдейтов",
+    ("router", "handler", "prefix"),
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+handler_errors = Counter(
+    "bot_handler_errors_total",
+    "Исключения, вышедшие из обработчиков",
+    ("router", "handler", "prefix", "exception"),
+    registry=registry,
+)
+callback_ack_latency = Histogram(
+    "bot_callback_ack_seconds",
+    "Время от получения нажатия кнопки до ответа на него",
+    ("source",),
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+server_errors = Counter(
+    "bot_server_exceptions_total",
+    "Ошибки приложения (ServerException) по коду ошибки",
+    ("exception", "error_code"),
+    registry=registry,
+)
+backend_latency = Histogram(
+    "bot_backend_request_duration_seconds",
+    "Время запросов к бэкенду (одна попытка)",
+    ("endpoint", "method", "status"),
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+backend_bytes = Histogram(
+    "bot_backend_response_bytes",
+    "Размер тел ответов бэкенда",
+    ("endpoint", "method"),
+    buckets=SIZE_BUCKETS,
+    registry=registry,
+)
+
+
+def count_server_error(error: Exception) -> None:
+    """Учитывает ошибку приложения там, где её обработали: показали
+    пользователю или записали в результат операции."""
+
+    server_errors.labels(
+        type(error).__name__, str(getattr(error, "error_code", ""))
+    ).inc()
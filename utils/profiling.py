@@ -0,0 +1,43 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+
+class UpdateTimings:
+    __slots__ = ("backend", "telegram", "telegram_network")
+
+    def __init__(self):
+        """Время ожидания внешних вызовов за время обработки апдейта, в
+        секундах. Задачи, запущенные из обработчика (например,
+        предзагрузка страниц), наследуют контекст и попадают сюда же."""
+
+        self.backend = 0.0
+        self.telegram = 0.0
+        self.telegram_network = 0.0
+
+
+current_timings: ContextVar[UpdateTimings | None] = ContextVar(
+    "update_timings", default=None
+)
+
+
+def add_timing(kind: str, seconds: float) -> None:
+    timings = current_timings.get()
+    if timings is not None:
+        setattr(timings, kind, getattr(timings, kind) + seconds)
+
+
+@contextmanager
+def timed(kind: str) -> Iterator[None]:
+    """Добавляет время выполнения блока к timings текущего апдейта,
+    если апдейт профилируется."""
+
+    if current_timings.get() is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(kind, time.perf_counter() - started)
@@ -0,0 +1,60 @@
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        """Token bucket: rate токенов в секунду, не больше capacity.
+
+        Токены можно брать в долг (take), тогда следующий токен появится
+        позже; pause сдвигает появление токенов на заданное время.
+        """
+
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated_at:
+            self._tokens = min(
+                self._capacity,
+                self._tokens + (now - self._updated_at) * self._rate,
+            )
+            self._updated_at = now
+
+    @property
+    def is_full(self) -> bool:
+        self._refill(time.monotonic())
+        return self._tokens >= self._capacity
+
+    def delay(self) -> float:
+        """Сколько секунд ждать до появления целого токена."""
+
+        now = time.monotonic()
+        self._refill(now)
+        if self._updated_at > now:
+            # на паузе: токенов не будет до её окончания
+            return (
+                self._updated_at
+                - now
+                + max(0.0, 1 - self._tokens) / (self._rate)
+            )
+        return max(0.0, 1 - self._tokens) / self._rate
+
+    def take(self) -> None:
+        self._refill(time.monotonic())
+        self._tokens -= 1
+
+    def try_take(self) -> bool:
+        if self.delay() > 0:
+            return False
+        self.take()
+        return True
+
+    def pause(self, seconds: float) -> None:
+        """Не выдавать токены seconds секунд (например, по retry_after)."""
+
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens = min(self._tokens, 0.0)
+        self._updated_at = max(self._updated_at, now + seconds)
@@ -0,0 +1,175 @@
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from pathlib import Path
+from typing import IO, Any, Iterator
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# поля апдейта с пользователем или чатом
+PERSON_KEYS = frozenset({"from", "chat", "user", "sender_chat"})
+# поля пользователя в запросах и ответах бэкенда
+BACKEND_USER_KEYS = frozenset(
+    {"user_id", "username", "first_name", "last_name"}
+)
+# ссылки пагинации бэкенда, в их query есть user_id
+BACKEND_LINK_KEYS = frozenset({"next", "previous"})
+
+
+def normalize_path(url: str) -> str:
+    """Путь и query без хоста, параметры отсортированы: так запись не
+    зависит от API_URL и порядка параметров."""
+
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{parts.path}?{query}" if query else parts.path
+
+
+class UpdateRecorder:
+    def __init__(self, path: str, salt: str | None = None):
+        """Запись входящих апдейтов и ответов бэкенда в JSONL для
+        последующего воспроизведения (python -m benchmarks.replay).
+
+        Каждая строка - {"t": секунды от начала записи, "kind": "update"
+        или "backend", ...}. id пользователей и чатов заменяются
+        псевдонимами (HMAC с солью записи, знак id сохраняется), имена -
+        на user<псевдоним>, одинаково в апдейтах и в запросах и ответах
+        бэкенда, поэтому запись воспроизводится согласованно. Тексты
+        сообщений и задач сохраняются как есть.
+        """
+
+        self._path = path
+        self._salt = (salt or secrets.token_hex(16)).encode()
+        self._file: IO[str] | None = None
+        self._started = 0.0
+        # исходный id -> псевдоним, строками
+        self._pseudonyms: dict[str, str] = {}
+        self.records = 0
+
+    def set_shard(self, index: int) -> None:
+        """В шардированном режиме каждый воркер пишет в свой файл."""
+
+        path = Path(self._path)
+        self._path = str(path.with_name(f"{path.stem}.{index}{path.suffix}"))
+
+    async def open(self) -> None:
+        Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self._path, "a", encoding="utf-8")
+        # после перезапуска бота время продолжает идти от первого старта
+        self._started = self._started or time.monotonic()
+
+    async def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def pseudonym(self, value: int | str) -> str:
+        value = str(value)
+        pseudonym = self._pseudonyms.get(value)
+        if pseudonym is None:
+            digest = hmac.new(self._salt, value.encode(), hashlib.sha256)
+            number = 10**9 + int.from_bytes(digest.digest()[:4]) % 10**9
+            sign = "-" if value.startswith("-") else ""
+            pseudonym = self._pseudonyms[value] = f"{sign}{number}"
+        return pseudonym
+
+    def _anonymize_person(self, person: dict) -> dict:
+        person = dict(person)
+        if "id" in person:
+            person["id"] = int(self.pseudonym(person["id"]))
+        name = f"user{abs(person.get('id', 0))}"
+        for key in ("username", "first_name", "last_name", "title"):
+            if person.get(key):
+                person[key] = name
+        return person
+
+    def anonymize_update(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            return {
+                key: (
+                    self._anonymize_person(item)
+                    if key in PERSON_KEYS and isinstance(item, dict)
+                    else self.anonymize_update(item)
+                )
+                for key, item in value.items()
+            }
+        if isinstance(value, list):
+            return [self.anonymize_update(item) for item in value]
+        return value
+
+    def anonymize_backend(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            result = {}
+            for key, item in value.items():
+                if key == "user_id" and item is not None:
+                    item = self.pseudonym(item)
+                elif key in BACKEND_USER_KEYS and item:
+                    item = "user"
+                elif key in BACKEND_LINK_KEYS and isinstance(item, str):
+                    # без хоста: при воспроизведении его подставит
+                    # заглушка бэкенда
+                    item = self.anonymize_url(item)
+                else:
+                    item = self.anonymize_backend(item)
+                result[key] = item
+            return result
+        if isinstance(value, list):
+            return [self.anonymize_backend(item) for item in value]
+        return value
+
+    def anonymize_url(self, url: str) -> str:
+        parts = urlsplit(normalize_path(url))
+        segments = parts.path.split("/")
+        # id пользователя в пути есть только у /users/<id>
+        for index, segment in enumerate(segments[1:], 1):
+            if segments[index - 1] == "users" and segment:
+                segments[index] = self.pseudonym(segment)
+        path = "/".join(segments)
+        query = urlencode(
+            [
+                (key, self.pseudonym(item) if key == "user_id" else item)
+                for key, item in parse_qsl(parts.query)
+            ]
+        )
+        return f"{path}?{query}" if query else path
+
+    def _write(self, record: dict) -> None:
+        if self._file is None:
+            return
+        record = {"t": round(time.monotonic() - self._started, 4), **record}
+        self._file.write(
+            json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+            + "\n"
+        )
+        self.records += 1
+
+    def record_update(self, update: dict) -> None:
+        self._write(
+            {"kind": "update", "update": self.anonymize_update(update)}
+        )
+
+    def record_backend(
+        self, method: str, url: str, status: int, body: bytes
+    ) -> None:
+        try:
+            data = self.anonymize_backend(json.loads(body)) if body else None
+            encoded = {"json": data}
+        except ValueError:
+            encoded = {"text": body.decode(errors="replace")}
+        self._write(
+            {
+                "kind": "backend",
+                "method": method,
+                "url": self.anonymize_url(url),
+                "status": status,
+                **encoded,
+            }
+        )
+
+
+def read_recording(path: str) -> Iterator[dict]:
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
@@ -1,38 +1,66 @@
 from datetime import datetime
+from functools import lru_cache
 from typing import Iterable
 
-from schemas.tasks import TaskSchema, TaskShortSchema
+from aiogram.utils.text_decorations import html_decoration
+from pytz.tzinfo import BaseTzInfo
 
+from messages.tasks import BULK_FAILED_ITEM
+from schemas.tasks import TaskBatchResult, TaskSchema, TaskShortSchema
+from utils.timezones import convert_many
 
-def get_tasks_list(tasks: Iterable[TaskShortSchema]) -> str:
-    message_text = "Ваши задачи:\n\n"
+DATE_FORMAT = "%d.%m.%Y, %H:%M:%S"
 
-    for task in tasks:
-        created_at_str = get_date_strf(task.created_at)
-        deadline_str = get_date_strf(task.deadline)
+# шаблоны разбираются один раз, даты форматируются прямо в них
+TASKS_LIST_HEADER = "Ваши задачи:\n\n"
+TASKS_LIST_ITEM = (
+    "<b>{title}</b>\n"
+    f"<b>Создана:</b> {{created_at:{DATE_FORMAT}}}\n"
+    f"<b>Дедлайн:</b> {{deadline:{DATE_FORMAT}}}"
+).format
 
-        message_text += (
-            f"<b>{task.title}</b>\n"
-            f"<b>Создана:</b> {created_at_str}\n"
-            f"<b>Дедлайн:</b> {deadline_str}\n"
-            f"\n"
-        )
 
-    return message_text.strip()
+@lru_cache(maxsize=10_000)
+def get_tasks_list_item(
+    title: str, created_at: datetime, deadline: datetime, zone: BaseTzInfo
+) -> str:
+    return TASKS_LIST_ITEM(
+        title=title,
+        created_at=created_at.astimezone(zone),
+        deadline=deadline.astimezone(zone),
+    )
+
+
+def get_tasks_list(tasks: Iterable[TaskShortSchema], zone: BaseTzInfo) -> str:
+    """Текст страницы списка. Блоки задач запоминаются, поэтому
+    повторная отрисовка той же страницы (пагинация назад, обновление)
+    не переводит и не форматирует даты заново."""
+
+    return TASKS_LIST_HEADER + "\n\n".join(
+        [
+            get_tasks_list_item(
+                task.title, task.created_at, task.deadline, zone
+            )
+            for task in tasks
+        ]
+    )
 
 
-def get_detail_task(task: TaskSchema) -> str:
+def get_detail_task(task: TaskSchema, zone: BaseTzInfo) -> str:
+    created_at, deadline, completed_at = convert_many(
+        (task.created_at, task.deadline, task.completed_at), zone
+    )
     task_completed_at = (
-        get_date_strf(task.completed_at)
-        if task.completed_at is not None
+        get_date_strf(completed_at)
+        if completed_at is not None
         else "Не выполнена"
     )
 
     return (
         f"📝 <b>Заголовок:</b> <b>{task.title}</b>\n"
         f"📜 <b>Описание:</b> <b>{task.description if task.description else 'Нет описания'}</b>\n"
-        f"📅 <b>Создана:</b> <b>{get_date_strf(task.created_at)}</b>\n"
-        f"⏰ <b>Дедлайн:</b> <b>{get_date_strf(task.deadline)}</b>\n"
+        f"📅 <b>Создана:</b> <b>{get_date_strf(created_at)}</b>\n"
+        f"⏰ <b>Дедлайн:</b> <b>{get_date_strf(deadline)}</b>\n"
         f"🔖 <b>Статус:</b> <b>{task.status}</b>\n"
         f"📂 <b>Категории:</b> <b>{', '.join([category.name for category in task.categories]) if task.categories else 'Нет категорий'}</b>\n"
         f"✅ <b>Дата выполнения:</b> <b>{task_completed_at}</b>"
@@ -40,4 +68,27 @@ def get_detail_task(task: TaskSchema) -> str:
 
 
 def get_date_strf(date: datetime) -> str:
-    return date.strftime("%d.%m.%Y, %H:%M:%S")
+    return date.strftime(DATE_FORMAT)
+
+
+def get_batch_summary(
+    template: str, results: list[TaskBatchResult], titles: dict[str, str]
+) -> str:
+    """Одно сообщение с итогом массового действия: сколько задач
+    обработано и почему не удалось остальные. Названия задач и тексты
+    ошибок экранируются: сообщение отправляется в HTML."""
+
+    failed = [result for result in results if not result.ok]
+    lines = [
+        template.format(done=len(results) - len(failed), total=len(results))
+    ]
+    lines.extend(
+        BULK_FAILED_ITEM.format(
+            title=html_decoration.quote(
+                titles.get(result.task_id, result.task_id)
+            ),
+            error=html_decoration.quote(result.error.message),
+        )
+        for result in failed
+    )
+    return "\n".join(lines)
@@ -0,0 +1,47 @@
+from datetime import date, datetime, time
+from functools import lru_cache
+from typing import Iterable
+
+import pytz
+from pytz.tzinfo import BaseTzInfo
+
+
+@lru_cache(maxsize=None)
+def get_zone(name: str) -> BaseTzInfo:
+    """Часовой пояс по имени IANA, объект создаётся один раз на имя.
+
+    :raises pytz.UnknownTimeZoneError: если пояса нет
+    """
+
+    return pytz.timezone(name)
+
+
+def convert_many(
+    values: Iterable[datetime | None], zone: BaseTzInfo
+) -> list[datetime | None]:
+    """Переводит даты в часовой пояс за один проход. Совпадающие моменты
+    (например, общий дедлайн у нескольких задач) пересчитываются один
+    раз."""
+
+    converted: dict[datetime, datetime] = {}
+    result = []
+    for value in values:
+        if value is not None:
+            local = converted.get(value)
+            if local is None:
+                local = converted[value] = value.astimezone(zone)
+            value = local
+        result.append(value)
+    return result
+
+
+def get_today(zone: BaseTzInfo) -> date:
+    return datetime.now(zone).date()
+
+
+def combine_local(day: date, moment: time, zone: BaseTzInfo) -> datetime:
+    """Дата и время, введённые пользователем в его поясе, как aware
+    datetime. У pytz поясов нужен localize, а не tzinfo=, иначе
+    смещение будет по LMT."""
+
+    return zone.localize(datetime.combine(day, moment))